@@ -42,4 +42,24 @@ df_scores['SciScore'] = df_scores['SciScore'].fillna(0)
 # Merge (join) the two DataFrames based on the common 'StudentID' column.
 # This combines the student names and their scores into a single DataFrame.
 df_merged = pd.merge(df_students, df_scores, on='StudentID')
-print(f"Merged DataFrame:\n{df_merged}\n")
\ No newline at end of file
+print(f"Merged DataFrame:\n{df_merged}\n")
+
+#-------Out-of-Core Merge Example--------
+
+# For tables that do not fit in memory, the same join can be done partition by partition on disk.
+# See partitioned_join.py: both tables are split into hash partitions by 'StudentID' and joined piece by piece.
+from partitioned_join import collect_partitioned_merge
+
+df_merged_ooc = collect_partitioned_merge(df_students, df_scores, on='StudentID', n_partitions=2)
+print(f"Out-of-core merge gives the same result: {df_merged_ooc.equals(df_merged)}")
+
+
+#-------Streaming Imputation Example--------
+
+# fillna(mean) above needs the whole column in memory. StreamingImputer (see streaming_imputer.py)
+# learns the mean from chunks in a first pass and fills the chunks in a second pass.
+from streaming_imputer import StreamingImputer
+
+score_chunks = [df1.iloc[:2], df1.iloc[2:]]  # pretend the data arrives in two chunks
+score_imputer = StreamingImputer({'Score': 'mean'}).fit(score_chunks)
+print(f"Streaming mean for 'Score': {score_imputer.statistics_['Score']['global']}")
@@ -1,4 +1,6 @@
 # --- Part 1: File I/O with Exception Handling ---
+import numbers
+import numpy as np
 import pandas as pd
 
 # Create a simple DataFrame to be saved as a CSV file.
@@ -28,22 +30,106 @@ except Exception as e:
 # --- Part 2: Exception Handling in Functions ---
 print("\nPart 2: Exception Handling in Functions")
 
-# Define a function that performs division but handles potential errors.
-def safe_divide(a, b):
-    try:
-        # Attempt to perform the division.
-        return a / b
-    # Catch the specific error that occurs when dividing by zero.
-    except ZeroDivisionError:
-        return "Error: Division by zero is not allowed."
-    # Catch the error that occurs if the inputs are of incompatible types (e.g., number and string).
-    except TypeError:
-        return "Error: Invalid input type. Please provide numbers."
+# Error codes returned next to the division result.
+# Keeping the errors in a separate integer mask lets the result stay a float array,
+# instead of mixing numbers and error strings in one object-dtype column.
+DIVIDE_OK = 0
+DIVIDE_BY_ZERO = 1
+DIVIDE_TYPE_ERROR = 2
+DIVIDE_NAN_INPUT = 3
+
+# How error positions are filled in the result array.
+FILL_POLICIES = ('nan', 'zero', 'ieee')
+
+
+def _to_float_array(values):
+    """
+    Converts scalars, lists, NumPy arrays or pandas Series into a float array.
+
+    Args:
+        values: Numeric input of any shape
+
+    Returns:
+        Tuple (float_array, type_error_mask). Elements that are not numbers
+        (e.g. strings) become NaN and are flagged in the mask.
+    """
+    arr = np.asarray(values)
+    # Numeric and boolean arrays convert directly - the fast path for real columns.
+    if arr.dtype.kind in 'biuf':
+        return arr.astype(np.float64), np.zeros(arr.shape, dtype=bool)
+    # Object/string arrays: only genuine numbers are valid operands, like in a / b.
+    flat = arr.ravel()
+    is_number = np.fromiter((isinstance(v, numbers.Number) for v in flat), dtype=bool, count=flat.size)
+    out = np.full(flat.size, np.nan)
+    out[is_number] = flat[is_number].astype(np.float64)
+    return out.reshape(arr.shape), ~is_number.reshape(arr.shape)
+
+
+def safe_divide(a, b, fill='nan'):
+    """
+    Divides a by b element-wise in a single vectorized pass.
+
+    Works on scalars, lists, NumPy arrays and pandas Series. Two Series are aligned on
+    their index first, like a / b (labels found in only one of them count as NaN input);
+    with one Series argument its index is kept. Floating point warnings are silenced with np.errstate
+    and every failed element is reported in a separate error-code mask.
+
+    Args:
+        a: Numerator (scalar or array-like)
+        b: Denominator (scalar or array-like)
+        fill: What to put at error positions - 'nan' (default), 'zero',
+              'ieee' (keep NumPy's inf/nan result) or any number
+
+    Returns:
+        Tuple (result, errors): a float array/Series and an int8 array/Series
+        holding DIVIDE_OK, DIVIDE_BY_ZERO, DIVIDE_TYPE_ERROR or DIVIDE_NAN_INPUT
+    """
+    if not isinstance(fill, numbers.Number) and fill not in FILL_POLICIES:
+        raise ValueError(f"fill must be a number or one of {FILL_POLICIES}, got {fill!r}")
+
+    if isinstance(a, pd.Series) and isinstance(b, pd.Series):
+        a, b = a.align(b)
+    num, num_type_error = _to_float_array(a)
+    den, den_type_error = _to_float_array(b)
+    num, den, num_type_error, den_type_error = np.broadcast_arrays(num, den, num_type_error, den_type_error)
+
+    # The actual division - one pass over the whole array, no Python loop.
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = num / den
+
+    # Build the error mask. Later assignments win, so the most specific cause is kept:
+    # type error > NaN input > division by zero.
+    errors = np.zeros(result.shape, dtype=np.int8)
+    errors[den == 0] = DIVIDE_BY_ZERO
+    errors[np.isnan(num) | np.isnan(den)] = DIVIDE_NAN_INPUT
+    errors[num_type_error | den_type_error] = DIVIDE_TYPE_ERROR
+
+    # Apply the fill policy to every failed element.
+    if fill != 'ieee':
+        fill_value = 0.0 if fill == 'zero' else np.nan if fill == 'nan' else float(fill)
+        result = np.where(errors != DIVIDE_OK, fill_value, result)
+
+    # Return Series when Series came in, so the result can be assigned as a column.
+    series = a if isinstance(a, pd.Series) else b if isinstance(b, pd.Series) else None
+    if series is not None:
+        return pd.Series(result, index=series.index), pd.Series(errors, index=series.index)
+    if result.ndim == 0:
+        return result.item(), int(errors)
+    return result, errors
+
 
 print("\nTesting safe_divide function:")
-print(safe_divide(10, 2))      # Expected output: 5.0
-print(safe_divide(10, 0))      # Expected output: Error message for division by zero.
-print(safe_divide(10, 'a'))    # Expected output: Error message for invalid type.
+print(safe_divide(10, 2))      # Expected output: (5.0, 0)
+print(safe_divide(10, 0))      # Expected output: (nan, 1) -> division by zero
+print(safe_divide(10, 'a'))    # Expected output: (nan, 2) -> invalid type
+
+# The same function works on whole columns at once.
+df_div = pd.DataFrame({'Revenue': [100.0, 50.0, np.nan, 80.0], 'Units': [4, 0, 2, 5]})
+df_div['Per_Unit'], df_div['Per_Unit_Error'] = safe_divide(df_div['Revenue'], df_div['Units'], fill='zero')
+print(df_div)
+
+# Two Series are matched by index, not by position.
+print(safe_divide(pd.Series([10.0, 20.0], index=['a', 'b']), pd.Series([5.0, 2.0], index=['b', 'c']))[0].to_dict())
 
 
 # --- Practice: Combining File I/O and Exception Handling ---
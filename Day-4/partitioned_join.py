@@ -0,0 +1,276 @@
+# OUT-OF-CORE PARTITIONED HASH JOIN
+# =================================
+# pd.merge() needs both tables fully in memory. When the tables are larger than RAM,
+# we can use the classic "Grace hash join" instead:
+# 1. PARTITION: read both tables chunk by chunk and write every row to an on-disk
+#    partition file chosen by hash(key) % n_partitions.
+#    Rows with the same key always land in the same partition number on both sides.
+# 2. JOIN: load one pair of partitions at a time and join them with pd.merge().
+#    Peak memory is bounded by the size of one partition pair (times the number of workers).
+# 3. STREAM: yield each joined partition as soon as it is ready.
+#
+# Supported joins: 'inner' and 'left'. collect_partitioned_merge() returns exactly the
+# same DataFrame as pd.merge() (same rows, order, index and dtypes).
+
+import os
+import pickle
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Hidden column that remembers the original position of every left row,
+# so the original pd.merge() order can be restored after the join.
+_ROW_COLUMN = '__left_row__'
+
+SUPPORTED_JOINS = ('inner', 'left')
+
+
+# --- Part 1: Partitioning (spilling to disk) ---
+
+def _iter_chunks(data, chunksize: int):
+    """
+    Yields DataFrame chunks from a DataFrame or from an iterable of DataFrames.
+
+    Args:
+        data: A DataFrame or an iterable of DataFrames (e.g. pd.read_csv(..., chunksize=...))
+        chunksize: Number of rows per chunk when a single DataFrame is given
+
+    Returns:
+        Generator of DataFrame chunks
+    """
+    if isinstance(data, pd.DataFrame):
+        for start in range(0, len(data), chunksize):
+            yield data.iloc[start:start + chunksize]
+    else:
+        yield from data
+
+
+def _partition_ids(keys: pd.DataFrame, n_partitions: int) -> np.ndarray:
+    """
+    Assigns every row to a partition by hashing its join key(s).
+
+    Numeric keys are hashed as float64, so that e.g. 101 (int) and 101.0 (float)
+    end up in the same partition - pd.merge() treats them as equal keys as well.
+
+    Args:
+        keys: DataFrame holding only the key column(s)
+        n_partitions: Number of partitions
+
+    Returns:
+        Array of partition numbers, one per row
+    """
+    keys = keys.apply(lambda col: col.astype('float64') if pd.api.types.is_numeric_dtype(col) else col)
+    hashes = pd.util.hash_pandas_object(keys, index=False).to_numpy()
+    return (hashes % np.uint64(n_partitions)).astype(np.int64)
+
+
+def _spill(data, on: list, n_partitions: int, chunksize: int, directory: str, side: str, add_row_numbers: bool):
+    """
+    Reads the input chunk by chunk and appends every row to its partition file.
+
+    Each partition file holds a sequence of pickled DataFrame pieces, so
+    dtypes are preserved exactly and no extra file-format library is needed.
+
+    Args:
+        data: Input table (DataFrame or iterable of DataFrames)
+        on: Join key column names
+        n_partitions: Number of partitions
+        chunksize: Rows per chunk for DataFrame input
+        directory: Folder for the partition files
+        side: 'left' or 'right', used in the file names
+        add_row_numbers: Whether to add the hidden original-row-number column
+
+    Returns:
+        Tuple (paths, schema, rows_per_partition). schema is an empty DataFrame
+        with the input columns, used when a partition has no rows.
+    """
+    paths = [os.path.join(directory, f'{side}_{i:04d}.pkl') for i in range(n_partitions)]
+    rows = np.zeros(n_partitions, dtype=np.int64)
+    # A DataFrame knows its columns even without rows; an iterator only through its first chunk.
+    schema = data.iloc[:0] if isinstance(data, pd.DataFrame) else None
+    if schema is not None and add_row_numbers:
+        schema = schema.assign(**{_ROW_COLUMN: np.arange(0)})
+    offset = 0
+    for chunk in _iter_chunks(data, chunksize):
+        if add_row_numbers:
+            chunk = chunk.assign(**{_ROW_COLUMN: np.arange(offset, offset + len(chunk))})
+        offset += len(chunk)
+        if schema is None:
+            schema = chunk.iloc[:0]
+        part = _partition_ids(chunk[on], n_partitions)
+        # Group the chunk by partition number and append each piece to its file.
+        for pid, piece in chunk.groupby(part, sort=False):
+            with open(paths[pid], 'ab') as f:
+                pickle.dump(piece, f, protocol=pickle.HIGHEST_PROTOCOL)
+            rows[pid] += len(piece)
+    if schema is None:
+        raise ValueError(f"The {side} input yielded no chunks; its columns are unknown.")
+    return paths, schema, rows
+
+
+def _load_partition(path: str, schema: pd.DataFrame) -> pd.DataFrame:
+    """Reads all pieces of one partition file back into a single DataFrame."""
+    if not os.path.exists(path):
+        return schema
+    pieces = []
+    with open(path, 'rb') as f:
+        while True:
+            try:
+                pieces.append(pickle.load(f))
+            except EOFError:
+                break
+    return pd.concat(pieces)
+
+
+# --- Part 2: Joining partition by partition ---
+
+def _join_partition(task):
+    """
+    Joins one pair of partitions. Runs in the parent process or in a worker process.
+
+    Args:
+        task: Tuple (left_path, right_path, left_schema, right_schema, on, how)
+
+    Returns:
+        The joined DataFrame for this partition
+    """
+    left_path, right_path, left_schema, right_schema, on, how = task
+    left_part = _load_partition(left_path, left_schema).sort_values(_ROW_COLUMN, kind='stable')
+    right_part = _load_partition(right_path, right_schema)
+    return pd.merge(left_part, right_part, on=on, how=how)
+
+
+def partitioned_merge(left, right, on, how: str = 'inner', n_partitions: int = 16,
+                      chunksize: int = 100_000, n_jobs: int = 1, workdir: str = None):
+    """
+    Streams the result of an out-of-core hash join, one partition at a time.
+
+    Args:
+        left: Left table (DataFrame or iterable of DataFrame chunks)
+        right: Right table (DataFrame or iterable of DataFrame chunks)
+        on: Join key column name or list of names
+        how: 'inner' or 'left'
+        n_partitions: Number of on-disk partitions; more partitions = less memory per step
+        chunksize: Rows per chunk when a whole DataFrame is passed in
+        n_jobs: Number of worker processes for the join phase (1 = no multiprocessing)
+        workdir: Folder for temporary partition files (default: system temp folder)
+
+    Returns:
+        Generator of joined DataFrames. Each one still contains the hidden
+        '__left_row__' column with the original left row number.
+    """
+    if how not in SUPPORTED_JOINS:
+        raise ValueError(f"how must be one of {SUPPORTED_JOINS}, got {how!r}")
+    on = [on] if isinstance(on, str) else list(on)
+
+    with tempfile.TemporaryDirectory(prefix='hashjoin_', dir=workdir) as directory:
+        # Phase 1: spill both sides to disk.
+        left_paths, left_schema, _ = _spill(left, on, n_partitions, chunksize, directory, 'left', True)
+        right_paths, right_schema, _ = _spill(right, on, n_partitions, chunksize, directory, 'right', False)
+
+        # Only partitions with left rows can produce output for inner and left joins.
+        tasks = [(left_paths[i], right_paths[i], left_schema, right_schema, on, how)
+                 for i in range(n_partitions) if os.path.exists(left_paths[i])]
+
+        # Phase 2: join each partition pair and stream the result.
+        if not tasks:
+            # No left rows: one empty result that still has the columns and dtypes of pd.merge().
+            yield pd.merge(left_schema, right_schema, on=on, how=how)
+        elif n_jobs == 1:
+            for task in tasks:
+                yield _join_partition(task)
+        else:
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                # executor.map yields results in task order as they finish,
+                # so at most ~n_jobs partitions are held in memory at once.
+                yield from executor.map(_join_partition, tasks)
+
+
+def collect_partitioned_merge(left, right, on, how: str = 'inner', **kwargs) -> pd.DataFrame:
+    """
+    Runs partitioned_merge() and returns one DataFrame identical to pd.merge().
+
+    The streamed pieces are concatenated and put back into pd.merge() order
+    using the hidden original-row-number column. Use this only when the
+    result fits in memory; otherwise consume partitioned_merge() directly.
+
+    Args:
+        left, right, on, how: Same as pd.merge()
+        **kwargs: Passed on to partitioned_merge()
+
+    Returns:
+        The joined DataFrame
+    """
+    pieces = list(partitioned_merge(left, right, on, how=how, **kwargs))
+    result = pd.concat(pieces, ignore_index=True)
+    result = result.sort_values(_ROW_COLUMN, kind='stable').drop(columns=_ROW_COLUMN)
+    return result.reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    # --- Example 1: The student merge from data_cleaning.py ---
+    print("--- Example 1: Student merge (inner join on StudentID) ---")
+    df_students = pd.DataFrame({'StudentID': [101, 102, 103, 104],
+                                'Name': ['Ece', 'Fikret', 'Gizem', 'Hakan']})
+    df_scores = pd.DataFrame({'StudentID': [101, 102, 103, 104],
+                              'MathScore': [90, 85, 88, 92],
+                              'SciScore': [0.0, 80, 0.0, 90]})
+    joined = collect_partitioned_merge(df_students, df_scores, on='StudentID', n_partitions=3)
+    pd.testing.assert_frame_equal(joined, pd.merge(df_students, df_scores, on='StudentID'))
+    print(joined)
+    print("Identical to pd.merge(): True")
+    print("-" * 60)
+
+    # --- Example 2: The employee merge from final__consolidation.py ---
+    print("--- Example 2: Employee merge (left join on EmpID) ---")
+    df_employees = pd.DataFrame({
+        'EmpID': [1, 2, 3, 4, 5, 6],
+        'Name': ['Ayşe Yılmaz', 'Burak Can', 'Ceren Ak', 'Deniz Su', 'Emre Kaya', 'Furkan Tek'],
+        'DeptID': [10, 20, 10, 30, 20, 30],
+        'Salary': [65000, 85000, 72000, 58000, 95000, 60000]
+    })
+    df_reviews = pd.DataFrame({
+        'EmpID': [1, 2, 3, 4, 5, 7],
+        'Score': [7, 11, 0, np.nan, 8, 5],
+        'Projects': [4, 5, 2, np.nan, 3, 1]
+    })
+    joined = collect_partitioned_merge(df_employees, df_reviews, on='EmpID', how='left', n_partitions=4)
+    pd.testing.assert_frame_equal(joined, pd.merge(df_employees, df_reviews, on='EmpID', how='left'))
+    print(joined)
+    print("Identical to pd.merge(how='left'): True")
+    # Zero-row tables: the DataFrame still tells its columns, so the result matches pd.merge().
+    for left_table, right_table in ((df_employees, df_reviews.iloc[:0]), (df_employees.iloc[:0], df_reviews)):
+        pd.testing.assert_frame_equal(
+            collect_partitioned_merge(left_table, right_table, on='EmpID', how='left', n_partitions=4),
+            pd.merge(left_table, right_table, on='EmpID', how='left'))
+    print("Empty left or right table, identical to pd.merge(how='left'): True")
+    print("-" * 60)
+
+    # --- Example 3: Larger tables, chunked input and parallel join ---
+    print("--- Example 3: 1,000,000 x 200,000 rows, 2 worker processes ---")
+    rng = np.random.default_rng(42)
+    big_left = pd.DataFrame({'Key': rng.integers(0, 300_000, 1_000_000), 'A': rng.random(1_000_000)})
+    big_right = pd.DataFrame({'Key': rng.permutation(300_000)[:200_000], 'B': rng.random(200_000)})
+
+    for how in SUPPORTED_JOINS:
+        start_time = time.time()
+        expected = pd.merge(big_left, big_right, on='Key', how=how)
+        merge_time = time.time() - start_time
+
+        start_time = time.time()
+        # Feed the left table as a stream of chunks, like pd.read_csv(..., chunksize=...).
+        left_stream = (big_left.iloc[i:i + 250_000] for i in range(0, len(big_left), 250_000))
+        largest_piece = 0
+        total_rows = 0
+        for piece in partitioned_merge(left_stream, big_right, on='Key', how=how, n_partitions=32, n_jobs=2):
+            largest_piece = max(largest_piece, len(piece))
+            total_rows += len(piece)
+        stream_time = time.time() - start_time
+
+        result = collect_partitioned_merge(big_left, big_right, on='Key', how=how, n_partitions=32)
+        pd.testing.assert_frame_equal(result, expected)
+        print(f"{how:>5} join: pd.merge {merge_time:.2f}s | partitioned {stream_time:.2f}s | "
+              f"{total_rows} rows, largest partition {largest_piece} rows | identical: True")
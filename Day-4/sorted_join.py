@@ -0,0 +1,291 @@
+# SORTED-KEY MERGE JOIN AND REUSABLE KEY INDEXES
+# ==============================================
+# pd.merge() re-analyses (factorizes or hashes) the join keys every time it is called,
+# even when the tables are already sorted on that key (like StudentID or EmpID).
+# For sorted keys, a merge join is enough:
+# - np.searchsorted() finds, for every left key, the block of equal keys in the right table
+# - no hash table is built, and the work is a binary search per left key over contiguous
+#   memory: O(m log n) for m left keys and n right keys, plus O(n log n) once when the
+#   right table is not sorted yet. Dense integer keys (1, 2, ..., n) skip the search: O(m).
+#
+# KeyIndex stores the sorted keys of a table once and can then be reused for many
+# lookups and joins against the same dimension table, e.g. the repeated employee joins
+# in final__consolidation.py. For unique right-side keys sorted_merge() returns exactly the same
+# DataFrame as pd.merge(). Missing keys (NaN) match each other, as in pd.merge(): NumPy sorts
+# NaN to the end and np.searchsorted() finds that block like any other key.
+
+import time
+
+import numpy as np
+import pandas as pd
+
+SUPPORTED_JOINS = ('inner', 'left')
+
+
+class KeyIndex:
+    """
+    A sorted index over one key column of a table, built once and reused.
+
+    If the key column is already sorted (checked in O(n), or trusted with
+    assume_sorted=True), no sort is done at all. Otherwise a stable argsort
+    is stored, so rows with equal keys keep their original order.
+    """
+
+    def __init__(self, table: pd.DataFrame, on: str, assume_sorted: bool = False):
+        self.table = table
+        self.on = on
+        keys = table[on].to_numpy()
+        if assume_sorted or pd.Index(keys).is_monotonic_increasing:
+            # Already sorted: the table order is the index order.
+            self.order = None
+            self.sorted_keys = keys
+        else:
+            self.order = np.argsort(keys, kind='stable')
+            self.sorted_keys = keys[self.order]
+        self.is_unique = bool(len(keys) == 0 or not _equal_keys(self.sorted_keys[1:], self.sorted_keys[:-1]).any())
+        # Dense integer keys (e.g. IDs 1, 2, ..., n) need no search at all:
+        # the position of a key is simply key - first_key.
+        self.is_dense = bool(self.is_unique and len(keys) > 0 and self.sorted_keys.dtype.kind in 'iu'
+                             and int(self.sorted_keys[-1]) - int(self.sorted_keys[0]) == len(keys) - 1)
+
+    def __len__(self) -> int:
+        return len(self.sorted_keys)
+
+    def _table_rows(self, sorted_positions: np.ndarray) -> np.ndarray:
+        """Converts positions in the sorted key array into row positions of the table."""
+        return sorted_positions if self.order is None else self.order[sorted_positions]
+
+    def ranges(self, keys) -> tuple:
+        """
+        Finds the block of matching rows for every lookup key.
+
+        Args:
+            keys: Array-like of lookup keys
+
+        Returns:
+            Tuple (start, stop) of arrays; the matches for keys[i] are
+            sorted positions start[i]..stop[i]-1 (empty when start == stop)
+        """
+        keys = np.asarray(keys)
+        if self.is_dense and keys.dtype.kind in 'iu':
+            start = keys.astype(np.int64) - int(self.sorted_keys[0])
+            hit = (start >= 0) & (start < len(self.sorted_keys))
+            start = np.where(hit, start, 0)
+            return start, start + hit
+        start = np.searchsorted(self.sorted_keys, keys, side='left')
+        if self.is_unique:
+            # With unique keys a block holds at most one row, so one search is enough.
+            hit = start < len(self.sorted_keys)
+            hit[hit] = _equal_keys(self.sorted_keys[start[hit]], keys[hit])
+            return start, start + hit
+        stop = np.searchsorted(self.sorted_keys, keys, side='right')
+        return start, stop
+
+    def positions(self, keys) -> np.ndarray:
+        """
+        Returns the table row position for every lookup key, -1 when missing.
+
+        Only valid for unique keys (a dimension table with one row per key).
+
+        Args:
+            keys: Array-like of lookup keys
+
+        Returns:
+            Integer array of row positions
+        """
+        if not self.is_unique:
+            raise ValueError(f"'{self.on}' is not unique; use join() for one-to-many lookups.")
+        start, stop = self.ranges(keys)
+        found = stop > start
+        rows = np.full(len(start), -1, dtype=np.int64)
+        rows[found] = self._table_rows(start[found])
+        return rows
+
+    def lookup(self, keys, column: str) -> pd.Series:
+        """
+        Looks up one column of the indexed table for every key (NaN when missing).
+
+        Args:
+            keys: Array-like of lookup keys
+            column: Column of the indexed table to return
+
+        Returns:
+            Series aligned with the lookup keys
+        """
+        rows = self.positions(keys)
+        return _take_with_missing(self.table[[column]], rows)[column]
+
+    def _expand_matches(self, keys: np.ndarray, how: str) -> tuple:
+        """
+        Pairs every left key with all its matching rows (one-to-many case).
+
+        Returns:
+            Tuple (left_rows, right_rows) of output row positions; right_rows is -1
+            for unmatched left rows in a left join
+        """
+        start, stop = self.ranges(keys)
+        counts = stop - start
+        # Unmatched left rows still produce one output row in a left join.
+        out_counts = np.maximum(counts, 1) if how == 'left' else counts
+
+        # Expand every left row into as many output rows as it has matches.
+        total = int(out_counts.sum())
+        left_rows = np.repeat(np.arange(len(keys)), out_counts)
+        # Offset of each output row inside its block of matches: 0, 1, 2, ...
+        block_starts = np.cumsum(out_counts) - out_counts
+        offsets = np.arange(total) - np.repeat(block_starts, out_counts)
+        matched = np.repeat(counts > 0, out_counts)
+        right_rows = np.full(total, -1, dtype=np.int64)
+        right_rows[matched] = self._table_rows(np.repeat(start, out_counts)[matched] + offsets[matched])
+        return left_rows, right_rows
+
+    def join(self, left: pd.DataFrame, how: str = 'inner', suffixes=('_x', '_y')) -> pd.DataFrame:
+        """
+        Joins a left table against the indexed table, like pd.merge(left, table, on=..., how=...).
+
+        With unique keys in the indexed table (the usual dimension-table case)
+        the result is identical to pd.merge(). With duplicate keys the same rows
+        are returned, grouped per left row in left-table order.
+
+        Args:
+            left: Left table with a column named like the index key
+            how: 'inner' or 'left'
+            suffixes: Suffixes for overlapping non-key column names
+
+        Returns:
+            The joined DataFrame
+        """
+        if how not in SUPPORTED_JOINS:
+            raise ValueError(f"how must be one of {SUPPORTED_JOINS}, got {how!r}")
+        if self.is_unique:
+            # Dimension-table case: every left row has at most one match.
+            right_rows = self.positions(left[self.on].to_numpy())
+            left_rows = np.arange(len(left)) if how == 'left' else np.flatnonzero(right_rows >= 0)
+            right_rows = right_rows[left_rows]
+        else:
+            left_rows, right_rows = self._expand_matches(left[self.on].to_numpy(), how)
+
+        # Build the output: left columns, then right non-key columns (like pd.merge).
+        right_cols = [c for c in self.table.columns if c != self.on]
+        overlap = set(right_cols) & (set(left.columns) - {self.on})
+        left_part = left.take(left_rows).reset_index(drop=True)
+        right_part = _take_with_missing(self.table[right_cols], right_rows)
+        left_part = left_part.rename(columns={c: f'{c}{suffixes[0]}' for c in overlap})
+        right_part = right_part.rename(columns={c: f'{c}{suffixes[1]}' for c in overlap})
+        return pd.concat([left_part, right_part], axis=1)
+
+
+def _equal_keys(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Element-wise a == b, where two missing keys (NaN) count as equal like in pd.merge()."""
+    return (a == b) | (pd.isna(a) & pd.isna(b))
+
+
+def _take_with_missing(frame: pd.DataFrame, rows: np.ndarray) -> pd.DataFrame:
+    """
+    Selects rows by position, where -1 means "no match" and becomes a missing value.
+
+    Missing rows are filled the same way pd.merge() fills them, so dtypes
+    are upcast only when at least one row is missing (e.g. int -> float).
+    """
+    if not (rows < 0).any():
+        return frame.take(rows).reset_index(drop=True)
+    # pd.api.extensions.take() fills -1 positions with the dtype's missing value.
+    columns = {}
+    for name, col in frame.items():
+        values = col.array if isinstance(col.dtype, pd.api.extensions.ExtensionDtype) else col.to_numpy()
+        columns[name] = pd.api.extensions.take(values, rows, allow_fill=True)
+    return pd.DataFrame(columns, columns=frame.columns)
+
+
+def sorted_merge(left: pd.DataFrame, right: pd.DataFrame, on: str, how: str = 'inner',
+                 assume_sorted: bool = False) -> pd.DataFrame:
+    """
+    Merge join on a single key; drop-in replacement for pd.merge(left, right, on=on, how=how).
+
+    Args:
+        left: Left table
+        right: Right table (the one that gets indexed)
+        on: Join key column name
+        how: 'inner' or 'left'
+        assume_sorted: Trust that right[on] is sorted and skip the check
+
+    Returns:
+        The joined DataFrame
+    """
+    return KeyIndex(right, on, assume_sorted=assume_sorted).join(left, how=how)
+
+
+if __name__ == "__main__":
+    # --- Example 1: The joins from data_cleaning.py and final__consolidation.py ---
+    print("--- Example 1: Same results as pd.merge() ---")
+    df_students = pd.DataFrame({'StudentID': [101, 102, 103, 104],
+                                'Name': ['Ece', 'Fikret', 'Gizem', 'Hakan']})
+    df_scores = pd.DataFrame({'StudentID': [101, 102, 103, 104],
+                              'MathScore': [90, 85, 88, 92],
+                              'SciScore': [0.0, 80, 0.0, 90]})
+    joined = sorted_merge(df_students, df_scores, on='StudentID')
+    pd.testing.assert_frame_equal(joined, pd.merge(df_students, df_scores, on='StudentID'))
+    print(joined)
+
+    df_employees = pd.DataFrame({
+        'EmpID': [1, 2, 3, 4, 5, 6],
+        'Name': ['Ayşe Yılmaz', 'Burak Can', 'Ceren Ak', 'Deniz Su', 'Emre Kaya', 'Furkan Tek'],
+        'DeptID': [10, 20, 10, 30, 20, 30],
+        'Salary': [65000, 85000, 72000, 58000, 95000, 60000]
+    })
+    df_reviews = pd.DataFrame({
+        'EmpID': [1, 2, 3, 4, 5, 7],
+        'Score': [7, 11, 0, np.nan, 8, 5],
+        'Projects': [4, 5, 2, np.nan, 3, 1]
+    })
+    joined = sorted_merge(df_employees, df_reviews, on='EmpID', how='left')
+    pd.testing.assert_frame_equal(joined, pd.merge(df_employees, df_reviews, on='EmpID', how='left'))
+    print(joined)
+    # Missing keys: NaN matches NaN, in the unique and in the one-to-many case.
+    left_nan = pd.DataFrame({'DeptID': [10.0, np.nan, 30.0, np.nan], 'Budget': [1, 2, 3, 4]})
+    for right_nan in (pd.DataFrame({'DeptID': [np.nan, 10.0], 'Head': ['Ayşe', 'Burak']}),
+                      pd.DataFrame({'DeptID': [np.nan, 10.0, np.nan], 'Head': ['Ayşe', 'Burak', 'Ceren']})):
+        for how in SUPPORTED_JOINS:
+            pd.testing.assert_frame_equal(sorted_merge(left_nan, right_nan, on='DeptID', how=how),
+                                          pd.merge(left_nan, right_nan, on='DeptID', how=how))
+    print("Both joins are identical to pd.merge(), also with NaN keys: True")
+    print("-" * 60)
+
+    # --- Example 2: One employee index reused for many lookups ---
+    print("--- Example 2: Reusing a KeyIndex on the employee table ---")
+    employee_index = KeyIndex(df_employees, on='EmpID')
+    print(f"Index over {len(employee_index)} employees, unique keys: {employee_index.is_unique}")
+    print("Names for reviews:", employee_index.lookup(df_reviews['EmpID'], 'Name').tolist())
+    reviews_with_names = employee_index.join(df_reviews, how='left')
+    pd.testing.assert_frame_equal(reviews_with_names, pd.merge(df_reviews, df_employees, on='EmpID', how='left'))
+    print(reviews_with_names)
+    print("-" * 60)
+
+    # --- Example 3: Performance on larger sorted tables ---
+    print("--- Example 3: 1,000,000 employees, 20 batches of 500,000 events ---")
+    rng = np.random.default_rng(7)
+    n_employees = 1_000_000
+    big_employees = pd.DataFrame({'EmpID': np.arange(n_employees),
+                                  'DeptID': rng.integers(10, 100, n_employees),
+                                  'Salary': rng.integers(40_000, 120_000, n_employees)})
+    batches = [pd.DataFrame({'EmpID': np.sort(rng.integers(0, n_employees + 1000, 500_000)),
+                             'Hours': rng.random(500_000)}) for _ in range(20)]
+
+    # Dense IDs (0..n-1) use direct addressing; sparse IDs (every 3rd number) use np.searchsorted.
+    for label, step in [('dense EmpIDs', 1), ('sparse EmpIDs', 3)]:
+        employees = big_employees.assign(EmpID=big_employees['EmpID'] * step)
+        events = [batch.assign(EmpID=batch['EmpID'] * step) for batch in batches]
+
+        start_time = time.time()
+        expected = [pd.merge(batch, employees, on='EmpID', how='left') for batch in events]
+        merge_time = time.time() - start_time
+
+        start_time = time.time()
+        big_index = KeyIndex(employees, on='EmpID')  # built once
+        results = [big_index.join(batch, how='left') for batch in events]
+        index_time = time.time() - start_time
+
+        for got, want in zip(results, expected):
+            pd.testing.assert_frame_equal(got, want)
+        print(f"{label}: pd.merge x20 {merge_time:.3f}s | KeyIndex.join x20 {index_time:.3f}s "
+              f"(including building the index once) | identical: True")
@@ -0,0 +1,318 @@
+# STREAMING IMPUTATION OF MISSING VALUES
+# ======================================
+# df[col].fillna(df[col].mean()) needs the whole column in memory to compute the mean.
+# StreamingImputer splits the work into two passes over chunked input:
+# 1. FIT: read the data chunk by chunk and accumulate small statistics
+#    - mean:          running sum and count
+#    - median:        a fixed-size random sample (bottom-k sampling), so memory stays bounded,
+#                     or a mergeable quantile sketch (e.g. KLLSketch from Day-5/quantile_sketch.py)
+#    - most_frequent: running value counts
+#    optionally separately for every group (e.g. per Department), with the
+#    column-wide value as a fallback for groups that have no data.
+# 2. TRANSFORM: fill the missing values chunk by chunk with the fitted statistics.
+#
+# The fitted statistics can be saved to a JSON file and loaded again later,
+# so new batches are imputed with the training statistics without recomputing them.
+
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+STRATEGIES = ('mean', 'median', 'most_frequent')
+
+
+def _to_python(value):
+    """Converts NumPy scalars into plain Python values so they can be written as JSON."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class StreamingImputer:
+    """
+    Fills missing values with statistics accumulated over chunked input.
+
+    Args:
+        strategies: Dictionary {column: 'mean' | 'median' | 'most_frequent'}
+        group_by: Optional column name; statistics are then computed per group
+        sample_size: Number of values kept per column (and group) for approximate medians
+        random_state: Seed for the median sampling, for reproducible results
+        sketch_factory: Optional function returning a new quantile sketch (an object with
+            update(values) and quantile(q)); medians are then computed with sketches
+    """
+
+    def __init__(self, strategies: dict, group_by: str = None, sample_size: int = 10_000, random_state: int = 0,
+                 sketch_factory=None):
+        for column, strategy in strategies.items():
+            if strategy not in STRATEGIES:
+                raise ValueError(f"Unknown strategy {strategy!r} for '{column}'; use one of {STRATEGIES}")
+        self.strategies = dict(strategies)
+        self.group_by = group_by
+        self.sample_size = sample_size
+        self.sketch_factory = sketch_factory
+        self.random_state = random_state
+        self._reset()
+
+    def _reset(self):
+        """Forgets all accumulated statistics."""
+        self._rng = np.random.default_rng(self.random_state)
+        self._partials = {column: None for column in self.strategies}
+        self._statistics = None
+
+    # --- Pass 1: accumulating statistics ---
+
+    def partial_fit(self, chunk: pd.DataFrame) -> 'StreamingImputer':
+        """
+        Adds one chunk of data to the running statistics.
+
+        Args:
+            chunk: DataFrame containing the imputed columns (and the group column)
+
+        Returns:
+            self, so calls can be chained
+        """
+        if self._partials is None:
+            raise RuntimeError("This imputer was loaded from saved statistics and cannot be refitted.")
+        for column, strategy in self.strategies.items():
+            observed = chunk[column].notna()
+            frame = pd.DataFrame({'value': chunk[column][observed]})
+            if self.group_by:
+                frame['group'] = chunk[self.group_by][observed]
+            accumulate = getattr(self, f'_accumulate_{strategy}')
+            # Every partial is a pair: (column-wide state, per-group state or None).
+            previous = self._partials[column] or (None, None)
+            self._partials[column] = (
+                accumulate(frame.drop(columns='group', errors='ignore'), previous[0]),
+                accumulate(frame, previous[1]) if self.group_by else None,
+            )
+        self._statistics = None
+        return self
+
+    @staticmethod
+    def _keys(frame: pd.DataFrame) -> list:
+        return ['group'] if 'group' in frame else []
+
+    def _accumulate_mean(self, frame: pd.DataFrame, previous):
+        # Running sum and count, optionally per group.
+        keys = self._keys(frame)
+        if keys:
+            stats = frame.groupby(keys)['value'].agg(['sum', 'count'])
+        else:
+            stats = pd.DataFrame({'sum': [frame['value'].sum()], 'count': [len(frame)]})
+        return stats if previous is None else previous.add(stats, fill_value=0)
+
+    def _accumulate_most_frequent(self, frame: pd.DataFrame, previous):
+        # Running value counts, optionally per group.
+        counts = frame.groupby(self._keys(frame) + ['value']).size()
+        return counts if previous is None else previous.add(counts, fill_value=0)
+
+    def _accumulate_median(self, frame: pd.DataFrame, previous):
+        if self.sketch_factory is not None:
+            return self._accumulate_median_sketch(frame, previous)
+        # Bottom-k sampling: every value gets a random priority and only the sample_size
+        # values with the smallest priorities are kept (per group). The result is a uniform
+        # random sample of everything seen so far, and two samples merge the same way.
+        frame = frame.assign(priority=self._rng.random(len(frame)))
+        combined = frame if previous is None else pd.concat([previous, frame], ignore_index=True)
+        combined = combined.sort_values('priority', kind='stable')
+        keys = self._keys(frame)
+        if keys:
+            return combined.groupby(keys, sort=False).head(self.sample_size)
+        return combined.head(self.sample_size)
+
+    def _accumulate_median_sketch(self, frame: pd.DataFrame, previous):
+        # One sketch for the column, or a dictionary {group: sketch}.
+        if not self._keys(frame):
+            sketch = previous if previous is not None else self.sketch_factory()
+            return sketch.update(frame['value'].to_numpy())
+        sketches = previous if previous is not None else {}
+        for group, values in frame.groupby('group')['value']:
+            if group not in sketches:
+                sketches[group] = self.sketch_factory()
+            sketches[group].update(values.to_numpy())
+        return sketches
+
+    def fit(self, chunks) -> 'StreamingImputer':
+        """
+        Runs the first pass over all chunks, starting from scratch.
+
+        Like sklearn's fit(), earlier statistics are discarded; use partial_fit()
+        to keep adding data to them.
+
+        Args:
+            chunks: A DataFrame or an iterable of DataFrames (e.g. pd.read_csv(..., chunksize=...))
+
+        Returns:
+            self
+        """
+        self._reset()
+        for chunk in ([chunks] if isinstance(chunks, pd.DataFrame) else chunks):
+            self.partial_fit(chunk)
+        return self
+
+    # --- Finalizing the statistics ---
+
+    @property
+    def statistics_(self) -> dict:
+        """
+        The fitted fill values: {column: {'global': value, 'groups': {group: value}}}.
+        """
+        if self._statistics is None:
+            if self._partials is None or any(p is None for p in self._partials.values()):
+                raise RuntimeError("The imputer has not been fitted yet. Call fit() first.")
+            self._statistics = {}
+            for column, (global_state, group_state) in self._partials.items():
+                finalize = getattr(self, f'_finalize_{self.strategies[column]}')
+                global_value = finalize(global_state)
+                groups = finalize(group_state) if group_state is not None else pd.Series(dtype=float)
+                self._statistics[column] = {
+                    'global': _to_python(global_value.iloc[0]) if len(global_value) else np.nan,
+                    'groups': {_to_python(g): _to_python(v) for g, v in groups.items()},
+                }
+        return self._statistics
+
+    def _finalize_mean(self, stats: pd.DataFrame) -> pd.Series:
+        return (stats['sum'] / stats['count']).dropna()
+
+    def _finalize_median(self, sample) -> pd.Series:
+        if isinstance(sample, dict):
+            return pd.Series({group: sketch.quantile(0.5) for group, sketch in sample.items() if sketch.n})
+        if not isinstance(sample, pd.DataFrame):
+            return pd.Series([sample.quantile(0.5)] if sample.n else [])
+        keys = self._keys(sample)
+        if keys:
+            return sample.groupby(keys)['value'].median()
+        return pd.Series([sample['value'].median()]).dropna()
+
+    def _finalize_most_frequent(self, counts: pd.Series) -> pd.Series:
+        # Highest count wins; ties go to the smallest value, like Series.mode().iloc[0].
+        table = counts.rename('count').reset_index()
+        keys = [name for name in table.columns if name == 'group']
+        table = table.sort_values(keys + ['count', 'value'], ascending=[True] * len(keys) + [False, True],
+                                  kind='stable')
+        if keys:
+            return table.drop_duplicates('group').set_index('group')['value']
+        return table['value'].head(1).reset_index(drop=True)
+
+    # --- Pass 2: filling missing values ---
+
+    def transform(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """
+        Fills the missing values of one chunk with the fitted statistics.
+
+        Args:
+            chunk: DataFrame with the same columns that were used for fitting
+
+        Returns:
+            A new DataFrame with the missing values filled
+        """
+        chunk = chunk.copy()
+        for column, stats in self.statistics_.items():
+            fill = stats['global']
+            if self.group_by and stats['groups']:
+                # Group value first, column-wide value for unknown or empty groups.
+                fill = chunk[self.group_by].map(stats['groups']).fillna(stats['global'])
+            chunk[column] = chunk[column].fillna(fill)
+        return chunk
+
+    def transform_chunks(self, chunks):
+        """
+        Runs the second pass lazily, one chunk at a time.
+
+        Args:
+            chunks: An iterable of DataFrames
+
+        Returns:
+            Generator of imputed DataFrames
+        """
+        for chunk in chunks:
+            yield self.transform(chunk)
+
+    # --- Saving and loading the fitted statistics ---
+
+    def to_dict(self) -> dict:
+        """Returns the fitted imputer as a JSON-compatible dictionary."""
+        return {
+            'strategies': self.strategies,
+            'group_by': self.group_by,
+            'statistics': {column: {'global': stats['global'],
+                                    'groups': [[group, value] for group, value in stats['groups'].items()]}
+                           for column, stats in self.statistics_.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'StreamingImputer':
+        """Rebuilds a fitted imputer from to_dict() output."""
+        imputer = cls(data['strategies'], group_by=data['group_by'])
+        imputer._partials = None
+        imputer._statistics = {column: {'global': stats['global'], 'groups': dict(map(tuple, stats['groups']))}
+                               for column, stats in data['statistics'].items()}
+        return imputer
+
+    def save(self, path: str):
+        """Writes the fitted statistics to a JSON file."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str) -> 'StreamingImputer':
+        """Loads an imputer saved with save()."""
+        with open(path, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+if __name__ == "__main__":
+    # --- Example 1: The Score column from data_cleaning.py ---
+    print("--- Example 1: Mean imputation, one chunk at a time ---")
+    df1 = pd.DataFrame({
+        'ID': [1, 2, 3, 4],
+        'Name': ['Ali', 'Buse', 'Can', 'Deniz'],
+        'Score': [85, 92, np.nan, 78]
+    })
+    chunks = [df1.iloc[:2], df1.iloc[2:]]
+    imputer = StreamingImputer({'Score': 'mean'}).fit(chunks)
+    streamed = pd.concat(imputer.transform_chunks(chunks))
+    pd.testing.assert_frame_equal(streamed, df1.assign(Score=df1['Score'].fillna(df1['Score'].mean())))
+    print(streamed)
+    print("Same as fillna(mean):", True)
+    # fit() starts over: fitting again on other data does not mix in the old statistics.
+    imputer.fit(pd.DataFrame({'Score': [10.0, np.nan, 20.0]}))
+    print("Mean after refitting on [10, NaN, 20]:", imputer.statistics_['Score']['global'])
+    print("-" * 60)
+
+    # --- Example 2: Per-group statistics and saving/loading ---
+    print("--- Example 2: Per-department statistics, saved and reapplied ---")
+    rng = np.random.default_rng(1)
+    n_rows = 1_000_000
+    train = pd.DataFrame({
+        'Dept': rng.choice(['HR', 'IT', 'Sales'], n_rows),
+        'Salary': rng.normal(60_000, 10_000, n_rows).round(),
+        'Rating': rng.exponential(3.0, n_rows),
+        'City': rng.choice(['Ankara', 'Izmir', 'Istanbul'], n_rows, p=[0.2, 0.3, 0.5]),
+    })
+    for column in ['Salary', 'Rating', 'City']:
+        train.loc[rng.random(n_rows) < 0.1, column] = np.nan
+
+    start_time = time.time()
+    imputer = StreamingImputer({'Salary': 'mean', 'Rating': 'median', 'City': 'most_frequent'}, group_by='Dept')
+    imputer.fit(train.iloc[i:i + 100_000] for i in range(0, n_rows, 100_000))
+    print(f"Fitted on {n_rows} rows in 10 chunks in {time.time() - start_time:.2f} seconds")
+
+    exact_median = train.groupby('Dept')['Rating'].median()
+    for dept, approx in imputer.statistics_['Rating']['groups'].items():
+        print(f"Median Rating for {dept}: approx {approx:.4f} vs exact {exact_median[dept]:.4f}")
+    exact_mean = train.groupby('Dept')['Salary'].mean()
+    print("Salary means match exactly:",
+          np.allclose(pd.Series(imputer.statistics_['Salary']['groups'])[exact_mean.index], exact_mean))
+
+    stats_path = os.path.join(tempfile.mkdtemp(), 'imputer_stats.json')
+    imputer.save(stats_path)
+    restored = StreamingImputer.load(stats_path)
+    new_batch = pd.DataFrame({'Dept': ['IT', 'HR', 'Legal'],
+                              'Salary': [np.nan, 52_000, np.nan],
+                              'Rating': [np.nan, 4.0, np.nan],
+                              'City': [np.nan, 'Izmir', np.nan]})
+    print("\nNew batch imputed with the saved statistics ('Legal' falls back to the column-wide value):")
+    print(restored.transform(new_batch))
@@ -0,0 +1,303 @@
+# APPROXIMATE DISTINCT COUNTS AND HEAVY HITTERS
+# =============================================
+# value_counts() keeps one counter for every distinct key. For Discount_Code or Region
+# that is tiny, but for user IDs, URLs or product SKUs in a long stream it is not.
+# Three classic sketches answer the usual questions with fixed memory:
+#
+# - HyperLogLog:  "how many distinct keys?"  2**p one-byte registers, ~1.04 / sqrt(2**p) error
+# - Count-Min:    "how often did key x occur?"  depth x width counters, never underestimates,
+#                 overestimates by at most e * N / width with probability 1 - exp(-depth)
+# - Space-Saving: "which keys are the most frequent?"  k counters, every reported count is
+#                 an upper bound that is at most N / k too high
+#
+# All three are mergeable: sketches from different chunks or worker processes combine into
+# the sketch of the whole stream. StreamingValueCounts wraps them and counts exactly while the
+# number of distinct keys is below a threshold, switching to the sketches only when needed.
+
+import time
+
+import numpy as np
+import pandas as pd
+
+
+def hash_values(values) -> np.ndarray:
+    """
+    Hashes any values (numbers, strings, ...) to uint64, vectorized and stable across chunks.
+
+    Args:
+        values: Array-like of keys
+
+    Returns:
+        Array of uint64 hashes
+    """
+    return pd.util.hash_pandas_object(pd.Series(values), index=False).to_numpy()
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    """Exact bit length of uint64 values (0 for 0), computed on two 32-bit halves."""
+    high = (values >> np.uint64(32)).astype(np.float64)
+    low = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    # Floats represent 32-bit integers exactly, so frexp gives the exact bit length.
+    high_bits = np.frexp(high)[1]
+    low_bits = np.frexp(low)[1]
+    return np.where(high > 0, 32 + high_bits, low_bits)
+
+
+class HyperLogLog:
+    """
+    Distinct-count sketch.
+
+    Args:
+        p: Precision; uses 2**p registers (p=14: 16 KB, ~0.8% standard error)
+    """
+
+    def __init__(self, p: int = 14):
+        self.p = p
+        self.m = 2 ** p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def update(self, values) -> 'HyperLogLog':
+        hashes = hash_values(values)
+        # The first p bits choose the register, the rest give the "rank" (position of the first 1-bit).
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.int64)
+        rest = hashes & np.uint64((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - _bit_length(rest) + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+        return self
+
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self) -> float:
+        """Estimated number of distinct values."""
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m ** 2 / np.sum(2.0 ** -self.registers.astype(np.float64))
+        empty = np.count_nonzero(self.registers == 0)
+        if estimate <= 2.5 * self.m and empty > 0:
+            # Small range correction (linear counting).
+            estimate = self.m * np.log(self.m / empty)
+        return float(estimate)
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / np.sqrt(self.m)
+
+
+class CountMinSketch:
+    """
+    Frequency sketch: estimated count of any key, never lower than the true count.
+
+    Args:
+        width: Counters per row; the overestimate is at most e * N / width ...
+        depth: Number of rows; ... with probability 1 - exp(-depth)
+    """
+
+    def __init__(self, width: int = 2 ** 16, depth: int = 5):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.total = 0
+
+    def _columns(self, hashes: np.ndarray) -> np.ndarray:
+        # Double hashing: row i uses (h1 + i * h2) mod width.
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+        rows = np.arange(self.depth, dtype=np.uint64)[:, None]
+        return ((h1[None, :] + rows * h2[None, :]) % np.uint64(self.width)).astype(np.int64)
+
+    def update(self, values, counts=None) -> 'CountMinSketch':
+        counts = np.ones(len(values), dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+        columns = self._columns(hash_values(values))
+        for row in range(self.depth):
+            self.table[row] += np.bincount(columns[row], weights=counts, minlength=self.width).astype(np.int64)
+        self.total += int(counts.sum())
+        return self
+
+    def merge(self, other: 'CountMinSketch') -> 'CountMinSketch':
+        self.table += other.table
+        self.total += other.total
+        return self
+
+    def estimate(self, values) -> np.ndarray:
+        """Estimated counts (upper bounds) for the given keys."""
+        columns = self._columns(hash_values(values))
+        return self.table[np.arange(self.depth)[:, None], columns].min(axis=0)
+
+
+class SpaceSaving:
+    """
+    Top-k heavy hitters with k counters (mergeable Space-Saving summary).
+
+    Every tracked key has a count (an upper bound of its true count) and an error
+    (how much the count may be too high). Any key with a true frequency above N / k is tracked.
+
+    Args:
+        k: Number of counters
+    """
+
+    def __init__(self, k: int = 100):
+        self.k = k
+        self.counts = pd.Series(dtype=np.int64)
+        self.errors = pd.Series(dtype=np.int64)
+        self.total = 0
+
+    def _floor(self) -> int:
+        # A key that is not tracked occurred at most min-count times (0 while there is room).
+        return int(self.counts.min()) if len(self.counts) >= self.k else 0
+
+    def _merge_summary(self, counts: pd.Series, errors: pd.Series, floor: int, total: int):
+        own_floor = self._floor()
+        keys = self.counts.index.union(counts.index)
+        # Keys missing from one summary get that summary's floor as count and error.
+        merged_counts = (self.counts.reindex(keys, fill_value=own_floor)
+                         + counts.reindex(keys, fill_value=floor))
+        merged_errors = (self.errors.reindex(keys, fill_value=own_floor)
+                         + errors.reindex(keys, fill_value=floor))
+        top = merged_counts.sort_values(ascending=False, kind='stable').head(self.k).index
+        self.counts = merged_counts[top].astype(np.int64)
+        self.errors = merged_errors[top].astype(np.int64)
+        self.total += total
+
+    def update(self, values) -> 'SpaceSaving':
+        # Exact counts within the chunk, truncated to k counters, then merged.
+        chunk_counts = pd.Series(values).value_counts(sort=True)
+        floor = int(chunk_counts.iloc[self.k]) if len(chunk_counts) > self.k else 0
+        kept = chunk_counts.head(self.k)
+        self._merge_summary(kept, pd.Series(floor, index=kept.index), floor, int(chunk_counts.sum()))
+        return self
+
+    def merge(self, other: 'SpaceSaving') -> 'SpaceSaving':
+        self._merge_summary(other.counts, other.errors, other._floor(), other.total)
+        return self
+
+    def top(self, n: int = 10) -> pd.DataFrame:
+        """The n most frequent keys with their count upper bounds and guaranteed lower bounds."""
+        order = self.counts.sort_values(ascending=False, kind='stable').head(n).index
+        return pd.DataFrame({'count': self.counts[order], 'lower_bound': self.counts[order] - self.errors[order]})
+
+
+class StreamingValueCounts:
+    """
+    value_counts() for chunked streams: exact below a cardinality threshold, sketched above it.
+
+    Args:
+        k: Counters for the heavy hitters once in sketch mode
+        exact_threshold: Maximum number of distinct keys that are counted exactly
+        hll_precision: HyperLogLog precision (2**p registers)
+        cms_width, cms_depth: Count-Min sketch size
+    """
+
+    def __init__(self, k: int = 100, exact_threshold: int = 10_000, hll_precision: int = 14,
+                 cms_width: int = 2 ** 16, cms_depth: int = 5):
+        self.exact_threshold = exact_threshold
+        self.exact_counts = pd.Series(dtype=np.int64)
+        self.hll = HyperLogLog(hll_precision)
+        self.cms = CountMinSketch(cms_width, cms_depth)
+        self.heavy_hitters = SpaceSaving(k)
+        self.total = 0
+
+    @property
+    def is_exact(self) -> bool:
+        return self.exact_counts is not None
+
+    def update(self, values) -> 'StreamingValueCounts':
+        values = pd.Series(values).dropna()
+        # The sketches are always updated, so switching modes later needs no second pass.
+        self.hll.update(values)
+        chunk_counts = values.value_counts()
+        self.cms.update(chunk_counts.index.to_numpy(), chunk_counts.to_numpy())
+        self.heavy_hitters.update(values)
+        self.total += len(values)
+        if self.is_exact:
+            self.exact_counts = self.exact_counts.add(chunk_counts, fill_value=0).astype(np.int64)
+            if len(self.exact_counts) > self.exact_threshold:
+                self.exact_counts = None  # too many keys: from now on only the sketches are used
+        return self
+
+    def merge(self, other: 'StreamingValueCounts') -> 'StreamingValueCounts':
+        self.hll.merge(other.hll)
+        self.cms.merge(other.cms)
+        self.heavy_hitters.merge(other.heavy_hitters)
+        self.total += other.total
+        if self.is_exact and other.is_exact:
+            self.exact_counts = self.exact_counts.add(other.exact_counts, fill_value=0).astype(np.int64)
+            if len(self.exact_counts) > self.exact_threshold:
+                self.exact_counts = None
+        else:
+            self.exact_counts = None
+        return self
+
+    def nunique(self) -> float:
+        """Number of distinct keys (exact, or the HyperLogLog estimate)."""
+        return len(self.exact_counts) if self.is_exact else self.hll.count()
+
+    def top(self, n: int = 10) -> pd.Series:
+        """The n most frequent keys, like value_counts().head(n)."""
+        if self.is_exact:
+            return self.exact_counts.sort_values(ascending=False, kind='stable').head(n).rename('count')
+        return self.heavy_hitters.top(n)['count']
+
+    def count(self, keys) -> np.ndarray:
+        """Frequency of the given keys (exact, or Count-Min upper bounds)."""
+        if self.is_exact:
+            return self.exact_counts.reindex(keys, fill_value=0).to_numpy()
+        return self.cms.estimate(keys)
+
+
+if __name__ == "__main__":
+    # --- Example 1: Discount_Code counts from advanced_consolidation.py (exact mode) ---
+    print("--- Example 1: Small cardinality is counted exactly ---")
+    codes = pd.Series(['WELCOME20', 'NONE', 'SEPTSALE', 'NULL', 'WELCOME20', 'NONE', 'SEPTSALE'])
+    valid = codes[~codes.isin(['NONE', 'NULL'])]
+    counter = StreamingValueCounts()
+    for chunk in (valid.iloc[:2], valid.iloc[2:]):
+        counter.update(chunk)
+    assert counter.is_exact and counter.top().to_dict() == valid.value_counts().to_dict()
+    print(counter.top().to_dict(), "| distinct:", counter.nunique(), "| exact:", counter.is_exact)
+    print("-" * 60)
+
+    # --- Example 2: Region/Product counts over transaction partitions ---
+    print("--- Example 2: Region/Product counts from 10 partitions ---")
+    from parallel_groupby import make_transactions
+    partitions = [make_transactions((seed, 100_000)) for seed in range(10)]
+    counter = StreamingValueCounts()
+    for part in partitions:
+        counter.update(part['Region'].astype(str) + '/' + part['Product'].astype(str))
+    full = pd.concat(partitions, ignore_index=True)
+    expected = full.groupby(['Region', 'Product'], observed=True).size()
+    expected.index = [f'{region}/{product}' for region, product in expected.index]
+    assert counter.is_exact and counter.top(16).sort_index().to_dict() == expected.sort_index().to_dict()
+    print(counter.top(5))
+    print("Exact counts match groupby().size(): True")
+    print("-" * 60)
+
+    # --- Example 3: A stream of 20M customer IDs from 4 workers ---
+    print("--- Example 3: 20,000,000 Zipf-distributed customer IDs, 4 workers merged ---")
+    rng = np.random.default_rng(8)
+    stream = rng.zipf(1.3, 20_000_000)
+    stream = stream[stream < 50_000_000]
+    start_time = time.time()
+    workers = [StreamingValueCounts(k=200, exact_threshold=10_000) for _ in range(4)]
+    for i, chunk in enumerate(np.array_split(stream, 40)):
+        workers[i % 4].update(chunk)
+    merged = workers[0]
+    for other in workers[1:]:
+        merged.merge(other)
+    sketch_time = time.time() - start_time
+
+    start_time = time.time()
+    exact = pd.Series(stream).value_counts()
+    exact_time = time.time() - start_time
+
+    print(f"Exact mode: {merged.is_exact} (more than {merged.exact_threshold} distinct IDs)")
+    print(f"Distinct IDs: HyperLogLog {merged.nunique():,.0f} vs exact {len(exact):,} "
+          f"(expected error ~{merged.hll.relative_error:.2%})")
+    top = merged.heavy_hitters.top(5)
+    top['exact'] = exact.reindex(top.index).to_numpy()
+    top['count_min'] = merged.cms.estimate(top.index.to_numpy())
+    print(top)
+    sketch_bytes = merged.hll.registers.nbytes + merged.cms.table.nbytes + 200 * 16
+    print(f"Sketch memory ~{sketch_bytes / 1e6:.1f} MB vs {exact.memory_usage(deep=True) / 1e6:.1f} MB "
+          f"for the exact counts")
+    print(f"Sketches (chunked, merged): {sketch_time:.2f}s | value_counts (all in memory): {exact_time:.2f}s")
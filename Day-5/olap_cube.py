@@ -0,0 +1,263 @@
+# PRE-AGGREGATED OLAP CUBE
+# ========================
+# Dashboards ask the same questions about the transaction data again and again:
+# "total Amount in the North", "average Amount per Product in the top Sales_Bin", ...
+# Each question is a new groupby over all raw transactions.
+#
+# An OLAP cube answers them from precomputed aggregates instead:
+# - every dimension (Region, Product, Sales_Bin) is turned into integer codes
+# - every dimension gets one extra "ALL" slot at the end of its axis
+# - count, sum, min and max are stored in dense NumPy arrays of shape
+#   (n_regions + 1, n_products + 1, n_bins + 1), so the ALL slots hold every rollup:
+#     cube[r, p, ALL]     -> Region r, Product p, all Sales_Bins
+#     cube[ALL, ALL, ALL] -> the grand total
+# - slice and dice queries are plain array indexing; raw transactions are never touched
+# - refresh(batch) aggregates only the new batch and adds it to the cube
+
+import itertools
+import time
+
+import numpy as np
+import pandas as pd
+
+MEASURES = ('count', 'sum', 'mean', 'min', 'max')
+
+# Marker for "all labels of this dimension" in queries.
+ALL = None
+
+
+class OLAPCube:
+    """
+    Precomputed count/sum/min/max over every combination of the dimensions, with rollups.
+
+    Args:
+        dimensions: Dimension column names, e.g. ['Region', 'Product', 'Sales_Bin']
+        measure: Numeric column that is aggregated, e.g. 'Amount'
+        categories: Optional {dimension: list of labels}; defaults to the labels found in the data
+    """
+
+    def __init__(self, dimensions: list, measure: str, categories: dict = None):
+        self.dimensions = list(dimensions)
+        self.measure = measure
+        categories = categories or {}
+        self.labels = {dim: list(categories.get(dim, [])) for dim in self.dimensions}
+        shape = tuple(len(self.labels[dim]) + 1 for dim in self.dimensions)
+        self._count = np.zeros(shape, dtype=np.int64)
+        self._sum = np.zeros(shape, dtype=np.float64)
+        self._min = np.full(shape, np.inf)
+        self._max = np.full(shape, -np.inf)
+        self.n_rows = 0
+
+    # --- Building and refreshing ---
+
+    def _codes(self, batch: pd.DataFrame) -> list:
+        """Encodes every dimension of the batch, growing the cube for new labels."""
+        codes = []
+        for axis, dim in enumerate(self.dimensions):
+            known = self.labels[dim]
+            new_labels = [label for label in pd.unique(batch[dim].dropna()) if label not in set(known)]
+            if new_labels:
+                # Insert empty slots for the new labels just before the ALL slot.
+                position = len(known)
+                extra = len(new_labels)
+                self._count = np.insert(self._count, [position] * extra, 0, axis=axis)
+                self._sum = np.insert(self._sum, [position] * extra, 0.0, axis=axis)
+                self._min = np.insert(self._min, [position] * extra, np.inf, axis=axis)
+                self._max = np.insert(self._max, [position] * extra, -np.inf, axis=axis)
+                known.extend(new_labels)
+            codes.append(pd.Categorical(batch[dim], categories=known).codes.astype(np.int64))
+        return codes
+
+    def refresh(self, batch: pd.DataFrame) -> 'OLAPCube':
+        """
+        Adds a batch of transactions to every cell and rollup of the cube.
+
+        Cost: one pass over the batch plus one pass over the (small) cube.
+
+        Args:
+            batch: DataFrame with the dimension columns and the measure column
+
+        Returns:
+            self, so calls can be chained
+        """
+        codes = self._codes(batch)
+        values = batch[self.measure].to_numpy(dtype=np.float64)
+        # Rows with a missing dimension label or a missing value are not counted.
+        keep = ~np.isnan(values)
+        for axis_codes in codes:
+            keep &= axis_codes >= 0
+
+        # 1. Aggregate the batch into the base cells (no ALL slots yet).
+        base_shape = tuple(len(self.labels[dim]) for dim in self.dimensions)
+        cells = np.ravel_multi_index([axis_codes[keep] for axis_codes in codes], base_shape)
+        size = int(np.prod(base_shape))
+        delta_count = np.bincount(cells, minlength=size).reshape(base_shape)
+        delta_sum = np.bincount(cells, weights=values[keep], minlength=size).reshape(base_shape)
+        delta_min = np.full(size, np.inf)
+        delta_max = np.full(size, -np.inf)
+        np.minimum.at(delta_min, cells, values[keep])
+        np.maximum.at(delta_max, cells, values[keep])
+
+        # 2. Roll the batch up along every axis to fill its ALL slots, then merge into the cube.
+        self._count += self._rollup(delta_count, np.add, 0)
+        self._sum += self._rollup(delta_sum, np.add, 0.0)
+        np.minimum(self._min, self._rollup(delta_min.reshape(base_shape), np.minimum, np.inf), out=self._min)
+        np.maximum(self._max, self._rollup(delta_max.reshape(base_shape), np.maximum, -np.inf), out=self._max)
+        self.n_rows += len(batch)
+        return self
+
+    @staticmethod
+    def _rollup(base: np.ndarray, ufunc, empty) -> np.ndarray:
+        """
+        Adds an ALL slot to every axis of a base array and fills it with the reduction.
+
+        Reducing axis by axis also fills the combined ALL slots (e.g. [ALL, ALL, p]),
+        because each step reduces the slots that the previous steps already added.
+        """
+        cube = base
+        for axis in range(base.ndim):
+            total = ufunc.reduce(cube, axis=axis, keepdims=True) if cube.shape[axis] else \
+                np.full(cube.shape[:axis] + (1,) + cube.shape[axis + 1:], empty)
+            cube = np.concatenate([cube, total], axis=axis)
+        return cube
+
+    # --- Querying ---
+
+    def query(self, measure: str = 'sum', by=(), **filters):
+        """
+        Answers a slice/dice query from the precomputed cells.
+
+        Args:
+            measure: 'count', 'sum', 'mean', 'min' or 'max'
+            by: Dimensions to keep in the result (like groupby keys)
+            **filters: dimension=label (slice) or dimension=[labels] (dice).
+                       Dimensions that are neither in by nor filtered are rolled up (ALL).
+
+        Returns:
+            A scalar when by is empty, otherwise a Series indexed by the by-dimensions
+        """
+        if measure not in MEASURES:
+            raise ValueError(f"measure must be one of {MEASURES}, got {measure!r}")
+        by = [by] if isinstance(by, str) else list(by)
+        index, reduce_axes = [], []
+        for axis, dim in enumerate(self.dimensions):
+            wanted = filters.get(dim, ALL)
+            if dim in by:
+                # Keep every label, optionally restricted to a dice filter.
+                index.append(self._lookup(dim, wanted) if wanted is not ALL else np.arange(len(self.labels[dim])))
+            elif wanted is ALL:
+                index.append(np.array([-1]))  # the ALL slot
+                reduce_axes.append(axis)
+            else:
+                # A single label or a list of labels that is combined into one value.
+                index.append(self._lookup(dim, wanted))
+                reduce_axes.append(axis)
+        grid = np.ix_(*index)
+
+        count = self._count[grid].sum(axis=tuple(reduce_axes))
+        if measure == 'count':
+            result = count
+        elif measure in ('sum', 'mean'):
+            result = self._sum[grid].sum(axis=tuple(reduce_axes))
+            if measure == 'mean':
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    result = result / count
+        else:
+            source, reducer = (self._min, np.min) if measure == 'min' else (self._max, np.max)
+            result = reducer(source[grid], axis=tuple(reduce_axes))
+            result = np.where(count > 0, result, np.nan)
+
+        if not by:
+            return result.item()
+        # Grouped dimensions never use the ALL slot, so every index is a list of label positions
+        # (possibly empty, before any row with that dimension has arrived).
+        keys = [np.array(self.labels[dim], dtype=object)[index[axis]]
+                for axis, dim in enumerate(self.dimensions) if dim in by]
+        multi_index = pd.MultiIndex.from_product(keys, names=[dim for dim in self.dimensions if dim in by])
+        series = pd.Series(result.ravel(), index=multi_index, name=f'{self.measure}_{measure}')
+        if len(by) == 1:
+            series.index = series.index.get_level_values(0)
+        if measure == 'count':
+            series = series.astype(np.int64)
+        return series
+
+    def _lookup(self, dim: str, wanted) -> np.ndarray:
+        labels = self.labels[dim]
+        wanted = list(wanted) if isinstance(wanted, (list, tuple, set, np.ndarray)) else [wanted]
+        missing = [label for label in wanted if label not in labels]
+        if missing:
+            raise KeyError(f"Unknown label(s) {missing} for dimension '{dim}'")
+        return np.array([labels.index(label) for label in wanted])
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the cube arrays."""
+        return self._count.nbytes + self._sum.nbytes + self._min.nbytes + self._max.nbytes
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(3)
+    # Fixed bin edges keep Sales_Bin stable across batches (see pd.cut in advanced_pandas.py).
+    bin_edges = [-99.9, 24975.0, 49950.0, 74925.0, 99900.0]
+
+    def make_transactions(n_rows: int) -> pd.DataFrame:
+        df = pd.DataFrame({
+            'Region': rng.choice(['North', 'South', 'East', 'West'], n_rows),
+            'Product': rng.choice(['A', 'B', 'C', 'D'], n_rows),
+            'Amount': rng.integers(0, 1000, n_rows) * 100.0,
+        })
+        df['Sales_Bin'] = pd.cut(df['Amount'], bins=bin_edges).astype(str)
+        return df
+
+    df = make_transactions(1_000_000)
+    dims = ['Region', 'Product', 'Sales_Bin']
+    start_time = time.time()
+    cube = OLAPCube(dims, 'Amount').refresh(df)
+    print(f"Cube built from {len(df)} rows in {time.time() - start_time:.3f} seconds, {cube.nbytes} bytes")
+    print("-" * 60)
+
+    # --- Example 1: Queries answered from the cube, checked against groupby on raw data ---
+    print("--- Example 1: Slice and dice queries ---")
+    print("Total Amount (grand total):", cube.query('sum'))
+    print("Average Amount in the North:", round(cube.query('mean', Region='North'), 2))
+    top_bin = '(74925.0, 99900.0]'
+    per_product = cube.query('count', by='Product', Sales_Bin=top_bin, Region=['North', 'South'])
+    print(f"Transactions per Product in {top_bin}, North+South:")
+    print(per_product)
+    expected = df[(df['Sales_Bin'] == top_bin) & df['Region'].isin(['North', 'South'])].groupby('Product').size()
+    assert (per_product.sort_index().to_numpy() == expected.sort_index().to_numpy()).all()
+
+    # Every rollup of every measure, compared with pandas groupby on the raw data.
+    for n_keep in range(1, len(dims) + 1):
+        for by in itertools.combinations(dims, n_keep):
+            for measure in ('count', 'sum', 'mean', 'min', 'max'):
+                got = cube.query(measure, by=list(by)).sort_index()
+                want = df.groupby(list(by))['Amount'].agg(measure).sort_index()
+                want = want.reindex(got.index)
+                assert np.allclose(got.to_numpy(dtype=float), want.to_numpy(dtype=float), equal_nan=True)
+    print("All rollups match pandas groupby: True")
+    print("-" * 60)
+
+    # --- Example 2: Query speed and incremental refresh ---
+    print("--- Example 2: Query speed and incremental refresh ---")
+    start_time = time.time()
+    for _ in range(100):
+        cube.query('mean', by=['Region', 'Product'], Sales_Bin=top_bin)
+    cube_time = (time.time() - start_time) / 100
+    start_time = time.time()
+    for _ in range(5):
+        df[df['Sales_Bin'] == top_bin].groupby(['Region', 'Product'])['Amount'].mean()
+    raw_time = (time.time() - start_time) / 5
+    print(f"Query from cube: {cube_time * 1000:.3f} ms | groupby on raw data: {raw_time * 1000:.1f} ms")
+
+    new_batch = make_transactions(10_000)
+    start_time = time.time()
+    cube.refresh(new_batch)
+    print(f"Refresh with {len(new_batch)} new rows: {(time.time() - start_time) * 1000:.2f} ms")
+    combined = pd.concat([df, new_batch])
+    assert cube.query('count') == len(combined) and isinstance(cube.query('count'), int)
+    assert np.isclose(cube.query('sum', Region='West'), combined.loc[combined['Region'] == 'West', 'Amount'].sum())
+    print("Cube after refresh matches the combined data: True")
+    empty = OLAPCube(dims, 'Amount')
+    assert empty.query('count') == 0 and len(empty.query('sum', by='Region')) == 0
+    print("An empty cube answers with 0 and empty Series: True")
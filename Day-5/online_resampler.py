@@ -0,0 +1,321 @@
+# ONLINE INCREMENTAL RESAMPLING
+# =============================
+# time_series.py calls df_ts['Price'].resample('ME').mean() and resample('W').max(),
+# and time_generator_fix.py does the same for temperatures. Each call regroups the
+# complete history, so a live feed would be recomputed from scratch for every new value.
+#
+# OnlineResampler keeps one small aggregate state per time bucket instead:
+#     count, sum, min, max, first, last   (mean = sum / count)
+# - update(batch) adds a batch of (timestamp, value) rows; every row touches exactly one
+#   bucket per frequency, so the cost per row is O(1) and independent of the history length
+# - batches may arrive out of order: a row is accepted as long as its bucket is still open
+# - a bucket is finished once the newest timestamp is more than allowed_lateness past its end;
+#   evict() hands finished buckets to a sink (a file, a database, a list, ...) and frees them
+# - rollup(freq, agg) returns the same Series as resample(freq).agg() on the same data, for
+#   fixed frequencies that divide a day and the calendar frequencies in END_ANCHORED and
+#   START_ANCHORED (any other frequency raises ValueError)
+
+import time
+
+import numpy as np
+import pandas as pd
+
+AGGREGATIONS = ('count', 'sum', 'mean', 'min', 'max', 'first', 'last')
+
+# Aggregations that resample() reports as 0 (not NaN) for an empty bucket.
+ZERO_WHEN_EMPTY = ('count', 'sum')
+
+
+# Calendar frequencies, grouped by how resample() closes and labels their buckets.
+# End-anchored buckets are right-closed and labelled with their last day (e.g. 'ME' -> Jan 31),
+# start-anchored buckets are left-closed and labelled with their first day (e.g. 'MS' -> Jan 1).
+# Anchored variants such as 'W-MON' or 'QS-FEB' follow their base frequency.
+END_ANCHORED = ('W', 'ME', 'QE', 'YE', 'BME', 'BQE', 'BYE')
+START_ANCHORED = ('D', 'B', 'MS', 'QS', 'YS', 'BMS', 'BQS', 'BYS')
+
+
+def _calendar_offset(freq: str):
+    """Parses a calendar frequency; returns (offset, is_end_anchored)."""
+    offset = pd.tseries.frequencies.to_offset(freq)
+    base = offset.rule_code.split('-')[0]
+    if base not in END_ANCHORED + START_ANCHORED:
+        raise ValueError(f"Unsupported frequency {freq!r}; use a fixed frequency that divides one day "
+                         f"or one of {END_ANCHORED + START_ANCHORED}")
+    # resample() aligns '2D' or '2W' buckets to the first timestamp of the data, which a
+    # stream does not know in advance; only frequencies with fixed boundaries are supported.
+    if offset.n != 1:
+        raise ValueError(f"Calendar frequencies must not have a multiple, got {freq!r}")
+    return offset, base in END_ANCHORED
+
+
+def bucket_labels(timestamps: pd.DatetimeIndex, freq: str) -> pd.DatetimeIndex:
+    """
+    Assigns timestamps to the bucket labels that resample(freq) would use.
+
+    Fixed frequencies ('h', '15min', ...) are left-labelled: the bucket starts at the label.
+    Calendar frequencies work on whole days: end-anchored ones ('W', 'ME', 'QE', 'YE') are
+    labelled with the day that ends the bucket, start-anchored ones ('D', 'B', 'MS', 'QS', 'YS')
+    with the day that starts it.
+
+    Args:
+        timestamps: DatetimeIndex of the rows
+        freq: A pandas frequency string
+
+    Returns:
+        DatetimeIndex of bucket labels, one per row
+    """
+    offset = pd.tseries.frequencies.to_offset(freq)
+    if isinstance(offset, pd.offsets.Tick):
+        if pd.Timedelta(days=1) % pd.Timedelta(offset) != pd.Timedelta(0):
+            raise ValueError(f"Fixed frequencies must divide one day evenly, got {freq!r}")
+        return timestamps.floor(offset)
+    offset, end_anchored = _calendar_offset(freq)
+    days = timestamps.normalize()
+    # Calendar arithmetic is done once per distinct day, not once per row. Stepping one day
+    # back and then forward to the next anchor gives the first anchor on or after the day;
+    # one day forward and back to the previous anchor gives the last anchor on or before it.
+    unique_days = days.unique()
+    if end_anchored:
+        labels = (unique_days - pd.offsets.Day()) + offset
+    else:
+        labels = (unique_days + pd.offsets.Day()) - offset
+    return labels[unique_days.get_indexer(days)]
+
+
+def bucket_end(label: pd.Timestamp, freq: str) -> pd.Timestamp:
+    """Exclusive end time of the bucket with the given label."""
+    offset = pd.tseries.frequencies.to_offset(freq)
+    if isinstance(offset, pd.offsets.Tick):
+        return label + offset
+    offset, end_anchored = _calendar_offset(freq)
+    # An end-anchored bucket ends with its label day; a start-anchored one where the next begins.
+    return label + pd.Timedelta(days=1) if end_anchored else label + offset
+
+
+class OnlineResampler:
+    """
+    Maintains resample() aggregates for several frequencies while data streams in.
+
+    Args:
+        freqs: Frequencies to maintain, e.g. ('D', 'W', 'ME')
+        allowed_lateness: How far behind the newest timestamp rows may still arrive
+        sink: Optional callable sink(freq, label, stats) that receives finished buckets
+    """
+
+    def __init__(self, freqs=('D', 'W', 'ME'), allowed_lateness='0D', sink=None):
+        self.freqs = list(freqs)
+        self.allowed_lateness = pd.Timedelta(allowed_lateness)
+        self.sink = sink
+        # One dictionary per frequency: bucket label -> [count, sum, min, max, first_time, first, last_time, last]
+        self.buckets = {freq: {} for freq in self.freqs}
+        self.closed_until = {freq: None for freq in self.freqs}  # labels <= this were evicted
+        self.watermark = None
+        self.late_rows = 0
+
+    # --- Updating ---
+
+    def update(self, batch: pd.Series) -> 'OnlineResampler':
+        """
+        Adds a batch of values (in any time order). NaN values are ignored, like resample().
+        Rows with the same timestamp count for first/last in the order they arrive.
+
+        Args:
+            batch: Series of values with a DatetimeIndex
+
+        Returns:
+            self
+        """
+        batch = batch.dropna()
+        if batch.empty:
+            return self
+        # After sorting the batch by time, the rows of every bucket form one contiguous run,
+        # so all per-bucket statistics are single reduceat() calls.
+        order = np.argsort(batch.index.asi8, kind='stable')
+        values = batch.to_numpy(dtype=np.float64)[order]
+        times = batch.index[order]
+        for freq in self.freqs:
+            labels = bucket_labels(times, freq)
+            keep = slice(None)
+            closed = self.closed_until[freq]
+            if closed is not None and labels[0] <= closed:
+                # Rows for buckets that were already evicted are too late to be counted.
+                keep = labels > closed
+                self.late_rows += int((~keep).sum())
+                if not keep.any():
+                    continue
+            run_values, run_times, run_labels = values[keep], times[keep], labels[keep]
+            codes = run_labels.asi8
+            starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+            ends = np.r_[starts[1:], len(codes)]
+            counts = ends - starts
+            sums = np.add.reduceat(run_values, starts)
+            mins = np.minimum.reduceat(run_values, starts)
+            maxs = np.maximum.reduceat(run_values, starts)
+            state = self.buckets[freq]
+            # One merge per touched bucket: O(1) per bucket, independent of the history.
+            for i, start in enumerate(starts):
+                label, last = run_labels[start], ends[i] - 1
+                bucket = state.get(label)
+                if bucket is None:
+                    state[label] = [int(counts[i]), sums[i], mins[i], maxs[i],
+                                    run_times[start], run_values[start], run_times[last], run_values[last]]
+                    continue
+                bucket[0] += int(counts[i])
+                bucket[1] += sums[i]
+                bucket[2] = min(bucket[2], mins[i])
+                bucket[3] = max(bucket[3], maxs[i])
+                if run_times[start] < bucket[4]:
+                    bucket[4], bucket[5] = run_times[start], run_values[start]
+                if run_times[last] >= bucket[6]:
+                    bucket[6], bucket[7] = run_times[last], run_values[last]
+        newest = times[-1]
+        self.watermark = newest if self.watermark is None else max(self.watermark, newest)
+        if self.sink is not None:
+            self.evict()
+        return self
+
+    def evict(self) -> int:
+        """
+        Sends every finished bucket to the sink and removes it from memory.
+
+        Returns:
+            Number of evicted buckets
+        """
+        if self.watermark is None:
+            return 0
+        cutoff = self.watermark - self.allowed_lateness
+        evicted = 0
+        for freq in self.freqs:
+            state = self.buckets[freq]
+            for label in sorted(label for label in state if bucket_end(label, freq) <= cutoff):
+                if self.sink is not None:
+                    self.sink(freq, label, self._stats(state.pop(label)))
+                else:
+                    state.pop(label)
+                self.closed_until[freq] = label
+                evicted += 1
+        return evicted
+
+    @staticmethod
+    def _stats(bucket: list) -> dict:
+        count, total, low, high, _, first, _, last = bucket
+        return {'count': int(count), 'sum': float(total), 'mean': float(total / count), 'min': float(low),
+                'max': float(high), 'first': float(first), 'last': float(last)}
+
+    # --- Reading ---
+
+    def rollup(self, freq: str, agg: str = 'mean') -> pd.Series:
+        """
+        The current aggregate per bucket for the buckets that are still held in memory.
+
+        Without a sink (nothing evicted) this equals series.resample(freq).agg(agg) over all data.
+
+        Args:
+            freq: One of the maintained frequencies
+            agg: One of AGGREGATIONS
+
+        Returns:
+            Series indexed by bucket label, including empty buckets like resample()
+        """
+        if freq not in self.buckets:
+            raise KeyError(f"Frequency {freq!r} is not maintained; available: {self.freqs}")
+        if agg not in AGGREGATIONS:
+            raise ValueError(f"agg must be one of {AGGREGATIONS}, got {agg!r}")
+        state = self.buckets[freq]
+        if not state:
+            return pd.Series(dtype=np.float64)
+        labels = sorted(state)
+        values = pd.Series([self._stats(state[label])[agg] for label in labels], index=pd.DatetimeIndex(labels))
+        # resample() also reports the empty buckets between the first and the last one.
+        full_index = pd.date_range(labels[0], labels[-1], freq=freq)
+        return values.reindex(full_index, fill_value=0 if agg in ZERO_WHEN_EMPTY else np.nan)
+
+    def current(self, freq: str) -> dict:
+        """Statistics of the newest bucket of a frequency (the live, still open one)."""
+        state = self.buckets[freq]
+        label = max(state)
+        return {'label': label, **self._stats(state[label])}
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(6)
+
+    # --- Example 1: The resample calls from time_series.py and time_generator_fix.py ---
+    print("--- Example 1: Same results as resample() on the full history ---")
+    dates = pd.date_range('2025-10-02', periods=100, freq='D', tz='UTC')
+    prices = pd.Series(rng.standard_normal(100).cumsum() + 50, index=dates, name='Price')
+    resampler = OnlineResampler(freqs=('D', 'W', 'ME'))
+    # Batches of 10 days, shuffled inside each batch to simulate out-of-order arrival.
+    for start in range(0, 100, 10):
+        batch = prices.iloc[start:start + 10]
+        resampler.update(batch.iloc[rng.permutation(len(batch))])
+    monthly_avg = resampler.rollup('ME', 'mean')
+    pd.testing.assert_series_equal(monthly_avg, prices.resample('ME').mean(), check_names=False, check_freq=False)
+    pd.testing.assert_series_equal(resampler.rollup('W', 'max'), prices.resample('W').max(),
+                                   check_names=False, check_freq=False)
+    print("Monthly average price:")
+    print(monthly_avg)
+
+    temps = pd.Series(rng.integers(5, 30, 90).astype(float), index=pd.date_range('2024-01-01', periods=90, freq='D'))
+    weather = OnlineResampler(freqs=('ME',)).update(temps.iloc[45:]).update(temps.iloc[:45])
+    pd.testing.assert_series_equal(weather.rollup('ME', 'mean'), temps.resample('ME').mean(), check_freq=False)
+    print("Monthly average temperature matches resample('ME').mean(): True")
+    print("-" * 60)
+
+    # --- Example 2: Every aggregation on irregular, late-arriving tick data ---
+    print("--- Example 2: Irregular ticks with gaps and late rows ---")
+    ticks = pd.Series(rng.standard_normal(20_000).cumsum() + 100,
+                      index=pd.Timestamp('2025-01-01') + pd.to_timedelta(np.sort(rng.choice(120 * 86_400, 20_000, replace=False)), 's'))
+    ticks = ticks[(ticks.index < '2025-02-10') | (ticks.index >= '2025-02-20')]  # a 10-day gap
+    ticks.iloc[rng.choice(len(ticks), 200, replace=False)] = np.nan
+    live = OnlineResampler(freqs=('D', 'B', 'W', 'ME', 'MS', 'QS', '6h'))
+    # Each batch is mixed with some rows that belong to the previous batch (late arrivals).
+    order = np.arange(len(ticks)) + rng.integers(-50, 50, len(ticks))
+    shuffled = ticks.iloc[np.argsort(order, kind='stable')]
+    for start in range(0, len(shuffled), 500):
+        live.update(shuffled.iloc[start:start + 500])
+    for freq in live.freqs:
+        for agg in AGGREGATIONS:
+            pd.testing.assert_series_equal(live.rollup(freq, agg), ticks.resample(freq).agg(agg),
+                                           check_names=False, check_freq=False, check_dtype=False)
+    print(f"All {len(AGGREGATIONS)} aggregations x {len(live.freqs)} frequencies match resample(): True")
+    # Evicted start-anchored buckets carry the same labels and values as resample().
+    evicted = []
+    monthly = OnlineResampler(freqs=('MS', 'B'), sink=lambda freq, label, stats: evicted.append((freq, label, stats)))
+    for start in range(0, len(ticks), 500):
+        monthly.update(ticks.iloc[start:start + 500])
+    for freq in monthly.freqs:
+        sent = pd.Series({label: stats['count'] for f, label, stats in evicted if f == freq})
+        want = ticks.resample(freq).count()
+        pd.testing.assert_series_equal(sent, want[want > 0].iloc[:len(sent)], check_names=False,
+                                       check_freq=False, check_dtype=False)
+    print("Buckets evicted for 'MS' and 'B' match resample().count(): True")
+    print("Current day:", {key: round(value, 2) if isinstance(value, float) else value
+                           for key, value in live.current('D').items()})
+    print("-" * 60)
+
+    # --- Example 3: Live feed with eviction to a sink, against recomputing resample() ---
+    print("--- Example 3: 1 year of per-second prices in 1-hour batches ---")
+    finished = []
+    feed = OnlineResampler(freqs=('D', 'W', 'ME'), allowed_lateness='1h',
+                           sink=lambda freq, label, stats: finished.append((freq, label, stats['mean'])))
+    online_time = 0.0
+    n_hours = 24 * 365
+    start_ts = pd.Timestamp('2025-01-01')
+    for hour in range(n_hours):
+        batch = pd.Series(rng.standard_normal(3600),
+                          index=pd.date_range(start_ts + pd.Timedelta(hours=hour), periods=3600, freq='s'))
+        start_time = time.time()
+        feed.update(batch)
+        online_time += time.time() - start_time
+    open_buckets = sum(len(state) for state in feed.buckets.values())
+    print(f"{n_hours * 3600:,} rows, online update {online_time / n_hours * 1000:.2f} ms per 1-hour batch, "
+          f"{open_buckets} buckets open, {len(finished)} finished buckets sent to the sink")
+    print("Last finished monthly bucket:", [item for item in finished if item[0] == 'ME'][-1])
+
+    # What a batch job pays to recompute one rollup from the whole year after every hour.
+    full = pd.Series(rng.standard_normal(n_hours * 3600),
+                     index=pd.date_range(start_ts, periods=n_hours * 3600, freq='s'))
+    start_time = time.time()
+    full.resample('ME').mean()
+    print(f"resample('ME').mean() over the full year: {(time.time() - start_time) * 1000:.0f} ms per refresh")
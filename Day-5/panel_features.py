@@ -0,0 +1,199 @@
+# VECTORIZED LAG AND WINDOW FEATURES FOR MANY SERIES
+# ==================================================
+# time_series.py builds one lag feature with df_ts['Price'].shift(1) for one series.
+# For 50,000 tickers the data is usually in "long" format: one row per (id, time, value).
+# Looping over the tickers and calling shift()/rolling() per ticker costs a Python round
+# trip per ticker and per feature.
+#
+# make_features() sorts the rows by (id, time) once. After that, every ticker is one
+# contiguous block of rows, and the only thing that matters is where each block starts:
+# - lag k:        the value k rows earlier, or NaN if that row belongs to another ticker
+# - diff k:       value - lag k
+# - pct_change k: value / lag k - 1
+# - rolling:      windows that never reach back past the start of the ticker's block
+#                 (rolling_stats() from rolling_window.py with group_starts)
+# Every feature for every ticker is computed in one vectorized NumPy pass.
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from rolling_window import rolling_stats
+
+
+def group_positions(ids: np.ndarray):
+    """
+    Finds the block structure of rows that are sorted by id.
+
+    Args:
+        ids: Group ids, sorted so that equal ids are next to each other
+
+    Returns:
+        Tuple (group_starts, position): for every row, the row where its group starts
+        and its position inside the group (0, 1, 2, ...)
+    """
+    n = len(ids)
+    is_start = np.r_[True, ids[1:] != ids[:-1]] if n else np.zeros(0, dtype=bool)
+    starts = np.flatnonzero(is_start)
+    sizes = np.diff(np.r_[starts, n])
+    group_starts = np.repeat(starts, sizes)
+    return group_starts, np.arange(n) - group_starts
+
+
+def lag(values: np.ndarray, position: np.ndarray, k: int) -> np.ndarray:
+    """The value k rows earlier in the same group (NaN for the first k rows of every group)."""
+    shifted = np.full(len(values), np.nan)
+    if k < len(values):
+        shifted[k:] = values[:len(values) - k]
+    shifted[position < k] = np.nan
+    return shifted
+
+
+def make_features(df: pd.DataFrame, id_col: str, time_col: str, value_col: str, lags=(1,), diffs=(1,),
+                  pct_changes=(1,), windows=(5,), stats=('mean', 'std', 'min', 'max'),
+                  assume_sorted: bool = False) -> pd.DataFrame:
+    """
+    Lag, diff, pct-change and rolling features for every id in one vectorized pass.
+
+    Results equal df.groupby(id_col)[value_col].shift(k) / .diff(k) / .pct_change(k) and
+    .rolling(w).<stat>() with the rows ordered by time inside every id.
+
+    Args:
+        df: Long-format data with one row per (id, time)
+        id_col: Column with the series id (e.g. the ticker)
+        time_col: Column with the time of the row
+        value_col: Column with the value (e.g. the price)
+        lags, diffs, pct_changes: Offsets k for the lag, difference and percent-change features
+        windows: Rolling window sizes (number of rows)
+        stats: Rolling statistics, see rolling_window.STATISTICS
+        assume_sorted: Skip the sort when df is already sorted by (id, time)
+
+    Returns:
+        DataFrame of features with the same index (and row order) as df
+    """
+    codes = pd.factorize(df[id_col])[0].astype(np.int64)  # integer ids compare much faster than strings
+    if assume_sorted:
+        order = None
+        values = df[value_col].to_numpy(dtype=np.float64)
+    else:
+        # The only sort: one stable argsort of a combined (id, time rank) integer key.
+        time_rank, unique_times = pd.factorize(df[time_col], sort=True)
+        order = np.argsort(codes * len(unique_times) + time_rank, kind='stable')
+        codes = codes[order]
+        values = df[value_col].to_numpy(dtype=np.float64)[order]
+    group_starts, position = group_positions(codes)
+
+    features = {}
+    lagged = {}
+    for k in sorted(set(lags) | set(diffs) | set(pct_changes)):
+        lagged[k] = lag(values, position, k)
+    for k in lags:
+        features[f'{value_col}_lag_{k}'] = lagged[k]
+    for k in diffs:
+        features[f'{value_col}_diff_{k}'] = values - lagged[k]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for k in pct_changes:
+            features[f'{value_col}_pct_change_{k}'] = values / lagged[k] - 1
+    for window in windows:
+        rolled = rolling_stats(values, window, stats=stats, group_starts=group_starts)
+        for stat in stats:
+            features[f'{value_col}_rolling_{window}_{stat}'] = rolled[stat].to_numpy()
+
+    if order is not None:
+        # Scatter the rows back to the original order of df.
+        for name, column in features.items():
+            restored = np.empty_like(column)
+            restored[order] = column
+            features[name] = restored
+    return pd.DataFrame(features, index=df.index)
+
+
+def make_features_loop(df: pd.DataFrame, id_col: str, time_col: str, value_col: str,
+                       lags=(1,), diffs=(1,), pct_changes=(1,), windows=(5,),
+                       stats=('mean', 'std', 'min', 'max')) -> pd.DataFrame:
+    """The same features with a pandas loop over the groups (the baseline for the benchmark)."""
+    parts = []
+    for _, group in df.sort_values(time_col, kind='stable').groupby(id_col, sort=False):
+        series = group[value_col]
+        part = {}
+        for k in lags:
+            part[f'{value_col}_lag_{k}'] = series.shift(k)
+        for k in diffs:
+            part[f'{value_col}_diff_{k}'] = series.diff(k)
+        for k in pct_changes:
+            part[f'{value_col}_pct_change_{k}'] = series.pct_change(k)
+        for window in windows:
+            roller = series.rolling(window)
+            for stat in stats:
+                part[f'{value_col}_rolling_{window}_{stat}'] = getattr(roller, stat)()
+        parts.append(pd.DataFrame(part))
+    return pd.concat(parts).reindex(df.index)
+
+
+def make_panel(n_ids: int, n_times: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Random long-format price data, in shuffled row order.
+
+    Args:
+        n_ids: Number of tickers
+        n_times: Number of days per ticker
+
+    Returns:
+        DataFrame with Ticker, Date and Price columns
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2025-10-02', periods=n_times, freq='D')
+    prices = 50 + rng.standard_normal((n_ids, n_times)).cumsum(axis=1)
+    df = pd.DataFrame({'Ticker': np.repeat([f'T{i:05d}' for i in range(n_ids)], n_times),
+                       'Date': np.tile(dates, n_ids),
+                       'Price': prices.ravel()})
+    return df.iloc[rng.permutation(len(df))].reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    # --- Example 1: Same results as groupby().shift/diff/pct_change/rolling ---
+    print("--- Example 1: Features for 200 tickers vs pandas groupby ---")
+    panel = make_panel(200, 100, seed=1)
+    panel.loc[panel.sample(frac=0.02, random_state=1).index, 'Price'] = np.nan
+    features = make_features(panel, 'Ticker', 'Date', 'Price', lags=(1, 5), diffs=(1,), pct_changes=(1, 5),
+                             windows=(5, 20))
+    ordered = panel.sort_values(['Ticker', 'Date'])
+    grouped = ordered.groupby('Ticker')['Price']
+    expected = {'Price_lag_1': grouped.shift(1), 'Price_lag_5': grouped.shift(5), 'Price_diff_1': grouped.diff(1),
+                'Price_pct_change_1': grouped.pct_change(1), 'Price_pct_change_5': grouped.pct_change(5)}
+    for window in (5, 20):
+        roller = grouped.rolling(window)
+        for stat in ('mean', 'std', 'min', 'max'):
+            expected[f'Price_rolling_{window}_{stat}'] = getattr(roller, stat)().reset_index(level=0, drop=True)
+    for name, column in expected.items():
+        assert np.allclose(features[name], column.reindex(panel.index), rtol=1e-9, atol=1e-9, equal_nan=True), name
+    print(pd.concat([panel, features[['Price_lag_1', 'Price_pct_change_1', 'Price_rolling_5_mean']].round(3)], axis=1)
+          .sort_values(['Ticker', 'Date']).head(7).to_string())
+    print(f"All {len(expected)} features match pandas groupby: True")
+    print("-" * 60)
+
+    # --- Example 2: 50,000 tickers ---
+    print("--- Example 2: 50,000 tickers x 200 days (10M rows) ---")
+    panel = make_panel(50_000, 200, seed=2)
+    start_time = time.time()
+    features = make_features(panel, 'Ticker', 'Date', 'Price', lags=(1, 5), windows=(20,))
+    vectorized_time = time.time() - start_time
+    print(f"make_features (one vectorized pass): {vectorized_time:.2f}s, {features.shape[1]} features")
+
+    # The per-group loop is far too slow for 50,000 tickers; time 1,000 and scale up.
+    sample = panel[panel['Ticker'].isin([f'T{i:05d}' for i in range(1000)])]
+    start_time = time.time()
+    looped = make_features_loop(sample, 'Ticker', 'Date', 'Price', lags=(1, 5), windows=(20,))
+    loop_time = (time.time() - start_time) * 50
+    assert np.allclose(looped, features.loc[sample.index], rtol=1e-9, atol=1e-9, equal_nan=True)
+    print(f"Per-group pandas loop: ~{loop_time:.0f}s (1,000 tickers timed, x50) "
+          f"-> about {loop_time / vectorized_time:.0f}x slower")
+
+    # For reference: pandas' own vectorized groupby kernels for the same features.
+    start_time = time.time()
+    grouped = panel.sort_values(['Ticker', 'Date']).groupby('Ticker')['Price']
+    grouped.shift(1), grouped.shift(5), grouped.diff(1), grouped.pct_change(1)
+    roller = grouped.rolling(20)
+    roller.mean(), roller.std(), roller.min(), roller.max()
+    print(f"pandas groupby().shift/diff/pct_change/rolling: {time.time() - start_time:.2f}s")
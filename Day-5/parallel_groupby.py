@@ -0,0 +1,246 @@
+# PARALLEL MAP-REDUCE GROUPBY
+# ===========================
+# df.groupby(...).agg(...) runs on a single CPU core over the whole DataFrame.
+# Many aggregations can be split into mergeable partial results instead:
+# - MAP:    every worker process aggregates its own partition of the rows into a small
+#           table of partial aggregates per group: size, count, sum, min, max and M2
+#           (the sum of squared deviations from the partition mean, used for variance)
+# - REDUCE: the parent process merges the partial tables. Counts, sums, minimums and
+#           maximums simply combine; M2 is combined with Chan's parallel variance formula,
+#           which stays numerically stable (unlike subtracting raw sums of squares).
+# - FINALIZE: mean, var and std are derived from the merged partials.
+#
+# The final result matches df.groupby(by)[values].agg([...]) up to floating point rounding.
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Statistics that can be requested from the engine.
+AGGREGATIONS = ('size', 'count', 'sum', 'mean', 'var', 'std', 'min', 'max')
+
+# Statistics stored in a partial aggregate (per group and value column).
+PARTIAL_FIELDS = ('count', 'sum', 'm2', 'min', 'max')
+
+
+# --- Part 1: MAP - partial aggregates for one partition ---
+
+def partial_aggregate(chunk: pd.DataFrame, by, values) -> pd.DataFrame:
+    """
+    Aggregates one partition into mergeable partial statistics.
+
+    Args:
+        chunk: A partition of the data
+        by: Group key column name or list of names
+        values: Value column name or list of names
+
+    Returns:
+        DataFrame indexed by the group keys, with a 'size' column and
+        (value, field) columns for every field in PARTIAL_FIELDS
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    values = [values] if isinstance(values, str) else list(values)
+    grouped = chunk.groupby(by, observed=True, sort=False)
+    stats = grouped[values].agg(['count', 'sum', 'var', 'min', 'max'])
+
+    parts = {'size': grouped.size()}
+    for column in values:
+        parts[(column, 'count')] = stats[(column, 'count')]
+        parts[(column, 'sum')] = stats[(column, 'sum')]
+        # M2 = sum((x - partition_mean)^2) = var * (count - 1); pandas computes var in one stable pass.
+        parts[(column, 'm2')] = (stats[(column, 'var')] * (stats[(column, 'count')] - 1)).fillna(0.0)
+        parts[(column, 'min')] = stats[(column, 'min')]
+        parts[(column, 'max')] = stats[(column, 'max')]
+    return pd.DataFrame(parts)
+
+
+# --- Part 2: REDUCE - merging partial aggregates ---
+
+def merge_partials(partials: list) -> pd.DataFrame:
+    """
+    Merges partial aggregates from any number of partitions or workers.
+
+    Chan's formula for the combined sum of squared deviations:
+        M2 = sum(M2_i) + sum(n_i * (mean_i - mean)^2)
+
+    Args:
+        partials: List of DataFrames returned by partial_aggregate() (or by merge_partials())
+
+    Returns:
+        One partial aggregate DataFrame covering all partitions
+    """
+    stacked = pd.concat(partials)
+    levels = list(range(stacked.index.nlevels))
+    grouped = stacked.groupby(level=levels, observed=True)
+    value_columns = [col[0] for col in stacked.columns if isinstance(col, tuple) and col[1] == 'count']
+    # Sums, minimums and maximums of every partial column at once.
+    sums, mins, maxs = grouped.sum(), grouped.min(), grouped.max()
+
+    merged = {'size': sums['size']}
+    for column in value_columns:
+        count = stacked[(column, 'count')]
+        total_count = sums[(column, 'count')]
+        total_sum = sums[(column, 'sum')]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            part_mean = stacked[(column, 'sum')] / count
+            total_mean = (total_sum / total_count).reindex(stacked.index)
+        between = (count * (part_mean - total_mean.to_numpy()) ** 2).fillna(0.0)
+        merged[(column, 'count')] = total_count
+        merged[(column, 'sum')] = total_sum
+        merged[(column, 'm2')] = sums[(column, 'm2')] + between.groupby(level=levels, observed=True).sum()
+        merged[(column, 'min')] = mins[(column, 'min')]
+        merged[(column, 'max')] = maxs[(column, 'max')]
+    return pd.DataFrame(merged)
+
+
+# --- Part 3: FINALIZE - final statistics ---
+
+def finalize(partial: pd.DataFrame, aggs=('count', 'mean', 'std')) -> pd.DataFrame:
+    """
+    Turns merged partial aggregates into the requested statistics.
+
+    Args:
+        partial: Merged partial aggregates
+        aggs: Statistics to return, any of AGGREGATIONS
+
+    Returns:
+        DataFrame sorted by group keys, with (value, statistic) columns like groupby().agg();
+        only 'size' when aggs == ('size',), returned as a Series like groupby().size()
+    """
+    unknown = set(aggs) - set(AGGREGATIONS)
+    if unknown:
+        raise ValueError(f"Unknown aggregation(s) {sorted(unknown)}; use {AGGREGATIONS}")
+    partial = partial.sort_index()
+    if tuple(aggs) == ('size',):
+        return partial['size'].rename(None)
+
+    value_columns = [col[0] for col in partial.columns if isinstance(col, tuple) and col[1] == 'count']
+    result = {}
+    for column in value_columns:
+        count = partial[(column, 'count')]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            var = (partial[(column, 'm2')] / (count - 1)).where(count > 1)
+            computed = {
+                'size': partial['size'],
+                'count': count,
+                'sum': partial[(column, 'sum')],
+                'mean': (partial[(column, 'sum')] / count).where(count > 0),
+                'var': var,
+                'std': np.sqrt(var),
+                'min': partial[(column, 'min')],
+                'max': partial[(column, 'max')],
+            }
+        for agg in aggs:
+            result[(column, agg)] = computed[agg]
+    return pd.DataFrame(result)
+
+
+# --- Part 4: The parallel engine ---
+
+def _aggregate_task(task):
+    """Worker entry point: aggregates one partition (a DataFrame slice or a loader call)."""
+    source, by, values = task
+    if isinstance(source, tuple):
+        loader, argument = source
+        source = loader(argument)
+    return partial_aggregate(source, by, values)
+
+
+def parallel_groupby(data, by, values, aggs=('count', 'mean', 'std'), n_workers: int = 4,
+                     n_partitions: int = None, loader=None):
+    """
+    Groups and aggregates data across a process pool.
+
+    Args:
+        data: A DataFrame, or - together with loader - a list of arguments for the loader
+              (e.g. file names), so every worker reads its own partition from disk
+        by: Group key column name or list of names
+        values: Value column name or list of names
+        aggs: Statistics to return, any of AGGREGATIONS
+        n_workers: Number of worker processes (1 = run everything in this process)
+        n_partitions: Number of partitions for a DataFrame input (default: 4 per worker)
+        loader: Optional top-level function loader(argument) -> DataFrame
+
+    Returns:
+        The aggregated DataFrame (or Series for aggs=('size',))
+    """
+    if loader is not None:
+        tasks = [((loader, argument), by, values) for argument in data]
+    else:
+        n_partitions = n_partitions or 4 * n_workers
+        bounds = np.linspace(0, len(data), n_partitions + 1).astype(int)
+        tasks = [(data.iloc[start:stop], by, values) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+    if n_workers == 1:
+        partials = [_aggregate_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            partials = list(executor.map(_aggregate_task, tasks))
+    return finalize(merge_partials(partials), aggs)
+
+
+def make_transactions(seed_and_rows) -> pd.DataFrame:
+    """
+    Generates a partition of transaction data like advanced_pandas.py (used as a loader).
+
+    Args:
+        seed_and_rows: Tuple (random seed, number of rows)
+
+    Returns:
+        DataFrame with Region, Product, Category and Amount columns
+    """
+    seed, n_rows = seed_and_rows
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Region': pd.Categorical.from_codes(rng.integers(0, 4, n_rows), ['East', 'North', 'South', 'West']),
+        'Product': pd.Categorical.from_codes(rng.integers(0, 4, n_rows), ['A', 'B', 'C', 'D']),
+        'Category': pd.Categorical.from_codes(rng.integers(0, 3, n_rows), ['Image', 'Reels', 'Story']),
+        'Amount': rng.integers(0, 1000, n_rows) * 100.0,
+    })
+
+
+if __name__ == "__main__":
+    # --- Example 1: The groupby calls from advanced_pandas.py and the revision scripts ---
+    print("--- Example 1: Same results as pandas groupby ---")
+    df = make_transactions((42, 100_000))
+    df['Sales_Bin'] = pd.cut(df['Amount'], bins=4)
+
+    sizes = parallel_groupby(df, ['Sales_Bin', 'Region'], 'Amount', aggs=('size',), n_workers=2)
+    expected = df.groupby(['Sales_Bin', 'Region'], observed=True).size()
+    pd.testing.assert_series_equal(sizes, expected, check_names=False)
+    print(sizes.unstack(fill_value=0))
+
+    stats = parallel_groupby(df, 'Category', 'Amount', aggs=('count', 'mean', 'std', 'min', 'max'), n_workers=2)
+    expected = df.groupby('Category', observed=True)[['Amount']].agg(['count', 'mean', 'std', 'min', 'max'])
+    pd.testing.assert_frame_equal(stats, expected, check_dtype=False, check_names=False)
+    print(stats)
+    print("Results match pandas groupby: True")
+    print("-" * 60)
+
+    # --- Example 2: Scaling benchmark up to 100 million rows ---
+    # Every worker generates (or, in practice, reads) its own 5M-row partitions,
+    # so the full table never has to exist in one process. All timings include
+    # generating the data.
+    print("--- Example 2: Scaling benchmark (groupby Region, Product -> mean/std of Amount) ---")
+    rows_per_partition = 5_000_000
+    for total_rows in [1_000_000, 10_000_000, 100_000_000]:
+        n_parts = max(1, total_rows // rows_per_partition)
+        parts = [(seed, min(rows_per_partition, total_rows)) for seed in range(n_parts)]
+        timings = []
+        for n_workers in (1, 4):
+            start_time = time.time()
+            result = parallel_groupby(parts, ['Region', 'Product'], 'Amount', aggs=('count', 'mean', 'std'),
+                                      n_workers=n_workers, loader=make_transactions)
+            timings.append(time.time() - start_time)
+        line = f"{total_rows:>11,} rows: 1 worker {timings[0]:7.2f}s | 4 workers {timings[1]:7.2f}s"
+        if total_rows <= 10_000_000:
+            # Single-core pandas for comparison, timed the same way: generating the same
+            # partitions is included, then one groupby over the concatenated table.
+            start_time = time.time()
+            full = pd.concat([make_transactions(part) for part in parts], ignore_index=True)
+            full.groupby(['Region', 'Product'], observed=True)['Amount'].agg(['count', 'mean', 'std'])
+            line += f" | pandas {time.time() - start_time:6.2f}s"
+            del full
+        print(line)
@@ -0,0 +1,281 @@
+# MULTI-RESOLUTION RESAMPLING PYRAMID
+# ===================================
+# time_series.py resamples the same Price history again and again: daily, weekly, monthly.
+# Every resample() call goes back to the raw rows, although a monthly open/high/low/close
+# could just as well be computed from 30 daily ones.
+#
+# ResamplePyramid precomputes a ladder of levels, e.g. hour -> day -> week -> month -> quarter -> year:
+# - every level stores per bucket: open, high, low, close, sum, count (mean = sum / count)
+#   and the time of the first and last raw value in the bucket
+# - each level is built from the next finer level, not from the raw data
+# - a query for any frequency is served from the coarsest level whose buckets each fall
+#   completely inside one target bucket; then the answer is exact. Months can be built from
+#   days but not from weeks (a week can span two months); the first/last times decide that.
+# - append(new_rows) only recomputes the buckets that the new rows touch on every level; the
+#   source level chosen by build() is only re-checked on those buckets, so an append costs the
+#   same for one month or ten years of history
+#
+# Results equal series.resample(freq).ohlc() / .mean() / .count() / ... on the raw data.
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from online_resampler import bucket_labels
+
+AGGREGATIONS = ('open', 'high', 'low', 'close', 'mean', 'sum', 'count', 'ohlc')
+LEVEL_COLUMNS = ('open', 'high', 'low', 'close', 'sum', 'count', 'first_time', 'last_time')
+
+
+def _aggregate(level: pd.DataFrame, labels: pd.DatetimeIndex) -> pd.DataFrame:
+    """
+    Combines consecutive rows with the same label into one bucket.
+
+    Rows must be sorted by time, so every bucket is one contiguous run of rows.
+    """
+    if len(labels) == 0:
+        return level.iloc[:0][list(LEVEL_COLUMNS)].set_axis(labels[:0])
+    codes = labels.asi8
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    last = np.r_[starts[1:], len(codes)] - 1
+    return pd.DataFrame({
+        'open': level['open'].to_numpy()[starts],
+        'high': np.maximum.reduceat(level['high'].to_numpy(), starts),
+        'low': np.minimum.reduceat(level['low'].to_numpy(), starts),
+        'close': level['close'].to_numpy()[last],
+        'sum': np.add.reduceat(level['sum'].to_numpy(), starts),
+        'count': np.add.reduceat(level['count'].to_numpy(), starts),
+        'first_time': level['first_time'].to_numpy()[starts],
+        'last_time': level['last_time'].to_numpy()[last],
+    }, index=labels[starts])
+
+
+def _from_raw(series: pd.Series) -> pd.DataFrame:
+    """Turns raw values into one-value 'buckets', the input of the finest level."""
+    series = series.dropna().sort_index(kind='stable')
+    values = series.to_numpy(dtype=np.float64)
+    return pd.DataFrame({'open': values, 'high': values, 'low': values, 'close': values, 'sum': values,
+                         'count': np.ones(len(values), dtype=np.int64),
+                         'first_time': series.index, 'last_time': series.index}, index=series.index)
+
+
+def _first_touched(first_times: pd.DatetimeIndex, first_label: pd.Timestamp, freq: str) -> int:
+    """
+    Position of the first row whose freq label is at least first_label.
+
+    Labels grow with time, so only a growing window at the end of the level is labelled.
+    """
+    size = 8
+    while True:
+        start = max(0, len(first_times) - size)
+        labels = bucket_labels(first_times[start:], freq)
+        if start == 0 or labels[0] < first_label:
+            return start + int(labels.searchsorted(first_label))
+        size *= 4
+
+
+class ResamplePyramid:
+    """
+    Cached resampling aggregates at several resolutions, updated incrementally.
+
+    Args:
+        levels: Frequencies from fine to coarse, e.g. ('D', 'W', 'ME', 'QE', 'YE')
+    """
+
+    def __init__(self, levels=('D', 'W', 'ME', 'QE', 'YE')):
+        self.freqs = list(levels)
+        self.levels = {}
+        # Per level: the finer levels it nests in (coarsest first); the first one is its source.
+        self.sources = {}
+        self.last_time = None
+
+    def build(self, series: pd.Series) -> 'ResamplePyramid':
+        """
+        Builds every level from scratch (an empty series gives an empty pyramid).
+
+        Args:
+            series: Raw values with a DatetimeIndex
+
+        Returns:
+            self
+        """
+        raw = _from_raw(series)
+        self.levels = {}
+        for position, freq in enumerate(self.freqs):
+            # A level is built from the coarsest finer level it nests in, or from the raw values.
+            self.sources[freq] = [finer for finer in reversed(self.freqs[:position])
+                                  if self._exact(self.levels[finer], freq)]
+            source = self.levels[self.sources[freq][0]] if self.sources[freq] else raw
+            self.levels[freq] = _aggregate(source, bucket_labels(pd.DatetimeIndex(source['first_time']), freq))
+        self.last_time = raw.index[-1] if len(raw) else None
+        return self
+
+    def append(self, series: pd.Series) -> 'ResamplePyramid':
+        """
+        Adds newer raw values and updates only the affected buckets of every level.
+
+        Args:
+            series: Raw values that are not older than the newest value already added
+
+        Returns:
+            self
+        """
+        raw = _from_raw(series)
+        if raw.empty:
+            return self
+        if self.last_time is None:
+            return self.build(series)
+        if raw.index[0] < self.last_time:
+            raise ValueError(f"append() needs values from {self.last_time} on; use build() to start over")
+        for freq in self.freqs:
+            old = self.levels[freq]
+            first_label = bucket_labels(raw.index[:1], freq)[0]
+            tail = None
+            for finer in list(self.sources[freq]):
+                # The finer level is already updated: its buckets from the first touched one on are
+                # rebuilt into this level.
+                source = self.levels[finer]
+                start = _first_touched(pd.DatetimeIndex(source['first_time']), first_label, freq)
+                # Only the new buckets need checking: the older ones nested when they were added.
+                if self._exact(source.iloc[start:], freq):
+                    tail = source.iloc[start:]
+                    break
+                self.sources[freq].remove(finer)
+            if tail is None:
+                # The newest existing bucket may be continued by the new rows: merge it again.
+                new = _aggregate(raw, bucket_labels(raw.index, freq))
+                overlap = old.index[old.index >= first_label]
+                if len(overlap):
+                    combined = pd.concat([old.loc[overlap], new])
+                    new = _aggregate(combined, pd.DatetimeIndex(combined.index))
+            else:
+                new = _aggregate(tail, bucket_labels(pd.DatetimeIndex(tail['first_time']), freq))
+            self.levels[freq] = pd.concat([old[old.index < first_label], new])
+        self.last_time = raw.index[-1]
+        return self
+
+    @staticmethod
+    def _exact(level: pd.DataFrame, freq: str) -> bool:
+        """True if every bucket of the level lies completely inside one bucket of freq."""
+        first = bucket_labels(pd.DatetimeIndex(level['first_time']), freq)
+        last = bucket_labels(pd.DatetimeIndex(level['last_time']), freq)
+        return bool((first == last).all())
+
+    def best_level(self, freq: str) -> str:
+        """The coarsest level that answers freq exactly."""
+        if freq in self.levels:
+            return freq
+        for level_freq in sorted(self.freqs, key=lambda f: len(self.levels[f])):
+            if self._exact(self.levels[level_freq], freq):
+                return level_freq
+        raise ValueError(f"No level can answer {freq!r} exactly; add a finer level to {self.freqs}")
+
+    def resample(self, freq: str, agg: str = 'mean'):
+        """
+        Same result as series.resample(freq).<agg>() on the raw data, served from the pyramid.
+
+        Args:
+            freq: Any pandas frequency that one of the levels nests in
+            agg: 'open', 'high', 'low', 'close', 'mean', 'sum', 'count' or 'ohlc'
+
+        Returns:
+            A Series, or a DataFrame with open/high/low/close columns for agg='ohlc'
+        """
+        if agg not in AGGREGATIONS:
+            raise ValueError(f"agg must be one of {AGGREGATIONS}, got {agg!r}")
+        best = self.best_level(freq)
+        level = self.levels[best]
+        buckets = level if best == freq else \
+            _aggregate(level, bucket_labels(pd.DatetimeIndex(level['first_time']), freq))
+        if buckets.empty:
+            # Like resample() on an empty series: no buckets at all.
+            full = buckets.reindex(pd.DatetimeIndex([], tz=buckets.index.tz, freq=freq).as_unit(buckets.index.unit))
+        else:
+            # resample() also returns the empty buckets between the first and the last one.
+            full = buckets.reindex(pd.date_range(buckets.index[0], buckets.index[-1], freq=freq))
+        if agg == 'ohlc':
+            return full[['open', 'high', 'low', 'close']]
+        if agg == 'mean':
+            return full['sum'] / full['count']
+        if agg in ('sum', 'count'):
+            return full[agg].fillna(0).astype(np.int64 if agg == 'count' else np.float64)
+        return full[agg]
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(12)
+
+    def check(pyramid: ResamplePyramid, series: pd.Series, freqs):
+        for freq in freqs:
+            pd.testing.assert_frame_equal(pyramid.resample(freq, 'ohlc'), series.resample(freq).ohlc(),
+                                          check_freq=False)
+            for agg in ('mean', 'sum', 'count'):
+                pd.testing.assert_series_equal(pyramid.resample(freq, agg), series.resample(freq).agg(agg),
+                                               check_names=False, check_freq=False, check_dtype=False)
+
+    # --- Example 1: The daily Price series from time_series.py ---
+    print("--- Example 1: Daily prices, served from the coarsest exact level ---")
+    dates = pd.date_range('2025-10-02', periods=100, freq='D', tz='UTC')
+    prices = pd.Series(rng.standard_normal(100).cumsum() + 50, index=dates, name='Price')
+    pyramid = ResamplePyramid(levels=('D', 'W', 'ME', 'QE')).build(prices)
+    for freq in ('W', 'ME', 'QE', 'YE'):
+        print(f"resample({freq!r}) served from level {pyramid.best_level(freq)!r}")
+    check(pyramid, prices, ('D', 'W', 'ME', 'QE', 'YE'))
+    print(pyramid.resample('ME', 'ohlc').round(2))
+    # Start-anchored levels ('MS', 'QS') are labelled with the first day of their bucket.
+    starts = ResamplePyramid(levels=('D', 'MS', 'QS')).build(prices)
+    check(starts, prices, ('D', 'MS', 'QS', 'YS'))
+    print("OHLC/mean/sum/count match resample() on the raw data: True")
+    print("-" * 60)
+
+    # --- Example 2: Incremental append ---
+    print("--- Example 2: Appending new days updates only the affected buckets ---")
+    more_dates = pd.date_range(dates[-1] + pd.Timedelta(days=1), periods=45, freq='D')
+    more = pd.Series(rng.standard_normal(45).cumsum() + prices.iloc[-1], index=more_dates, name='Price')
+    for start in range(0, 45, 7):
+        pyramid.append(more.iloc[start:start + 7])
+        starts.append(more.iloc[start:start + 7])
+    check(pyramid, pd.concat([prices, more]), ('D', 'W', 'ME', 'QE', 'YE'))
+    check(starts, pd.concat([prices, more]), ('D', 'MS', 'QS', 'YS'))
+
+    # An empty series gives an empty pyramid that later appends fill like a build().
+    empty = ResamplePyramid(levels=('D', 'MS')).build(prices.iloc[:0])
+    check(empty, prices.iloc[:0], ('D', 'MS'))
+    check(empty.append(prices), prices, ('D', 'MS', 'QS'))
+    # Four days of one week: 'W' nests in 'ME' until a week spans two months, then 'ME' goes back to 'D'.
+    week = ResamplePyramid(levels=('D', 'W', 'ME')).build(prices.loc['2025-10-06':'2025-10-09'])
+    print(f"Sources after build: {week.sources}")
+    week.append(prices.loc['2025-10-10':])
+    print(f"Sources after append: {week.sources}")
+    check(week, prices.loc['2025-10-06':], ('D', 'W', 'ME'))
+    print("After 7 appends, every level matches resample() on all data: True")
+    print("-" * 60)
+
+    # --- Example 3: Ten years of minute prices ---
+    print("--- Example 3: 10 years of minute prices (5.3M values) ---")
+    index = pd.date_range('2015-01-01', '2024-12-31 23:59', freq='min')
+    minutes = pd.Series(rng.standard_normal(len(index)).cumsum() * 0.01 + 100, index=index)
+    start_time = time.time()
+    big = ResamplePyramid(levels=('h', 'D', 'W', 'ME', 'QE', 'YE')).build(minutes)
+    print(f"Pyramid built in {time.time() - start_time:.2f}s, rows per level: "
+          f"{ {freq: len(level) for freq, level in big.levels.items()} }")
+    for freq in ('D', 'W', 'ME'):
+        start_time = time.time()
+        big.resample(freq, 'ohlc')
+        pyramid_time = time.time() - start_time
+        start_time = time.time()
+        minutes.resample(freq).ohlc()
+        raw_time = time.time() - start_time
+        print(f"ohlc {freq:>2}: pyramid (from {big.best_level(freq)!r}) {pyramid_time * 1000:6.1f} ms | "
+              f"resample on raw {raw_time * 1000:6.1f} ms")
+    check(big, minutes, ('D', 'W', 'ME'))
+
+    new_hour = pd.Series(rng.standard_normal(60).cumsum() * 0.01 + minutes.iloc[-1],
+                         index=pd.date_range('2025-01-01', periods=60, freq='min'))
+    start_time = time.time()
+    big.append(new_hour)
+    append_time = time.time() - start_time
+    start_time = time.time()
+    ResamplePyramid(levels=('h', 'D', 'W', 'ME', 'QE', 'YE')).build(pd.concat([minutes, new_hour]))
+    print(f"Append one hour: {append_time * 1000:.1f} ms | full rebuild: {(time.time() - start_time) * 1000:.0f} ms")
@@ -0,0 +1,320 @@
+# TIME-PARTITIONED ON-DISK STORE
+# ==============================
+# df_ts.loc['2025-10'] in time_series.py slices an index that is completely in memory.
+# For ten years of ticks the whole history has to be loaded first, just to look at one month.
+#
+# TimePartitionedStore keeps the history on disk instead:
+# - rows are split into one partition per day or per month (a folder like 2025-10/)
+# - every column of a partition is its own .npy file (columnar); text columns are stored
+#   as integer codes plus a small list of labels, category columns as codes of the column's
+#   categories (kept in the manifest with their order, like dataset_registry.py)
+# - manifest.json lists every partition with its first and last timestamp and row count
+# - a column added later is simply missing in the older partitions; reading them fills it
+#   with missing values, like pd.concat() of frames with different columns
+#
+# A range query reads the manifest, opens only the partitions that overlap the range, and
+# memory-maps their columns (np.load(mmap_mode='r')). Inside a partition the timestamps are
+# sorted, so np.searchsorted finds the rows and only those pages are read from disk.
+# Querying one month out of ten years reads one month of data.
+
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+PARTITION_FORMATS = {'D': '%Y-%m-%d', 'M': '%Y-%m'}
+TIME_FILE = '__time__.npy'
+MANIFEST = 'manifest.json'
+
+
+class TimePartitionedStore:
+    """
+    Columnar time-series storage, partitioned by day or month, with fast range queries.
+
+    Args:
+        root: Folder of the store (created if needed; an existing store is opened)
+        partition: 'D' (one partition per day) or 'M' (one per month), in UTC for time zone aware
+                   data; ignored for an existing store
+    """
+
+    def __init__(self, root: str, partition: str = 'M'):
+        if partition not in PARTITION_FORMATS:
+            raise ValueError(f"partition must be one of {list(PARTITION_FORMATS)}, got {partition!r}")
+        self.root = root
+        manifest_path = os.path.join(root, MANIFEST)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        else:
+            os.makedirs(root, exist_ok=True)
+            self.manifest = {'partition': partition, 'tz': None, 'unit': 'ns', 'columns': {}, 'categories': {},
+                             'partitions': {}}
+        self.manifest.setdefault('categories', {})
+        self.opened_partitions = 0  # how many partitions the last query touched
+
+    @property
+    def partition(self) -> str:
+        return self.manifest['partition']
+
+    def _save_manifest(self):
+        with open(os.path.join(self.root, MANIFEST), 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=1)
+
+    # --- Writing ---
+
+    def append(self, df: pd.DataFrame) -> 'TimePartitionedStore':
+        """
+        Adds rows to the store. Partitions that receive rows are rewritten, the others are untouched.
+
+        Args:
+            df: DataFrame with a DatetimeIndex; numeric, boolean and text columns are supported
+
+        Returns:
+            self
+        """
+        if not isinstance(df.index, pd.DatetimeIndex):
+            raise TypeError("The DataFrame needs a DatetimeIndex.")
+        tz = str(df.index.tz) if df.index.tz is not None else None
+        if self.manifest['partitions'] and tz != self.manifest['tz']:
+            raise ValueError(f"Time zone {tz} does not match the store's time zone {self.manifest['tz']}")
+        self.manifest['tz'] = tz
+        self.manifest['unit'] = df.index.unit  # timestamps are stored in ns, returned in this unit
+        for column in df.columns:
+            dtype = df[column].dtype
+            if isinstance(dtype, pd.CategoricalDtype):
+                kind = 'category'
+            elif dtype == object or isinstance(dtype, pd.StringDtype):
+                kind = 'text'
+            else:
+                kind = str(dtype)
+            known = self.manifest['columns'].setdefault(column, kind)
+            if known != kind:
+                raise TypeError(f"Column {column!r} is stored as {known}, got {kind}")
+            if kind == 'category':
+                self._add_categories(column, dtype)
+
+        index = df.index.tz_convert('UTC').tz_localize(None) if tz else df.index
+        # Integer partition numbers (e.g. 202510) are much faster to group by than formatted strings.
+        number = index.year.to_numpy() * 100 + index.month.to_numpy()
+        if self.partition == 'D':
+            number = number * 100 + index.day.to_numpy()
+        for rows in pd.Series(number).groupby(number, sort=True).indices.values():
+            part = df.iloc[rows]
+            key = index[rows[0]].strftime(PARTITION_FORMATS[self.partition])
+            if key in self.manifest['partitions']:
+                # Every stored column is read back, also those missing from df: they are rewritten
+                # with missing values for the new rows, so no column file keeps the old row count.
+                stored = self._read_partition(key, None, None, list(self.manifest['columns']))
+                part = pd.concat([stored, part])
+            self._write_partition(key, part)
+        self._save_manifest()
+        return self
+
+    def _add_categories(self, column: str, dtype: pd.CategoricalDtype):
+        """Records the categories of a column; new ones are appended, so stored codes stay valid."""
+        categories = [str(category) for category in dtype.categories]
+        info = self.manifest['categories'].setdefault(column, {'categories': categories,
+                                                               'ordered': bool(dtype.ordered)})
+        if info['ordered'] != bool(dtype.ordered):
+            raise TypeError(f"Column {column!r} is stored with ordered={info['ordered']}, got {dtype.ordered}")
+        new = [category for category in categories if category not in set(info['categories'])]
+        if new and info['ordered']:
+            raise TypeError(f"Ordered column {column!r} got unknown categories {new}")
+        info['categories'] += new
+
+    def _write_partition(self, key: str, part: pd.DataFrame):
+        part = part.iloc[np.argsort(part.index.as_unit('ns').asi8, kind='stable')]
+        folder = os.path.join(self.root, key)
+        os.makedirs(folder, exist_ok=True)
+        stamps = part.index.as_unit('ns').asi8
+        np.save(os.path.join(folder, TIME_FILE), stamps)
+        labels = {}
+        for column, kind in self.manifest['columns'].items():
+            path = os.path.join(folder, f'{column}.npy')
+            if column not in part or part[column].isna().all():
+                if os.path.exists(path):
+                    os.remove(path)
+                continue  # read back as missing values
+            values = part[column]
+            if kind == 'category':
+                categories = self.manifest['categories'][column]['categories']
+                codes = pd.Categorical(values.astype(str).where(values.notna()), categories=categories).codes
+                np.save(path, codes.astype(np.int32))
+            elif kind == 'text':
+                codes, uniques = pd.factorize(values)
+                np.save(path, codes.astype(np.int32))
+                labels[column] = [str(label) for label in uniques]
+            elif np.dtype(kind).kind in 'iub' and values.isna().any():
+                # Integers and booleans cannot hold NaN: this partition stores the column as float
+                # (booleans as 0.0/1.0), as pd.concat() does for integers.
+                np.save(path, values.to_numpy(dtype=np.float64, na_value=np.nan))
+            else:
+                np.save(path, values.to_numpy(dtype=kind))
+        self.manifest['partitions'][key] = {'min': int(stamps[0]), 'max': int(stamps[-1]),
+                                            'rows': len(part), 'labels': labels}
+
+    # --- Reading ---
+
+    def _bounds(self, start, end):
+        """Turns partial date strings into an inclusive [start, end] range in UTC nanoseconds."""
+        def stamp(value, edge):
+            if value is None:
+                return None
+            if isinstance(value, str):
+                # Like df.loc['2025-10']: a partial string covers the whole month (day, year, ...).
+                period = pd.Period(value)
+                value = period.start_time if edge == 'start' else period.end_time
+            value = pd.Timestamp(value)
+            tz = self.manifest['tz']
+            if tz is not None:
+                value = value.tz_localize(tz) if value.tzinfo is None else value
+                value = value.tz_convert('UTC').tz_localize(None)
+            return value.as_unit('ns').value
+        return stamp(start, 'start'), stamp(end, 'end')
+
+    def _read_partition(self, key: str, low, high, columns: list) -> pd.DataFrame:
+        folder = os.path.join(self.root, key)
+        stamps = np.load(os.path.join(folder, TIME_FILE), mmap_mode='r')
+        first = 0 if low is None else np.searchsorted(stamps, low, side='left')
+        last = len(stamps) if high is None else np.searchsorted(stamps, high, side='right')
+        labels = self.manifest['partitions'][key]['labels']
+        data = {}
+        for column in columns:
+            path = os.path.join(folder, f'{column}.npy')
+            kind = self.manifest['columns'][column]
+            if not os.path.exists(path):
+                # The column was added after this partition was written.
+                if kind == 'category':
+                    info = self.manifest['categories'][column]
+                    data[column] = pd.Categorical.from_codes(np.full(last - first, -1), categories=info['categories'],
+                                                             ordered=info['ordered'])
+                else:
+                    data[column] = np.full(last - first, np.nan, dtype=object if kind == 'text' else np.float64)
+                continue
+            # Only the pages between first and last are read from disk.
+            values = np.load(path, mmap_mode='r')[first:last]
+            if kind == 'category':
+                info = self.manifest['categories'][column]
+                data[column] = pd.Categorical.from_codes(values, categories=info['categories'], ordered=info['ordered'])
+            elif kind == 'text':
+                data[column] = pd.Categorical.from_codes(values, categories=labels[column]).astype(object)
+            else:
+                data[column] = np.array(values)
+        index = pd.DatetimeIndex(np.array(stamps[first:last]).view('datetime64[ns]')).as_unit(self.manifest['unit'])
+        if self.manifest['tz'] is not None:
+            index = index.tz_localize('UTC').tz_convert(self.manifest['tz'])
+        return pd.DataFrame(data, index=index)
+
+    def read(self, start=None, end=None, columns=None) -> pd.DataFrame:
+        """
+        Returns the rows between start and end (both inclusive), like df.loc[start:end].
+
+        Args:
+            start: Timestamp or partial date string like '2025-10'; None = from the beginning
+            end: Timestamp or partial date string; None = until the end.
+                 read('2025-10') alone returns the whole month, like df.loc['2025-10']
+            columns: Columns to load (default: all)
+
+        Returns:
+            DataFrame with a DatetimeIndex
+        """
+        if end is None and isinstance(start, str):
+            end = start
+        columns = list(self.manifest['columns']) if columns is None else list(columns)
+        low, high = self._bounds(start, end)
+        parts = []
+        self.opened_partitions = 0
+        for key, info in sorted(self.manifest['partitions'].items()):
+            # The manifest decides which partitions overlap the range; the rest are never opened.
+            if (low is not None and info['max'] < low) or (high is not None and info['min'] > high):
+                continue
+            self.opened_partitions += 1
+            parts.append(self._read_partition(key, low, high, columns))
+        if not parts:
+            return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([], tz=self.manifest['tz']))
+        return pd.concat(parts) if len(parts) > 1 else parts[0]
+
+    @property
+    def n_rows(self) -> int:
+        return sum(info['rows'] for info in self.manifest['partitions'].values())
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(4)
+    workdir = tempfile.mkdtemp(prefix='ts_store_')
+
+    # --- Example 1: The price series from time_series.py ---
+    print("--- Example 1: store.read('2025-10') vs df_ts.loc['2025-10'] ---")
+    dates = pd.date_range('2025-10-02', periods=100, freq='D', tz='UTC')
+    df_ts = pd.DataFrame({'Price': rng.standard_normal(100).cumsum() + 50}, index=dates)
+    store = TimePartitionedStore(os.path.join(workdir, 'prices'), partition='M').append(df_ts)
+    october = store.read('2025-10')
+    pd.testing.assert_frame_equal(october, df_ts.loc['2025-10'], check_freq=False)
+    print(october.tail(3))
+    print(f"Partitions on disk: {sorted(store.manifest['partitions'])}, opened for the query: "
+          f"{store.opened_partitions}")
+    pd.testing.assert_frame_equal(store.read('2025-10-15', '2025-11-03'),
+                                  df_ts.loc['2025-10-15':'2025-11-03'], check_freq=False)
+    print("Range queries match .loc slicing: True")
+
+    # A category column added in November: October comes back with missing values,
+    # and the categories keep their order.
+    sessions = pd.CategoricalDtype(['Pre-market', 'Regular', 'After-hours'], ordered=True)
+    later = pd.DataFrame({'Price': [51.0, 52.0], 'Session': pd.Categorical(['Regular', 'Pre-market'], dtype=sessions)},
+                         index=pd.DatetimeIndex(['2025-11-20 15:00', '2025-11-21 08:00'], tz='UTC'))
+    store.append(later)
+    combined = pd.concat([df_ts, later]).sort_index(kind='stable')
+    pd.testing.assert_frame_equal(store.read('2025-10', '2025-11'), combined.loc['2025-10':'2025-11'], check_freq=False)
+    print(store.read('2025-11-19', '2025-11-21'))
+    print("Column added later: older rows read as missing, categories kept:",
+          list(store.read('2025-11')['Session'].cat.categories))
+
+    # A batch with fewer columns than the store: its rows read Session as missing, and the
+    # rewritten November partition keeps every stored row.
+    price_only = pd.DataFrame({'Price': [51.5]}, index=pd.DatetimeIndex(['2025-11-20 18:00'], tz='UTC'))
+    store.append(price_only)
+    combined = pd.concat([combined, price_only]).sort_index(kind='stable')
+    pd.testing.assert_frame_equal(store.read('2025-11'), combined.loc['2025-11'], check_freq=False)
+    print(store.read('2025-11-20', '2025-11-21'))
+    print("Batch with fewer columns: stored rows keep their values: True")
+    print("-" * 60)
+
+    # --- Example 2: Ten years of per-minute ticks ---
+    print("--- Example 2: 10 years of minute data (5.3M rows), one month queried ---")
+    index = pd.date_range('2015-01-01', '2024-12-31 23:59', freq='min')
+    history = pd.DataFrame({
+        'Price': rng.standard_normal(len(index)).cumsum() * 0.01 + 100,
+        'Volume': rng.integers(1, 500, len(index)),
+        'Venue': rng.choice(['NYSE', 'NASDAQ', 'ARCA'], len(index)),
+    }, index=index)
+    start_time = time.time()
+    ticks = TimePartitionedStore(os.path.join(workdir, 'ticks'), partition='M')
+    for year in range(2015, 2025):
+        ticks.append(history.loc[str(year)])  # appended year by year, like a growing archive
+    print(f"Written {ticks.n_rows:,} rows into {len(ticks.manifest['partitions'])} monthly partitions "
+          f"in {time.time() - start_time:.1f}s")
+
+    pickle_path = os.path.join(workdir, 'history.pkl')
+    history.to_pickle(pickle_path)
+    start_time = time.time()
+    month = pd.read_pickle(pickle_path).loc['2020-03']
+    full_load_time = time.time() - start_time
+
+    start_time = time.time()
+    from_store = TimePartitionedStore(os.path.join(workdir, 'ticks')).read('2020-03')
+    store_time = time.time() - start_time
+    pd.testing.assert_frame_equal(from_store, month, check_freq=False)
+    month_bytes = sum(os.path.getsize(os.path.join(workdir, 'ticks', '2020-03', name))
+                      for name in os.listdir(os.path.join(workdir, 'ticks', '2020-03')))
+    print(f"Load everything + .loc['2020-03']: {full_load_time:.2f}s ({os.path.getsize(pickle_path) / 1e6:.0f} MB read)")
+    print(f"store.read('2020-03'):             {store_time:.3f}s ({month_bytes / 1e6:.1f} MB in 1 partition)")
+
+    start_time = time.time()
+    hour = ticks.read('2020-03-16 14:00', '2020-03-16 14:59', columns=['Price'])
+    print(f"One hour, one column: {len(hour)} rows in {(time.time() - start_time) * 1000:.1f} ms "
+          f"(only the matching pages of 1 memory-mapped file are read)")
+    shutil.rmtree(workdir)
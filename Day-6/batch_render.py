@@ -0,0 +1,351 @@
+# HEADLESS BATCH FIGURE RENDERING
+# ===============================
+# Every plot in matplotlib_basics.py, seaborn_analysis.py, Day-7/tip_prediction_model.py and
+# master_consolidation.py ends with plt.show(), which opens a window and blocks until it is
+# closed. A nightly report with thousands of figures cannot work that way.
+#
+# This module renders figures without a screen:
+# - the 'Agg' backend draws into memory (no window, no display server needed)
+# - every figure is written with savefig() as PNG and/or SVG and then closed with
+#   plt.close(), so its memory is freed (open figures are never garbage collected)
+# - figures are described by small "specs" (plain dictionaries) and rendered in parallel
+#   by a pool of worker processes, each with its own matplotlib state
+# - every figure is timed, the peak memory of every worker is reported, and an optional
+#   memory cap per worker turns a runaway figure into an error instead of a crashed machine.
+#   The cap limits the worker's address space (RLIMIT_AS, Unix only), which also counts
+#   memory that is reserved but never used (e.g. thread arenas of BLAS libraries), so it
+#   has to be set well above the peak resident memory the report shows.
+#
+# Two kinds of specs:
+#   {'name': 'sine', 'renderer': 'sine_wave', 'params': {...}, 'formats': ('png', 'svg')}
+#   {'name': 'roi', 'script': '../Python_core_revision/master_consolidation.py'}
+# The second one runs an existing script unchanged and saves every figure it would show.
+
+import contextlib
+import functools
+import importlib.util
+import io
+import multiprocessing
+import os
+import runpy
+import shutil
+import tempfile
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+
+matplotlib.use('Agg')  # must happen before pyplot is imported
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import seaborn as sns  # noqa: E402
+
+from fast_kde import use_binned_kde  # noqa: E402
+
+FORMATS = ('png', 'svg')
+
+# Renderer name -> function(**params) that draws one figure and returns it.
+RENDERERS = {}
+
+
+def register(name: str):
+    """Decorator that makes a figure function available to specs under the given name."""
+    def decorator(function):
+        RENDERERS[name] = function
+        return function
+    return decorator
+
+
+@functools.lru_cache(maxsize=8)
+def _read_table(path: str) -> pd.DataFrame:
+    # Each worker reads a shared data file once, instead of receiving a copy with every spec.
+    return pd.read_pickle(path) if path.endswith('.pkl') else pd.read_csv(path)
+
+
+def load_data(data) -> pd.DataFrame:
+    """Returns the DataFrame of a spec: either the DataFrame itself or a .csv/.pkl path."""
+    return _read_table(data) if isinstance(data, str) else data
+
+
+# --- Part 1: The plots of Day-6, Day-7 and master_consolidation.py as renderers ---
+
+@register('sine_wave')
+def sine_wave(n_points: int = 100, title: str = 'Basic Sine Wave Plot'):
+    x = np.linspace(0, 10, n_points)
+    fig, ax = plt.subplots(figsize=(10, 5))
+    ax.plot(x, np.sin(x), label='Sine Wave')
+    ax.set(title=title, xlabel='X-axis', ylabel='Y-axis')
+    ax.legend()
+    ax.grid(True)
+    return fig
+
+
+@register('random_scatter')
+def random_scatter(n_points: int = 50, seed: int = 42):
+    rng = np.random.RandomState(seed)
+    fig, ax = plt.subplots(figsize=(8, 6))
+    ax.scatter(rng.rand(n_points), rng.rand(n_points), color='red', alpha=0.5, marker='o', label='Random Points')
+    ax.set(title='Basic Scatter Plot', xlabel='X-axis', ylabel='Y-axis')
+    ax.legend()
+    ax.grid(True)
+    return fig
+
+
+@register('boxplot')
+def boxplot(data, x: str, y: str, title: str = '', figsize=(10, 6)):
+    fig, ax = plt.subplots(figsize=figsize)
+    sns.boxplot(x=x, y=y, data=load_data(data), ax=ax)
+    ax.set_title(title)
+    return fig
+
+
+@register('histplot')
+def histplot(data, x: str, kde: bool = True, title: str = ''):
+    fig, ax = plt.subplots(figsize=(10, 6))
+    with use_binned_kde():  # the exact KDE is O(n * grid); large columns get the FFT estimate
+        sns.histplot(data=load_data(data), x=x, kde=kde, ax=ax)
+    ax.set(title=title, ylabel='Frequency')
+    return fig
+
+
+@register('jointplot')
+def jointplot(data, x: str, y: str, hue: str = None, title: str = ''):
+    # jointplot() is a figure-level function: it creates its own figure.
+    grid = sns.jointplot(x=x, y=y, data=load_data(data), kind='scatter', hue=hue)
+    grid.figure.suptitle(title, y=1.02)
+    return grid.figure
+
+
+@register('correlation_heatmap')
+def correlation_heatmap(data, title: str = ''):
+    fig, ax = plt.subplots(figsize=(8, 6))
+    sns.heatmap(load_data(data).corr(numeric_only=True), annot=True, cmap='coolwarm', fmt='.2f', ax=ax)
+    ax.set_title(title)
+    return fig
+
+
+@register('scatterplot')
+def scatterplot(data, x: str, y: str, title: str = ''):
+    fig, ax = plt.subplots(figsize=(10, 6))
+    sns.scatterplot(x=x, y=y, data=load_data(data), ax=ax)
+    ax.set_title(title)
+    return fig
+
+
+# --- Part 2: Rendering one spec ---
+
+def _save(fig, base_path: str, formats, dpi: int) -> list:
+    files = []
+    for fmt in formats:
+        path = f'{base_path}.{fmt}'
+        fig.savefig(path, format=fmt, dpi=dpi, bbox_inches='tight')
+        files.append(path)
+    return files
+
+
+def _run_script(path: str, base_path: str, formats, dpi: int) -> list:
+    """Runs a plotting script unchanged; every plt.show() saves the open figures instead."""
+    files = []
+
+    def show(*args, **kwargs):
+        for number in plt.get_fignums():
+            files.extend(_save(plt.figure(number), f'{base_path}_{len(files) // len(formats) + 1}', formats, dpi))
+            plt.close(number)
+
+    original_show, original_cwd = plt.show, os.getcwd()
+    plt.show = show
+    try:
+        os.chdir(os.path.dirname(os.path.abspath(path)))
+        with contextlib.redirect_stdout(io.StringIO()):  # the scripts print a lot
+            runpy.run_path(os.path.basename(path), run_name='__main__')
+        show()  # figures that were created but never shown
+    finally:
+        plt.show = original_show
+        os.chdir(original_cwd)
+    return files
+
+
+def render_spec(spec: dict, out_dir: str) -> dict:
+    """
+    Renders one spec into files and closes every figure it created.
+
+    Args:
+        spec: {'name', 'renderer', 'params'} or {'name', 'script'}; optional 'formats' and 'dpi'
+        out_dir: Folder for the image files
+
+    Returns:
+        Dictionary with name, files, seconds, peak_rss_mb and error (None if it worked)
+    """
+    formats = tuple(spec.get('formats', ('png',)))
+    unknown = set(formats) - set(FORMATS)
+    base_path = os.path.join(out_dir, spec['name'])
+    start_time = time.perf_counter()
+    files, error = [], None
+    try:
+        if unknown:
+            raise ValueError(f"Unknown format(s) {sorted(unknown)}; use {FORMATS}")
+        if 'script' in spec:
+            files = _run_script(spec['script'], base_path, formats, spec.get('dpi', 100))
+        else:
+            fig = RENDERERS[spec['renderer']](**spec.get('params', {}))
+            files = _save(fig, base_path, formats, spec.get('dpi', 100))
+    except MemoryError:
+        error = 'MemoryError: the figure needed more memory than the cap allows'
+    except Exception as exc:  # one broken figure must not stop the whole report
+        error = f'{type(exc).__name__}: {exc}'
+    finally:
+        plt.close('all')
+    return {'name': spec['name'], 'files': files, 'seconds': time.perf_counter() - start_time,
+            'peak_rss_mb': _peak_rss_mb(), 'pid': os.getpid(), 'error': error}
+
+
+def _peak_rss_mb():
+    """Peak resident memory of this process so far in MB, or None where it is not available."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    # ru_maxrss is in kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# --- Part 3: Rendering many specs on a process pool ---
+
+def _init_worker(memory_limit_mb):
+    matplotlib.use('Agg')
+    if memory_limit_mb:
+        import resource
+        # Cap the address space of the worker: an allocation above it raises MemoryError.
+        limit = int(memory_limit_mb * 1024 * 1024)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _render_task(task):
+    spec, out_dir = task
+    return render_spec(spec, out_dir)
+
+
+def render_batch(specs, out_dir: str, n_workers: int = 4, memory_limit_mb: int = None,
+                 max_tasks_per_child: int = 100) -> pd.DataFrame:
+    """
+    Renders many figure specs in parallel, without a display.
+
+    Args:
+        specs: Iterable of spec dictionaries (see render_spec)
+        out_dir: Folder for the image files (created if needed)
+        n_workers: Number of worker processes (1 = render in this process)
+        memory_limit_mb: Address-space (virtual memory) cap per worker in MB, Unix only;
+                         None = no cap. Not applied with n_workers=1, where it would
+                         limit the calling process itself
+        max_tasks_per_child: Workers are replaced after this many figures, which returns
+                             memory that matplotlib/fonts caches would otherwise keep
+
+    Returns:
+        DataFrame with one row per spec: name, files, seconds, peak_rss_mb, pid, error
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    tasks = [(spec, out_dir) for spec in specs]
+    if memory_limit_mb and importlib.util.find_spec('resource') is None:
+        raise ValueError("memory_limit_mb needs the Unix 'resource' module; use None on this platform")
+    if n_workers == 1:
+        if memory_limit_mb:
+            warnings.warn("memory_limit_mb is ignored with n_workers=1; use n_workers >= 2 to cap memory",
+                          stacklevel=2)
+        return pd.DataFrame([_render_task(task) for task in tasks])
+    # 'spawn' starts clean workers (no copied parent state), required for max_tasks_per_child.
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=n_workers, mp_context=context, initializer=_init_worker,
+                             initargs=(memory_limit_mb,), max_tasks_per_child=max_tasks_per_child) as executor:
+        results = list(executor.map(_render_task, tasks, chunksize=4))
+    return pd.DataFrame(results)
+
+
+def example_datasets(folder: str) -> dict:
+    """
+    Writes iris- and tips-like tables to folder and returns their paths.
+
+    seaborn.load_dataset() downloads the real datasets; without network access, tables
+    with the same columns are generated so the report can still be rendered.
+    """
+    try:
+        iris, tips = sns.load_dataset('iris'), sns.load_dataset('tips')
+    except Exception:
+        rng = np.random.default_rng(0)
+        species = np.repeat(['setosa', 'versicolor', 'virginica'], 50)
+        centers = {'setosa': (5.0, 3.4, 1.5, 0.2), 'versicolor': (5.9, 2.8, 4.3, 1.3), 'virginica': (6.6, 3.0, 5.6, 2.0)}
+        values = np.array([centers[name] for name in species]) + rng.normal(0, 0.3, (150, 4))
+        iris = pd.DataFrame(values.round(1), columns=['sepal_length', 'sepal_width', 'petal_length', 'petal_width'])
+        iris['species'] = species
+        total_bill = rng.gamma(4, 5, 244).round(2) + 3
+        tips = pd.DataFrame({'total_bill': total_bill,
+                             'tip': (total_bill * rng.uniform(0.1, 0.2, 244)).round(2),
+                             'day': rng.choice(['Thur', 'Fri', 'Sat', 'Sun'], 244)})
+    paths = {'iris': os.path.join(folder, 'iris.pkl'), 'tips': os.path.join(folder, 'tips.pkl')}
+    iris.to_pickle(paths['iris'])
+    tips.to_pickle(paths['tips'])
+    return paths
+
+
+if __name__ == "__main__":
+    here = os.path.dirname(os.path.abspath(__file__))
+    workdir = tempfile.mkdtemp(prefix='figures_')
+    data = example_datasets(workdir)
+
+    # --- Example 1: The figures of the Day-6/Day-7 scripts and master_consolidation.py ---
+    print("--- Example 1: Rendering the course figures headless ---")
+    specs = [
+        {'name': 'sine_wave', 'renderer': 'sine_wave', 'formats': ('png', 'svg')},
+        {'name': 'random_scatter', 'renderer': 'random_scatter'},
+        {'name': 'iris_boxplot', 'renderer': 'boxplot',
+         'params': {'data': data['iris'], 'x': 'species', 'y': 'sepal_length',
+                    'title': 'Box Plot of Sepal Length by Species'}},
+        {'name': 'iris_histogram', 'renderer': 'histplot',
+         'params': {'data': data['iris'], 'x': 'sepal_length', 'title': 'Histogram of Sepal Length'}},
+        {'name': 'iris_jointplot', 'renderer': 'jointplot',
+         'params': {'data': data['iris'], 'x': 'sepal_length', 'y': 'sepal_width', 'hue': 'species',
+                    'title': 'Joint Plot of Sepal Length vs Sepal Width'}},
+        {'name': 'iris_heatmap', 'renderer': 'correlation_heatmap',
+         'params': {'data': data['iris'], 'title': 'Heatmap of Iris Dataset Correlation'}},
+        {'name': 'tips_scatter', 'renderer': 'scatterplot',
+         'params': {'data': data['tips'], 'x': 'total_bill', 'y': 'tip', 'title': 'Total Bill vs Tip'}},
+        # Existing scripts, run unchanged: their plt.show() calls save the figures instead.
+        {'name': 'matplotlib_basics', 'script': os.path.join(here, 'matplotlib_basics.py')},
+        {'name': 'master_consolidation',
+         'script': os.path.join(here, '..', 'Python_core_revision', 'master_consolidation.py')},
+    ]
+    report = render_batch(specs, os.path.join(workdir, 'course'), n_workers=2)
+    report['files'] = report['files'].apply(lambda files: ', '.join(os.path.basename(f) for f in files))
+    print(report[['name', 'files', 'seconds', 'peak_rss_mb', 'error']].round(2).to_string(index=False))
+    print("-" * 60)
+
+    # --- Example 2: A nightly report with many figures ---
+    n_figures = 200
+    print(f"--- Example 2: {n_figures} figures, 1 process vs 4 workers ---")
+    report_specs = []
+    for i in range(n_figures):
+        kind = ('sine_wave', 'boxplot', 'scatterplot', 'histplot')[i % 4]
+        params = {'sine_wave': {'n_points': 1000, 'title': f'Series {i}'},
+                  'boxplot': {'data': data['iris'], 'x': 'species', 'y': 'sepal_length', 'title': f'Figure {i}'},
+                  'scatterplot': {'data': data['tips'], 'x': 'total_bill', 'y': 'tip', 'title': f'Figure {i}'},
+                  'histplot': {'data': data['iris'], 'x': 'petal_length', 'title': f'Figure {i}'}}[kind]
+        report_specs.append({'name': f'fig_{i:04d}', 'renderer': kind, 'params': params})
+    for n_workers in (1, 4):
+        start_time = time.time()
+        report = render_batch(report_specs, os.path.join(workdir, f'nightly_{n_workers}'), n_workers=n_workers)
+        elapsed = time.time() - start_time
+        print(f"{n_workers} worker(s): {elapsed:.1f}s total, {n_figures / elapsed:.1f} figures/s, "
+              f"per figure median {report['seconds'].median() * 1000:.0f} ms / p95 "
+              f"{report['seconds'].quantile(0.95) * 1000:.0f} ms, peak worker memory "
+              f"{report['peak_rss_mb'].max():.0f} MB, errors: {report['error'].notna().sum()}, "
+              f"open figures left: {len(plt.get_fignums())}")
+    print(f"CPU cores available: {os.cpu_count()}")
+
+    # A figure that needs too much memory fails alone instead of taking the machine down.
+    # The cap is opt-in and limits address space, so it is set far above the peak resident memory.
+    oversized = [{'name': 'too_big', 'renderer': 'sine_wave', 'params': {'n_points': 400_000_000}}]
+    result = render_batch(oversized, os.path.join(workdir, 'capped'), n_workers=2, memory_limit_mb=1536)
+    print("Oversized figure with a 1.5 GB cap:", result.loc[0, 'error'])
+    shutil.rmtree(workdir)
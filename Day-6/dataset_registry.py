@@ -0,0 +1,292 @@
+# OFFLINE DATASET REGISTRY
+# ========================
+# seaborn_analysis.py loads 'iris' and Day-7/tip_prediction_model.py loads 'tips' with
+# sns.load_dataset(), which downloads a CSV from GitHub on every fresh machine. On a runner
+# without internet access the scripts fail before the first plot.
+#
+# DatasetRegistry.load(name) looks in these places, in order:
+# 1. the registry folder: one sub-folder per dataset, with one .npy file per column
+#    (binary and columnar) and schema.json with the exact dtype of every column.
+#    Numeric columns are memory-mapped (np.load(mmap_mode='r')); category and text columns
+#    are stored as integer codes plus their labels, so categories keep their order.
+# 2. local copies: seaborn's own download cache (~/.cache/seaborn) and, for iris, the copy
+#    that ships with scikit-learn
+# 3. the internet, through sns.load_dataset() - only when allowed
+#    (allow_network=True or the environment variable BOOTCAMP_ALLOW_NETWORK=1)
+# Whatever is found in 2. or 3. is written to the registry folder, so every later load is
+# local, binary and fast. seed(name, source) pre-seeds a dataset from a CSV file or a
+# DataFrame, e.g. when preparing an air-gapped runner.
+#
+# PINNED_DTYPES fixes the dtypes of the known datasets to what sns.load_dataset() returns
+# (e.g. tips' 'day' is a category with the order Thur, Fri, Sat, Sun), whatever the source.
+
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_ROOT = os.environ.get('BOOTCAMP_DATA_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'bootcamp-datasets'))
+SCHEMA_FILE = 'schema.json'
+
+# Column -> dtype, as returned by sns.load_dataset(). ('category', [...]) keeps the category order.
+PINNED_DTYPES = {
+    'iris': {'sepal_length': 'float64', 'sepal_width': 'float64', 'petal_length': 'float64',
+             'petal_width': 'float64', 'species': 'text'},
+    'tips': {'total_bill': 'float64', 'tip': 'float64', 'sex': ('category', ['Male', 'Female']),
+             'smoker': ('category', ['Yes', 'No']), 'day': ('category', ['Thur', 'Fri', 'Sat', 'Sun']),
+             'time': ('category', ['Lunch', 'Dinner']), 'size': 'int64'},
+}
+
+
+def _pin_dtypes(name: str, df: pd.DataFrame) -> pd.DataFrame:
+    """Casts a known dataset to its pinned dtypes; unknown datasets are returned unchanged."""
+    if name not in PINNED_DTYPES:
+        return df
+    schema = PINNED_DTYPES[name]
+    if list(df.columns) != list(schema):
+        raise ValueError(f"Dataset {name!r} must have the columns {list(schema)}, got {list(df.columns)}")
+    df = df.copy()
+    for column, dtype in schema.items():
+        if isinstance(dtype, tuple):
+            df[column] = pd.Categorical(df[column], categories=dtype[1])
+        elif dtype == 'text':
+            df[column] = df[column].astype(str)
+        else:
+            df[column] = df[column].astype(dtype)
+    return df
+
+
+def _iris_from_sklearn() -> pd.DataFrame:
+    """The iris table shipped inside scikit-learn, with seaborn's column names."""
+    from sklearn.datasets import load_iris
+    bunch = load_iris(as_frame=True)
+    df = bunch.data.copy()
+    df.columns = ['sepal_length', 'sepal_width', 'petal_length', 'petal_width']
+    df['species'] = bunch.target_names[bunch.target]
+    return df
+
+
+# Datasets that can be rebuilt from files already installed on the machine.
+BUNDLED = {'iris': _iris_from_sklearn}
+
+
+class DatasetRegistry:
+    """
+    Serves example datasets from a local folder in a memory-mapped columnar format.
+
+    Args:
+        root: Registry folder (default: $BOOTCAMP_DATA_DIR or ~/.cache/bootcamp-datasets)
+        allow_network: Download missing datasets with sns.load_dataset()
+                       (default: the environment variable BOOTCAMP_ALLOW_NETWORK=1)
+    """
+
+    def __init__(self, root: str = None, allow_network: bool = None):
+        self.root = root or DEFAULT_ROOT
+        if allow_network is None:
+            allow_network = os.environ.get('BOOTCAMP_ALLOW_NETWORK', '0') == '1'
+        self.allow_network = allow_network
+        self.last_source = None  # where the last load() found the data
+
+    def _folder(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def __contains__(self, name: str) -> bool:
+        return os.path.exists(os.path.join(self._folder(name), SCHEMA_FILE))
+
+    def names(self) -> list:
+        """Datasets stored in the registry folder."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root) if name in self)
+
+    # --- Writing ---
+
+    def save(self, name: str, df: pd.DataFrame) -> str:
+        """
+        Stores a DataFrame as one .npy file per column plus schema.json.
+
+        Args:
+            name: Dataset name
+            df: The data (numeric, boolean, datetime, category and text columns)
+
+        Returns:
+            Folder of the stored dataset
+        """
+        df = _pin_dtypes(name, df)
+        os.makedirs(self.root, exist_ok=True)
+        # Write into a temporary folder and rename it: readers never see half a dataset.
+        staging = tempfile.mkdtemp(prefix=f'.{name}_', dir=self.root)
+        columns = []
+        for position, column in enumerate(df.columns):
+            values = df[column]
+            info = {'name': column, 'file': f'{position}.npy'}
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                info.update(kind='category', categories=[str(c) for c in values.cat.categories],
+                            ordered=bool(values.cat.ordered))
+                array = values.cat.codes.to_numpy()
+            elif values.dtype == object or isinstance(values.dtype, pd.StringDtype):
+                codes, labels = pd.factorize(values)
+                info.update(kind='text', categories=[str(label) for label in labels])
+                array = codes.astype(np.int32)
+            elif pd.api.types.is_datetime64_any_dtype(values.dtype):
+                tz = values.dt.tz
+                info.update(kind='datetime', tz=None if tz is None else str(tz))
+                if tz is not None:
+                    values = values.dt.tz_convert('UTC').dt.tz_localize(None)
+                array = values.to_numpy().astype('datetime64[ns]').view(np.int64)  # UTC nanoseconds
+            else:
+                info.update(kind='numeric', dtype=str(values.dtype))
+                array = values.to_numpy()
+            np.save(os.path.join(staging, info['file']), array)
+            columns.append(info)
+        with open(os.path.join(staging, SCHEMA_FILE), 'w', encoding='utf-8') as f:
+            json.dump({'name': name, 'rows': len(df), 'columns': columns}, f, indent=1)
+        folder = self._folder(name)
+        if os.path.exists(folder):
+            shutil.rmtree(folder)
+        os.replace(staging, folder)
+        return folder
+
+    def seed(self, name: str, source) -> str:
+        """
+        Pre-seeds a dataset, e.g. from a CSV copied onto an offline machine.
+
+        Args:
+            name: Dataset name
+            source: DataFrame, or path to a .csv/.pkl file
+
+        Returns:
+            Folder of the stored dataset
+        """
+        if isinstance(source, str):
+            source = pd.read_pickle(source) if source.endswith('.pkl') else pd.read_csv(source)
+        return self.save(name, source)
+
+    # --- Reading ---
+
+    def _read(self, name: str, mmap: bool) -> pd.DataFrame:
+        folder = self._folder(name)
+        with open(os.path.join(folder, SCHEMA_FILE), encoding='utf-8') as f:
+            schema = json.load(f)
+        data = {}
+        for info in schema['columns']:
+            array = np.load(os.path.join(folder, info['file']), mmap_mode='r' if mmap else None)
+            if info['kind'] == 'category':
+                data[info['name']] = pd.Categorical.from_codes(np.asarray(array), categories=info['categories'],
+                                                               ordered=info['ordered'])
+            elif info['kind'] == 'text':
+                text = pd.Categorical.from_codes(np.asarray(array), categories=info['categories'])
+                data[info['name']] = pd.Series(text).astype(str).where(np.asarray(array) >= 0)
+            elif info['kind'] == 'datetime':
+                stamps = pd.Series(np.asarray(array).view('datetime64[ns]'))
+                if info['tz'] is not None:
+                    stamps = stamps.dt.tz_localize('UTC').dt.tz_convert(info['tz'])
+                data[info['name']] = stamps
+            else:
+                data[info['name']] = array  # memory-mapped: pages are read from disk on first access
+        # copy=False keeps the numeric columns backed by the memory-mapped files.
+        return pd.DataFrame(data, copy=False)
+
+    def _fetch(self, name: str):
+        """Finds a dataset outside the registry: local copies first, then (if allowed) the internet."""
+        import seaborn as sns
+        if os.path.exists(os.path.join(sns.get_data_home(), f'{name}.csv')):
+            # seaborn reads its cached CSV without going online and applies its own dtypes.
+            return sns.load_dataset(name), 'seaborn cache'
+        if name in BUNDLED:
+            try:
+                return BUNDLED[name](), 'bundled copy'
+            except ImportError:
+                pass
+        if self.allow_network:
+            return sns.load_dataset(name), 'network'
+        return None, None
+
+    def load(self, name: str, mmap: bool = True) -> pd.DataFrame:
+        """
+        Returns a dataset like sns.load_dataset(name), without the network if possible.
+
+        Args:
+            name: Dataset name, e.g. 'iris' or 'tips'
+            mmap: Memory-map the numeric columns instead of reading them into memory
+
+        Returns:
+            DataFrame with the pinned dtypes
+        """
+        if name not in self:
+            df, source = self._fetch(name)
+            if df is None:
+                raise FileNotFoundError(
+                    f"Dataset {name!r} is not in {self.root} and no local copy was found. Seed it with "
+                    f"DatasetRegistry().seed({name!r}, 'path/to/{name}.csv') or allow downloads with "
+                    f"BOOTCAMP_ALLOW_NETWORK=1.")
+            self.save(name, df)
+            self.last_source = source
+        else:
+            self.last_source = 'registry'
+        return self._read(name, mmap)
+
+
+def load_dataset(name: str, **kwargs) -> pd.DataFrame:
+    """Drop-in replacement for sns.load_dataset(name) that works offline (see DatasetRegistry)."""
+    return DatasetRegistry().load(name, **kwargs)
+
+
+if __name__ == "__main__":
+    workdir = tempfile.mkdtemp(prefix='datasets_')
+    registry = DatasetRegistry(os.path.join(workdir, 'registry'), allow_network=False)
+
+    # --- Example 1: iris without the internet ---
+    print("--- Example 1: load('iris') on an offline machine ---")
+    start_time = time.time()
+    df_iris = registry.load('iris')
+    print(f"First load from: {registry.last_source} ({(time.time() - start_time) * 1000:.0f} ms)")
+    start_time = time.time()
+    df_iris = registry.load('iris')
+    print(f"Second load from: {registry.last_source} ({(time.time() - start_time) * 1000:.1f} ms)")
+    print(df_iris.head())
+    print(df_iris.dtypes.to_dict())
+    print("-" * 60)
+
+    # --- Example 2: tips, network not allowed ---
+    print("--- Example 2: load('tips') without network permission, then pre-seeded ---")
+    try:
+        registry.load('tips')
+    except FileNotFoundError as exc:
+        print("FileNotFoundError:", exc)
+    # On a connected machine this CSV would come from sns.load_dataset('tips').to_csv(...);
+    # here a small stand-in with the same columns is written.
+    rng = np.random.default_rng(7)
+    total_bill = (rng.gamma(4, 5, 244) + 3).round(2)
+    pd.DataFrame({'total_bill': total_bill, 'tip': (total_bill * rng.uniform(0.1, 0.2, 244)).round(2),
+                  'sex': rng.choice(['Female', 'Male'], 244), 'smoker': rng.choice(['No', 'Yes'], 244),
+                  'day': rng.choice(['Sun', 'Sat', 'Thur', 'Fri'], 244), 'time': rng.choice(['Dinner', 'Lunch'], 244),
+                  'size': rng.integers(1, 7, 244)}).to_csv(os.path.join(workdir, 'tips.csv'), index=False)
+    registry.seed('tips', os.path.join(workdir, 'tips.csv'))
+    tips = registry.load('tips')
+    print(f"Loaded from: {registry.last_source}; categories kept in seaborn's order: "
+          f"day={list(tips['day'].cat.categories)}, sex={list(tips['sex'].cat.categories)}")
+    # Same dummy columns as in tip_prediction_model.py, whatever order the CSV had.
+    print("get_dummies columns:", list(pd.get_dummies(tips, drop_first=True).columns))
+    print("-" * 60)
+
+    # --- Example 3: A larger table, CSV vs the registry ---
+    print("--- Example 3: 2,000,000 rows: read_csv vs registry (memory-mapped) ---")
+    big = pd.concat([tips] * 8200, ignore_index=True)
+    big.to_csv(os.path.join(workdir, 'big.csv'), index=False)
+    registry.save('big_tips', big)
+    start_time = time.time()
+    from_csv = pd.read_csv(os.path.join(workdir, 'big.csv'))
+    csv_time = time.time() - start_time
+    start_time = time.time()
+    from_registry = registry.load('big_tips')
+    registry_time = time.time() - start_time
+    pd.testing.assert_frame_equal(from_registry.copy(), big)  # copy(): memmap -> in-memory arrays
+    print(f"read_csv {csv_time:.2f}s (dtypes lost: day is {from_csv['day'].dtype}) | "
+          f"registry {registry_time:.3f}s (day is {from_registry['day'].dtype})")
+    print("Registry contents:", registry.names())
+    shutil.rmtree(workdir)
@@ -0,0 +1,286 @@
+# RASTERIZED DENSITY SCATTER FOR MILLIONS OF POINTS
+# =================================================
+# plt.scatter(rand_x, rand_y) in matplotlib_basics.py and sns.scatterplot/jointplot in
+# seaborn_analysis.py draw one marker per point. At 50 points that is fine; at 10 million
+# the markers are drawn on top of each other thousands of times per pixel, the figure
+# takes minutes, and the dense regions become one solid blob anyway.
+#
+# A density scatter counts the points per pixel instead and draws the counts as one image:
+# - DensityGrid.update(x, y) turns coordinates into a flat pixel number and counts them with
+#   np.bincount (the same counts as np.histogram2d, without its per-call sorting overhead)
+# - the data is processed in chunks, so x and y can be np.memmap files, or chunks that never
+#   fit in memory together can be fed to update() one by one; only the grid is kept
+# - the grid is drawn with imshow() and a logarithmic color scale, so both the dense
+#   core and single outliers stay visible
+# - with hue, every category gets its own grid and its own colored, transparent layer
+#
+# The render time depends on the number of pixels, not on the number of points.
+
+import time
+
+import matplotlib
+import numpy as np
+import pandas as pd
+from matplotlib.colors import LogNorm, to_rgb
+from matplotlib.patches import Patch
+
+CHUNK_SIZE = 5_000_000
+
+
+class DensityGrid:
+    """
+    Point counts on a fixed 2D grid, filled chunk by chunk.
+
+    Args:
+        x_range: (min, max) of the x axis; points outside are ignored
+        y_range: (min, max) of the y axis; points outside are ignored
+        bins: (number of x bins, number of y bins)
+    """
+
+    def __init__(self, x_range, y_range, bins=(400, 300)):
+        self.x_range = tuple(float(v) for v in x_range)
+        self.y_range = tuple(float(v) for v in y_range)
+        self.bins = (int(bins[0]), int(bins[1]))
+        self.counts = {}  # category (None without hue) -> counts of shape (y bins, x bins)
+        self.n_points = 0
+
+    def _cells(self, values: np.ndarray, value_range, n_bins: int):
+        """Bin number of every value, like np.histogram2d: the last bin includes its right edge."""
+        low, high = value_range
+        values = np.asarray(values, dtype=np.float64)
+        with np.errstate(invalid='ignore'):  # NaN and far-away values are masked out below
+            cells = ((values - low) * (n_bins / (high - low))).astype(np.int64)
+        cells[values == high] = n_bins - 1
+        inside = (values >= low) & (values <= high)
+        return cells, inside
+
+    def update(self, x, y, hue=None) -> 'DensityGrid':
+        """
+        Counts one chunk of points.
+
+        Args:
+            x: x coordinates
+            y: y coordinates
+            hue: Optional category of every point (a pandas Categorical is fastest)
+
+        Returns:
+            self
+        """
+        n_x, n_y = self.bins
+        x_cells, x_inside = self._cells(x, self.x_range, n_x)
+        y_cells, y_inside = self._cells(y, self.y_range, n_y)
+        inside = x_inside & y_inside
+        cells = y_cells[inside] * n_x + x_cells[inside]  # row-major pixel number, row = y
+        if hue is None:
+            codes, categories = np.zeros(len(cells), dtype=np.int64), [None]
+        else:
+            hue = _as_categories(hue)
+            if isinstance(hue, pd.Categorical):
+                # Categorical codes are already integers; no strings need to be compared.
+                codes, categories = hue.codes[inside].astype(np.int64), hue.categories.tolist()
+            else:
+                codes, categories = pd.factorize(hue[inside], sort=True)
+                categories = categories.tolist()
+            keep = codes >= 0  # missing categories are dropped, like in seaborn
+            codes, cells = codes[keep], cells[keep]
+        # One bincount for all categories: category c uses the cell numbers c * n_x * n_y + cell.
+        counts = np.bincount(codes * (n_x * n_y) + cells, minlength=len(categories) * n_x * n_y)
+        for code, category in enumerate(categories):
+            grid = counts[code * n_x * n_y:(code + 1) * n_x * n_y].reshape(n_y, n_x)
+            if category in self.counts:
+                self.counts[category] += grid
+            else:
+                self.counts[category] = grid.copy()
+        self.n_points += len(cells)
+        return self
+
+    def merge(self, other: 'DensityGrid') -> 'DensityGrid':
+        """Adds the counts of another grid with the same ranges and bins (e.g. from another worker)."""
+        if (other.x_range, other.y_range, other.bins) != (self.x_range, self.y_range, self.bins):
+            raise ValueError("Only grids with the same ranges and bins can be merged.")
+        for category, grid in other.counts.items():
+            self.counts[category] = self.counts.get(category, 0) + grid
+        self.n_points += other.n_points
+        return self
+
+    @property
+    def total(self) -> np.ndarray:
+        """Counts of all categories together."""
+        return sum(self.counts.values())
+
+    @property
+    def extent(self):
+        return (*self.x_range, *self.y_range)
+
+
+def _as_categories(hue):
+    """A pandas Categorical stays one (fast integer codes), anything else becomes a NumPy array."""
+    if isinstance(hue, pd.Series):
+        hue = hue.array
+    return hue if isinstance(hue, pd.Categorical) else np.asarray(hue)
+
+
+def _axes_bins(ax):
+    """One bin per screen pixel of the axes."""
+    box = ax.get_window_extent()
+    return max(1, int(box.width)), max(1, int(box.height))
+
+
+def density_grid(x, y, hue=None, x_range=None, y_range=None, bins=(400, 300),
+                 chunk_size: int = CHUNK_SIZE) -> DensityGrid:
+    """
+    Counts arrays of points chunk by chunk.
+
+    Args:
+        x, y: Coordinates; NumPy arrays, np.memmap files or pandas Series
+        hue: Optional categories of the points
+        x_range, y_range: Axis ranges (default: the min and max of the data, one extra pass)
+        bins: (number of x bins, number of y bins)
+        chunk_size: Points processed at once; only this many are in memory for a np.memmap
+
+    Returns:
+        The filled DensityGrid
+    """
+    x, y = np.asarray(x), np.asarray(y)
+    hue = None if hue is None else _as_categories(hue)
+    if x_range is None:
+        x_range = (np.nanmin(x), np.nanmax(x))
+    if y_range is None:
+        y_range = (np.nanmin(y), np.nanmax(y))
+    grid = DensityGrid(x_range, y_range, bins)
+    for start in range(0, len(x), chunk_size):
+        stop = start + chunk_size
+        grid.update(x[start:stop], y[start:stop], None if hue is None else hue[start:stop])
+    return grid
+
+
+def plot_density(ax, grid: DensityGrid, cmap: str = 'viridis', palette=None, colorbar: bool = True):
+    """
+    Draws a DensityGrid with imshow() and a logarithmic color scale.
+
+    Args:
+        ax: Matplotlib axes
+        grid: The counts to draw
+        cmap: Colormap without hue
+        palette: Colors of the hue categories (default: matplotlib's color cycle)
+        colorbar: Add a colorbar for the counts (without hue)
+
+    Returns:
+        List of the AxesImage objects (one per layer)
+    """
+    options = dict(origin='lower', extent=grid.extent, aspect='auto', interpolation='nearest')
+    if list(grid.counts) == [None]:
+        counts = np.ma.masked_equal(grid.counts[None], 0)  # empty pixels stay transparent
+        image = ax.imshow(counts, cmap=cmap, norm=LogNorm(vmin=1, vmax=max(1, counts.max())), **options)
+        if colorbar:
+            ax.figure.colorbar(image, ax=ax, label='Points per pixel')
+        return [image]
+
+    # One colored layer per category; the opacity of a pixel grows with log(count).
+    palette = palette or matplotlib.rcParams['axes.prop_cycle'].by_key()['color']
+    top = np.log1p(max(counts.max() for counts in grid.counts.values()))
+    images, handles = [], []
+    for position, (category, counts) in enumerate(grid.counts.items()):
+        color = to_rgb(palette[position % len(palette)])
+        layer = np.zeros(counts.shape + (4,))
+        layer[..., :3] = color
+        layer[..., 3] = np.where(counts > 0, 0.25 + 0.75 * np.log1p(counts) / top, 0)
+        images.append(ax.imshow(layer, **options))
+        handles.append(Patch(color=color, label=str(category)))
+    ax.legend(handles=handles)
+    return images
+
+
+def density_scatter(ax, x, y, hue=None, x_range=None, y_range=None, bins=None, chunk_size: int = CHUNK_SIZE,
+                    **kwargs):
+    """
+    Drop-in replacement for ax.scatter(x, y) for millions of points.
+
+    Args:
+        ax: Matplotlib axes
+        x, y: Coordinates (arrays or np.memmap files)
+        hue: Optional categories, one colored layer each
+        x_range, y_range: Axis ranges (default: the data's min and max)
+        bins: (x bins, y bins); default one bin per pixel of the axes
+        chunk_size: Points processed at once
+        **kwargs: Passed on to plot_density (cmap, palette, colorbar)
+
+    Returns:
+        The DensityGrid that was drawn
+    """
+    grid = density_grid(x, y, hue, x_range, y_range, bins or _axes_bins(ax), chunk_size)
+    plot_density(ax, grid, **kwargs)
+    return grid
+
+
+if __name__ == "__main__":
+    # The demo renders off-screen; importing the module leaves the caller's backend alone.
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    def clusters(n_points: int, seed: int):
+        """Three overlapping 2D clusters with a species-like category."""
+        rng = np.random.default_rng(seed)
+        codes = rng.choice(3, n_points, p=[0.5, 0.3, 0.2])
+        species = pd.Categorical.from_codes(codes, categories=['setosa', 'versicolor', 'virginica'])
+        center = np.array([(5.0, 3.4), (5.9, 2.8), (6.6, 3.0)])
+        x = center[codes, 0] + rng.normal(0, 0.35, n_points)
+        y = center[codes, 1] + rng.normal(0, 0.3, n_points)
+        return x, y, species
+
+    def render(draw) -> float:
+        fig, ax = plt.subplots(figsize=(8, 6), dpi=100)
+        ax.set(xlabel='sepal_length', ylabel='sepal_width')
+        start_time = time.time()
+        draw(ax)
+        fig.canvas.draw()
+        elapsed = time.time() - start_time
+        plt.close(fig)
+        return elapsed
+
+    # --- Example 1: Same counts as np.histogram2d ---
+    print("--- Example 1: bincount grid vs np.histogram2d ---")
+    x, y, species = clusters(1_000_000, seed=1)
+    grid = density_grid(x, y, x_range=(3, 9), y_range=(1, 5), bins=(300, 200), chunk_size=300_000)
+    expected, _, _ = np.histogram2d(x, y, bins=(300, 200), range=((3, 9), (1, 5)))
+    assert np.array_equal(grid.total, expected.T)
+    start_time = time.time()
+    np.histogram2d(x, y, bins=(300, 200), range=((3, 9), (1, 5)))
+    histogram_time = time.time() - start_time
+    start_time = time.time()
+    density_grid(x, y, x_range=(3, 9), y_range=(1, 5), bins=(300, 200))
+    print(f"Counts equal np.histogram2d: True | histogram2d {histogram_time:.3f}s | "
+          f"bincount {time.time() - start_time:.3f}s")
+    hue_grid = density_grid(x, y, species, x_range=(3, 9), y_range=(1, 5), bins=(300, 200))
+    print({category: int(counts.sum()) for category, counts in hue_grid.counts.items()})
+    print("-" * 60)
+
+    # --- Example 2: Render time, scatter vs density ---
+    print("--- Example 2: Render time, ax.scatter vs density_scatter ---")
+    for n_points in (100_000, 1_000_000, 10_000_000):
+        x, y, species = clusters(n_points, seed=2)
+        density_time = render(lambda ax: density_scatter(ax, x, y))
+        hue_time = render(lambda ax: density_scatter(ax, x, y, hue=species))
+        line = f"{n_points:>11,} points: density {density_time:.2f}s | density with hue {hue_time:.2f}s"
+        scatter_time = render(lambda ax: ax.scatter(x, y, alpha=0.5, marker='o'))
+        print(line + f" | scatter {scatter_time:.2f}s")
+    print("(100M points only with density, see Example 3: scatter needs all points in memory at once)")
+    print("-" * 60)
+
+    # --- Example 3: 100 million points, out of core ---
+    print("--- Example 3: 100,000,000 points in chunks of 5,000,000 ---")
+    grid = DensityGrid((2, 10), (0, 6), bins=(800, 600))
+    start_time = time.time()
+    for seed in range(20):
+        # Each chunk could just as well come from a file; only one chunk is in memory at a time.
+        x, y, species = clusters(CHUNK_SIZE, seed=100 + seed)
+        grid.update(x, y, species)
+    count_time = time.time() - start_time
+    fig, ax = plt.subplots(figsize=(8, 6), dpi=100)
+    ax.set(title='100M points with hue', xlabel='sepal_length', ylabel='sepal_width')
+    start_time = time.time()
+    plot_density(ax, grid)
+    fig.canvas.draw()
+    print(f"{grid.n_points:,} points counted in {count_time:.1f}s (incl. generating them), "
+          f"drawn in {time.time() - start_time:.2f}s")
+    plt.close(fig)
@@ -0,0 +1,233 @@
+# DOWNSAMPLING HUGE SERIES BEFORE LINE PLOTS
+# ==========================================
+# matplotlib_basics.py plots a sine wave of 100 points. Fed 50 million samples, plt.plot()
+# would build a path with 50 million vertices, although the axes are only ~1000 pixels wide:
+# almost every vertex lands on a pixel column that is already drawn.
+#
+# Two vectorized NumPy downsamplers reduce a series to a few points per pixel column:
+# - MIN/MAX ENVELOPE: the series is cut into equal bins (one per pixel column) and the
+#   minimum and the maximum of every bin are kept. The drawn line covers exactly the same
+#   vertical range in every column, so every peak and dip stays visible.
+# - LTTB (Largest-Triangle-Three-Buckets, Steinarsson 2013): one point per bucket, the one
+#   that forms the largest triangle with the point chosen in the previous bucket and the
+#   average of the next bucket. It keeps the visual shape with far fewer points.
+#   For long inputs a min/max envelope first preselects a few candidates per bucket
+#   (MinMaxLTTB), so the sequential LTTB step only sees a small, fixed number of points.
+#
+# plot_line(ax, x, y) applies this automatically when a series has more points than the
+# axes have pixels, so the render time stays roughly constant for any input length.
+
+import time
+
+import numpy as np
+
+# Points kept per horizontal pixel of the axes before downsampling kicks in.
+POINTS_PER_PIXEL = 2
+# Candidates per LTTB bucket that the min/max preselection keeps for long inputs.
+PRESELECT_RATIO = 4
+
+
+def _bin_edges(n: int, n_bins: int) -> np.ndarray:
+    return np.linspace(0, n, n_bins + 1).astype(np.int64)
+
+
+def minmax_indices(y: np.ndarray, n_bins: int) -> np.ndarray:
+    """
+    Indices of the minimum and maximum of every bin, in index order.
+
+    Args:
+        y: Values (NaN values are ignored)
+        n_bins: Number of equal-count bins
+
+    Returns:
+        Sorted array of at most 2 * n_bins indices, always including the first and last index
+    """
+    n = len(y)
+    if n <= 2 * n_bins:
+        return np.arange(n)
+    bin_size = n // n_bins
+    # Reshape the full bins into rows for a single vectorized argmin/argmax; the rest is one extra bin.
+    body = y[:bin_size * n_bins].reshape(n_bins, bin_size)
+    offsets = np.arange(n_bins) * bin_size
+    if np.isnan(body).any():
+        lows = np.where(np.isnan(body), np.inf, body).argmin(axis=1) + offsets
+        highs = np.where(np.isnan(body), -np.inf, body).argmax(axis=1) + offsets
+    else:
+        lows = body.argmin(axis=1) + offsets
+        highs = body.argmax(axis=1) + offsets
+    indices = [lows, highs, [0, n - 1]]
+    tail = y[bin_size * n_bins:]
+    if len(tail) and not np.isnan(tail).all():
+        start = bin_size * n_bins
+        indices.append([start + np.nanargmin(tail), start + np.nanargmax(tail)])
+    return np.unique(np.concatenate(indices))
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indices chosen by Largest-Triangle-Three-Buckets.
+
+    Args:
+        x: Increasing x values
+        y: Values (NaN and infinite values are skipped)
+        n_out: Number of points to keep (>= 3)
+
+    Returns:
+        Sorted array of n_out indices, including the first and the last finite point
+    """
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    finite = np.isfinite(y)
+    if not finite.all():
+        # A NaN would win every argmax and spoil the bucket means: LTTB runs on the finite points.
+        kept = np.flatnonzero(finite)
+        return kept[lttb_indices(x[kept], y[kept], n_out)]
+    # The first and last points are fixed; the rest is split into n_out - 2 buckets.
+    edges = 1 + _bin_edges(n - 2, n_out - 2)
+    # Averages of all buckets at once (the "third point" of each triangle).
+    mean_x = np.add.reduceat(x[:-1], edges[:-1]) / np.diff(edges)
+    mean_y = np.add.reduceat(y[:-1], edges[:-1]) / np.diff(edges)
+    mean_x = np.r_[mean_x[1:], x[-1]]
+    mean_y = np.r_[mean_y[1:], y[-1]]
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        ax, ay = x[previous], y[previous]
+        # Twice the triangle area for every candidate of the bucket, vectorized.
+        area = np.abs((ax - mean_x[bucket]) * (y[start:stop] - ay) - (ax - x[start:stop]) * (mean_y[bucket] - ay))
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def downsample(x, y, n_out: int, method: str = 'lttb'):
+    """
+    Reduces a series to about n_out points for plotting.
+
+    Args:
+        x: Increasing x values
+        y: Values (NaN and infinite values are left out)
+        n_out: Target number of points
+        method: 'lttb' (shape-preserving, global minimum and maximum always kept)
+                or 'minmax' (exact min/max envelope, n_out / 2 bins)
+
+    Returns:
+        Tuple (x, y) of the kept points
+    """
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=np.float64)
+    if method == 'minmax':
+        keep = minmax_indices(y, max(1, n_out // 2))
+    elif method == 'lttb':
+        candidates = np.arange(len(y))
+        if len(y) > PRESELECT_RATIO * n_out:
+            # MinMaxLTTB: a vectorized envelope keeps the extremes of small bins as candidates.
+            candidates = minmax_indices(y, PRESELECT_RATIO * n_out // 2)
+        keep = candidates[lttb_indices(x[candidates], y[candidates], n_out)]
+        if not len(keep):
+            return x[keep], y[keep]
+        # The overall extremes are always drawn (they are among the candidates).
+        keep = np.unique(np.r_[keep, candidates[np.nanargmin(y[candidates])], candidates[np.nanargmax(y[candidates])]])
+    else:
+        raise ValueError(f"method must be 'lttb' or 'minmax', got {method!r}")
+    # The fixed first and last index, or a bin without any value, may point at a NaN.
+    keep = keep[np.isfinite(y[keep])]
+    return x[keep], y[keep]
+
+
+def pixel_budget(ax) -> int:
+    """Number of points worth drawing on these axes: POINTS_PER_PIXEL per horizontal pixel."""
+    width = ax.get_window_extent().width
+    return max(3, int(width * POINTS_PER_PIXEL))
+
+
+def plot_line(ax, x, y, method: str = 'lttb', **kwargs):
+    """
+    ax.plot(x, y, **kwargs), downsampled first if the series has more points than pixels.
+
+    Args:
+        ax: Matplotlib axes
+        x: Increasing x values
+        y: Values
+        method: 'lttb' or 'minmax', see downsample()
+
+    Returns:
+        The list of Line2D objects returned by ax.plot
+    """
+    budget = pixel_budget(ax)
+    if len(y) > budget:
+        x, y = downsample(x, y, budget, method)
+    return ax.plot(x, y, **kwargs)
+
+
+if __name__ == "__main__":
+    import matplotlib
+
+    # The demo renders off-screen; importing the module leaves the caller's backend alone.
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    def sine_figure(n_samples: int, use_downsampling: bool, method: str = 'lttb'):
+        """The sine plot of matplotlib_basics.py with noise, rendered to an RGB array."""
+        rng = np.random.default_rng(0)
+        x = np.linspace(0, 10, n_samples)
+        y = np.sin(x) + rng.normal(0, 0.05, n_samples)
+        y[n_samples // 3] = 2.5  # a single spike that must stay visible
+        fig, ax = plt.subplots(figsize=(10, 5), dpi=100)
+        ax.set(title='Basic Sine Wave Plot', xlabel='X-axis', ylabel='Y-axis', xlim=(0, 10), ylim=(-1.5, 3))
+        ax.grid(True)
+        start_time = time.time()
+        if use_downsampling:
+            plot_line(ax, x, y, method=method, label='Sine Wave', linewidth=0.8)
+        else:
+            ax.plot(x, y, label='Sine Wave', linewidth=0.8)
+        ax.legend()
+        fig.canvas.draw()
+        elapsed = time.time() - start_time
+        image = np.asarray(fig.canvas.buffer_rgba())[..., :3].copy()
+        plt.close(fig)
+        return elapsed, image
+
+    # --- Example 1: What the downsamplers keep ---
+    print("--- Example 1: 1,000,000 samples reduced to the pixel budget ---")
+    x = np.linspace(0, 10, 1_000_000)
+    y = np.sin(x) + np.random.default_rng(1).normal(0, 0.05, len(x))
+    for method in ('lttb', 'minmax'):
+        small_x, small_y = downsample(x, y, 1550, method)
+        print(f"{method:>6}: {len(small_x)} points, min {small_y.min():.3f} (true {y.min():.3f}), "
+              f"max {small_y.max():.3f} (true {y.max():.3f})")
+    # Gaps in the data (every 7th sample missing) are skipped, not drawn as NaN points.
+    gappy = y.copy()
+    gappy[::7] = np.nan
+    for method in ('lttb', 'minmax'):
+        small_x, small_y = downsample(x, gappy, 1550, method)
+        assert np.isfinite(small_y).all()
+        print(f"{method:>6} with NaN gaps: {len(small_x)} points, none of them NaN, "
+              f"max {small_y.max():.3f} (true {np.nanmax(gappy):.3f})")
+    print("-" * 60)
+
+    # --- Example 2: Same picture, a fraction of the time ---
+    print("--- Example 2: Full plot vs downsampled plot (1,000,000 samples) ---")
+    full_time, full_image = sine_figure(1_000_000, use_downsampling=False)
+    for method in ('lttb', 'minmax'):
+        small_time, small_image = sine_figure(1_000_000, use_downsampling=True, method=method)
+        differing = np.any(full_image != small_image, axis=2).mean()
+        print(f"{method:>6}: full {full_time:.2f}s | downsampled {small_time:.3f}s | "
+              f"{differing:.2%} of the pixels differ")
+    print("-" * 60)
+
+    # --- Example 3: Render time for growing inputs ---
+    print("--- Example 3: Render time vs input length ---")
+    for n_samples in (100_000, 1_000_000, 10_000_000, 50_000_000):
+        small_time, _ = sine_figure(n_samples, use_downsampling=True)
+        line = f"{n_samples:>11,} samples: downsampled {small_time:.3f}s"
+        if n_samples <= 10_000_000:
+            full_time, _ = sine_figure(n_samples, use_downsampling=False)
+            line += f" | full {full_time:.2f}s"
+        print(line)
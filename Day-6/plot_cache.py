@@ -0,0 +1,300 @@
+# CONTENT-ADDRESSED CACHE FOR RENDERED PLOTS
+# ==========================================
+# The Day-6 figures are drawn again on every run, even when neither the data nor the plot
+# settings changed. Drawing is the expensive part: importing matplotlib/seaborn alone
+# takes about a second, and every figure costs tens to hundreds of milliseconds more.
+#
+# PlotCache stores every rendered image under a key that describes everything the picture
+# depends on:
+# - the renderer ('batch_render:boxplot') and the contents of the file it is defined in
+# - the plot parameters; arrays, Series and DataFrames are hashed by their contents, and a
+#   path to an existing data file by the bytes of that file
+# - the output format and dpi
+# - the installed versions of matplotlib, seaborn, numpy and pandas (read from the package
+#   metadata, without importing the libraries)
+# Same key = same picture, so a cache hit simply returns the stored file. matplotlib is
+# only imported when a figure really has to be drawn.
+#
+# The cache has a size limit. Every hit refreshes the file's modification time; when the
+# limit is exceeded, the least recently used files are deleted first (LRU).
+
+import hashlib
+import importlib
+import importlib.metadata
+import importlib.util
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+LIBRARIES = ('matplotlib', 'seaborn', 'numpy', 'pandas')
+
+
+def library_versions() -> dict:
+    """Installed versions of the plotting stack, from the package metadata (nothing is imported)."""
+    versions = {}
+    for name in LIBRARIES:
+        try:
+            versions[name] = importlib.metadata.version(name)
+        except importlib.metadata.PackageNotFoundError:
+            versions[name] = None
+    return versions
+
+
+def _hash_value(value, digest):
+    """Feeds a canonical byte representation of value into digest."""
+    if isinstance(value, pd.DataFrame):
+        digest.update(b'DataFrame')
+        _hash_value([list(map(str, value.columns)), [str(dtype) for dtype in value.dtypes]], digest)
+        digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, (pd.Series, pd.Index)):
+        digest.update(type(value).__name__.encode())
+        _hash_value([str(value.name), str(value.dtype)], digest)
+        digest.update(pd.util.hash_pandas_object(value).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        digest.update(f'ndarray{value.dtype.str}{value.shape}'.encode())
+        digest.update(np.ascontiguousarray(value).view(np.uint8).data if value.dtype != object
+                      else pd.util.hash_array(value.ravel()).tobytes())
+    elif isinstance(value, dict):
+        digest.update(b'{')
+        for key in sorted(value, key=str):
+            _hash_value(str(key), digest)
+            _hash_value(value[key], digest)
+        digest.update(b'}')
+    elif isinstance(value, (list, tuple)):
+        digest.update(b'[')
+        for item in value:
+            _hash_value(item, digest)
+        digest.update(b']')
+    elif isinstance(value, str) and os.path.isfile(value):
+        # A data file is identified by its contents, not by its name.
+        digest.update(b'file')
+        with open(value, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    else:
+        # Scalars: numbers, strings, booleans, None.
+        digest.update(json.dumps(value.item() if isinstance(value, np.generic) else value, default=str).encode())
+
+
+def _renderer_source(renderer: str) -> bytes:
+    """Bytes of the file that defines the renderer, found without importing it."""
+    spec = importlib.util.find_spec(renderer.split(':')[0])
+    if spec is None or spec.origin is None:
+        raise ImportError(f"Cannot find the module of renderer {renderer!r}")
+    with open(spec.origin, 'rb') as f:
+        return f.read()
+
+
+class PlotCache:
+    """
+    Disk cache of rendered figures, keyed by the content of everything they depend on.
+
+    Args:
+        root: Cache folder (created if needed)
+        max_bytes: Total size of the stored images; older files are evicted above it
+    """
+
+    def __init__(self, root: str, max_bytes: int = 200 * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(root, exist_ok=True)
+        self._versions = library_versions()
+        self._sources = {}
+        self._sizes = {entry.path: entry.stat().st_size for entry in self._entries()}
+
+    def _entries(self):
+        for folder in os.scandir(self.root):
+            if folder.is_dir():
+                # Images being written by another process (.tmp) are not part of the cache yet.
+                yield from (entry for entry in os.scandir(folder.path)
+                            if entry.is_file() and not entry.name.endswith('.tmp'))
+
+    def key(self, renderer: str, params: dict = None, fmt: str = 'png', dpi: int = 100) -> str:
+        """
+        The cache key of a figure.
+
+        Args:
+            renderer: 'module:function' that returns a matplotlib Figure, e.g. 'batch_render:sine_wave'
+            params: Keyword arguments of the renderer
+            fmt: Image format ('png', 'svg', ...)
+            dpi: Resolution
+
+        Returns:
+            Hexadecimal SHA-256 digest
+        """
+        if renderer not in self._sources:
+            self._sources[renderer] = hashlib.sha256(_renderer_source(renderer)).hexdigest()
+        digest = hashlib.sha256()
+        _hash_value({'renderer': renderer, 'source': self._sources[renderer], 'params': params or {},
+                     'format': fmt, 'dpi': dpi, 'versions': self._versions}, digest)
+        return digest.hexdigest()
+
+    def _path(self, key: str, fmt: str) -> str:
+        return os.path.join(self.root, key[:2], f'{key}.{fmt}')
+
+    def get(self, key: str, fmt: str = 'png'):
+        """Path of the stored image, or None. A hit marks the file as recently used."""
+        path = self._path(key, fmt)
+        try:
+            os.utime(path)  # the modification time is the "last used" time of the LRU order
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key: str, fmt: str, write) -> str:
+        """
+        Stores a new image and evicts the least recently used ones if the cache is too big.
+
+        Args:
+            key: Cache key
+            fmt: Image format
+            write: Function(path) that writes the image to path
+
+        Returns:
+            Path of the stored image
+        """
+        path = self._path(key, fmt)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary name first: a reader never sees a half-written image.
+        handle, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix=f'.{fmt}.tmp')
+        os.close(handle)
+        try:
+            write(temporary)
+            os.replace(temporary, path)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+        self._sizes[path] = os.path.getsize(path)
+        self._evict(keep=path)
+        return path
+
+    def _evict(self, keep: str):
+        if sum(self._sizes.values()) <= self.max_bytes:
+            return
+        entries = sorted(self._entries(), key=lambda entry: entry.stat().st_mtime_ns)
+        for entry in entries:
+            if sum(self._sizes.values()) <= self.max_bytes:
+                break
+            if entry.path != keep:
+                os.remove(entry.path)
+                self._sizes.pop(entry.path, None)
+
+    def render(self, renderer: str, params: dict = None, fmt: str = 'png', dpi: int = 100) -> str:
+        """
+        Returns the image of a figure, drawing it only if it is not in the cache yet.
+
+        Args:
+            renderer: 'module:function' that returns a matplotlib Figure
+            params: Keyword arguments of the renderer
+            fmt: Image format
+            dpi: Resolution
+
+        Returns:
+            Path of the image file in the cache
+        """
+        key = self.key(renderer, params, fmt, dpi)
+        path = self.get(key, fmt)
+        if path is not None:
+            self.hits += 1
+            return path
+        self.misses += 1
+
+        def write(target):
+            # Only a miss imports matplotlib and the renderer's module.
+            import matplotlib
+            matplotlib.use('Agg')
+            import matplotlib.pyplot as plt
+            module, function = renderer.split(':')
+            fig = getattr(importlib.import_module(module), function)(**(params or {}))
+            try:
+                fig.savefig(target, format=fmt, dpi=dpi, bbox_inches='tight')
+            finally:
+                plt.close(fig)
+
+        return self.put(key, fmt, write)
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(self._sizes.values())
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+
+if __name__ == "__main__":
+    here = os.path.dirname(os.path.abspath(__file__))
+    workdir = tempfile.mkdtemp(prefix='plot_cache_')
+    rng = np.random.default_rng(3)
+    iris = pd.DataFrame({'sepal_length': rng.normal(5.8, 0.8, 150).round(1),
+                         'sepal_width': rng.normal(3.0, 0.4, 150).round(1),
+                         'species': np.repeat(['setosa', 'versicolor', 'virginica'], 50)})
+
+    # --- Example 1: A hit does not import matplotlib ---
+    print("--- Example 1: Miss, then hit in a fresh process ---")
+    cache = PlotCache(os.path.join(workdir, 'cache'))
+    params = {'data': iris, 'x': 'species', 'y': 'sepal_length', 'title': 'Box Plot of Sepal Length by Species'}
+    start_time = time.time()
+    path = cache.render('batch_render:boxplot', params)
+    print(f"Miss: drawn in {time.time() - start_time:.2f}s -> {os.path.relpath(path, workdir)}")
+    start_time = time.time()
+    assert cache.render('batch_render:boxplot', params) == path
+    print(f"Hit in the same process: {(time.time() - start_time) * 1000:.1f} ms")
+
+    iris_path = os.path.join(workdir, 'iris.pkl')
+    iris.to_pickle(iris_path)
+    script = f"""
+import sys, time
+start_time = time.time()
+import pandas as pd
+from plot_cache import PlotCache
+cache = PlotCache({os.path.join(workdir, 'cache')!r})
+params = {{'data': pd.read_pickle({iris_path!r}), 'x': 'species', 'y': 'sepal_length',
+           'title': 'Box Plot of Sepal Length by Species'}}
+path = cache.render('batch_render:boxplot', params)
+print(f"Hit in a new process: {{time.time() - start_time:.2f}}s including imports, hits={{cache.hits}}, "
+      f"matplotlib imported: {{'matplotlib' in sys.modules}}")
+"""
+    print(subprocess.run([sys.executable, '-c', script], cwd=here, capture_output=True, text=True).stdout.strip())
+    print("-" * 60)
+
+    # --- Example 2: What changes the key ---
+    print("--- Example 2: Changed data or parameters are new keys ---")
+    changed = iris.copy()
+    changed.loc[0, 'sepal_length'] += 0.1
+    for label, renderer, p in [('same data, new DataFrame object', 'batch_render:boxplot', dict(params, data=iris.copy())),
+                               ('one value changed', 'batch_render:boxplot', dict(params, data=changed)),
+                               ('other title', 'batch_render:boxplot', dict(params, title='Sepal Length')),
+                               ('other renderer', 'batch_render:histplot',
+                                {'data': iris, 'x': 'sepal_length', 'title': 'Histogram of Sepal Length'})]:
+        before = cache.misses
+        cache.render(renderer, p)
+        print(f"{label:<32} -> {'miss (drawn)' if cache.misses > before else 'hit'}")
+    big = pd.DataFrame({'x': rng.standard_normal(10_000_000), 'y': rng.standard_normal(10_000_000)})
+    start_time = time.time()
+    cache.key('batch_render:scatterplot', {'data': big, 'x': 'x', 'y': 'y'})
+    print(f"Hashing a 10M-row DataFrame for the key: {time.time() - start_time:.2f}s")
+    print("-" * 60)
+
+    # --- Example 3: LRU eviction by disk size ---
+    print("--- Example 3: 40 figures in a 1 MB cache ---")
+    small = PlotCache(os.path.join(workdir, 'small'), max_bytes=1024 * 1024)
+    favourite = {'n_points': 100, 'title': 'Series 0'}
+    for i in range(40):
+        small.render('batch_render:sine_wave', {'n_points': 100, 'title': f'Series {i}'})
+        small.render('batch_render:sine_wave', favourite)  # used all the time: stays in the cache
+    print(f"Stored: {len(small)} figures, {small.size_bytes / 1024:.0f} KB (limit 1024 KB), "
+          f"misses {small.misses}, hits {small.hits}")
+    newest = small.get(small.key('batch_render:sine_wave', {'n_points': 100, 'title': 'Series 39'}))
+    oldest = small.get(small.key('batch_render:sine_wave', {'n_points': 100, 'title': 'Series 1'}))
+    print(f"Favourite kept: {small.get(small.key('batch_render:sine_wave', favourite)) is not None}, "
+          f"newest kept: {newest is not None}, oldest evicted: {oldest is None}")
+    shutil.rmtree(workdir)
@@ -3,8 +3,10 @@ import seaborn as sns
 import pandas as pd
 import matplotlib.pyplot as plt
 
-# Load the Iris dataset from seaborn's built-in datasets.
-df_iris = sns.load_dataset('iris')
+from dataset_registry import load_dataset
+
+# Load the Iris dataset (same data as sns.load_dataset('iris'), served from a local copy when offline).
+df_iris = load_dataset('iris')
 # Print the first 5 rows to inspect the data.
 print("First 5 rows of the Iris dataset:")
 print(df_iris.head())
@@ -0,0 +1,290 @@
+# STREAMING CORRELATION MATRIX
+# ============================
+# seaborn_analysis.py computes df_iris.corr(numeric_only=True) for the heatmap from the raw
+# rows, every time. For a table that arrives in chunks, is split across workers, or has
+# thousands of columns, that means keeping everything in memory and starting over.
+#
+# A correlation matrix only needs a few running totals:
+#   n          number of rows
+#   s          column sums                        s_i  = sum(x_i)
+#   P          cross-product matrix               P_ij = sum(x_i * x_j)
+# from which  cov_ij = (P_ij - s_i * s_j / n) / (n - 1)  and  corr_ij = cov_ij / sqrt(cov_ii * cov_jj).
+#
+# - update(chunk) adds a chunk with one matrix product X^T X (a BLAS call, fast on any size)
+# - the values are shifted by a per-column constant (the mean of the first chunk) before
+#   they are added up. Without the shift, P_ij - s_i * s_j / n subtracts two huge, almost
+#   equal numbers for data far from zero and loses most of its digits.
+# - merge(other) adds the totals of another accumulator (another chunk of rows, another worker)
+# - for thousands of columns, X^T X is computed block by block, so only one block of
+#   columns is converted and shifted at a time
+# - missing values: DataFrame.corr uses, for every pair of columns, only the rows where both
+#   are present. Once a NaN is seen, the accumulator keeps pairwise counts, sums and sums of
+#   squares as well (four matrix products per block instead of one).
+#
+# corr() matches DataFrame.corr(numeric_only=True), cov() matches DataFrame.cov(numeric_only=True).
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+class CorrelationAccumulator:
+    """
+    Mergeable running totals for covariance and Pearson correlation matrices.
+
+    Args:
+        block_size: Number of columns per block of the cross-product computation
+    """
+
+    def __init__(self, block_size: int = 512):
+        self.block_size = block_size
+        self.columns = None
+        self.shift = None
+        self.n = 0
+        self.sums = None        # s: column sums of the shifted values
+        self.products = None    # P: cross products of the shifted values
+        # Pairwise totals, only after the first NaN: rows where both columns i and j are present.
+        self.pair_counts = None  # N_ij
+        self.pair_sums = None    # S_ij = sum of x_i over those rows
+        self.pair_squares = None  # Q_ij = sum of x_i^2 over those rows
+
+    @property
+    def pairwise(self) -> bool:
+        return self.pair_counts is not None
+
+    def _blocks(self):
+        k = len(self.columns)
+        return [slice(start, min(start + self.block_size, k)) for start in range(0, k, self.block_size)]
+
+    def _start(self, columns, values: np.ndarray):
+        self.columns = pd.Index(columns)
+        with np.errstate(invalid='ignore'):
+            # Any constant works as the shift; one close to the data keeps the sums small.
+            self.shift = np.nan_to_num(np.nanmean(values, axis=0) if len(values) else np.zeros(len(columns)))
+        k = len(columns)
+        self.sums = np.zeros(k)
+        self.products = np.zeros((k, k))
+
+    def _make_pairwise(self):
+        """Switches to pairwise totals: so far every pair had all n rows."""
+        k = len(self.columns)
+        self.pair_counts = np.full((k, k), float(self.n))
+        self.pair_sums = np.repeat(self.sums[:, None], k, axis=1)
+        self.pair_squares = np.repeat(np.diag(self.products)[:, None], k, axis=1)
+
+    def update(self, chunk) -> 'CorrelationAccumulator':
+        """
+        Adds a chunk of rows.
+
+        Args:
+            chunk: DataFrame (numeric and boolean columns are used, like numeric_only=True)
+                   or 2D NumPy array
+
+        Returns:
+            self
+        """
+        if isinstance(chunk, pd.DataFrame):
+            numeric = chunk.select_dtypes(include=['number', 'bool'])
+            if self.columns is not None:
+                numeric = numeric.reindex(columns=self.columns)
+            columns, values = numeric.columns, numeric.to_numpy(dtype=np.float64)
+        else:
+            values = np.asarray(chunk, dtype=np.float64)
+            columns = self.columns if self.columns is not None else pd.RangeIndex(values.shape[1])
+        if self.columns is None:
+            self._start(columns, values)
+        if not len(values):
+            return self
+
+        missing = np.isnan(values)
+        if missing.any() and not self.pairwise:
+            self._make_pairwise()
+        blocks = self._blocks()
+        shifted = [values[:, block] - self.shift[block] for block in blocks]
+        if not self.pairwise:
+            for i, block_i in enumerate(blocks):
+                self.sums[block_i] += shifted[i].sum(axis=0)
+                for j in range(i, len(blocks)):
+                    product = shifted[i].T @ shifted[j]
+                    self.products[block_i, blocks[j]] += product
+                    if j != i:
+                        self.products[blocks[j], block_i] += product.T
+        else:
+            present = [(~missing[:, block]).astype(np.float64) for block in blocks]
+            shifted = [np.where(missing[:, block], 0.0, x) for block, x in zip(blocks, shifted)]
+            for i, block_i in enumerate(blocks):
+                self.sums[block_i] += shifted[i].sum(axis=0)
+                for j, block_j in enumerate(blocks):
+                    # Zeros in place of NaN: a row only adds to pair (i, j) if both values are present.
+                    self.products[block_i, block_j] += shifted[i].T @ shifted[j]
+                    self.pair_counts[block_i, block_j] += present[i].T @ present[j]
+                    self.pair_sums[block_i, block_j] += shifted[i].T @ present[j]
+                    self.pair_squares[block_i, block_j] += (shifted[i] ** 2).T @ present[j]
+        self.n += len(values)
+        return self
+
+    def _reshifted(self, shift: np.ndarray) -> dict:
+        """The totals expressed for another shift (x - shift instead of x - self.shift)."""
+        d = self.shift - shift
+        totals = {'sums': self.sums + self.n * d}
+        if not self.pairwise:
+            totals['products'] = (self.products + np.outer(d, self.sums) + np.outer(self.sums, d)
+                                  + self.n * np.outer(d, d))
+            return totals
+        counts, sums = self.pair_counts, self.pair_sums
+        totals['products'] = self.products + sums * d[None, :] + sums.T * d[:, None] + counts * np.outer(d, d)
+        totals['pair_counts'] = counts
+        totals['pair_sums'] = sums + counts * d[:, None]
+        totals['pair_squares'] = self.pair_squares + 2 * d[:, None] * sums + counts * (d ** 2)[:, None]
+        return totals
+
+    def merge(self, other: 'CorrelationAccumulator') -> 'CorrelationAccumulator':
+        """
+        Adds the totals of another accumulator with the same columns (e.g. from another worker).
+
+        Returns:
+            self
+        """
+        if other.columns is None:
+            return self
+        if self.columns is None:
+            self._start(other.columns, np.zeros((0, len(other.columns))))
+            self.shift = other.shift.copy()
+        if not self.columns.equals(other.columns):
+            raise ValueError("Only accumulators with the same columns can be merged.")
+        if other.pairwise and not self.pairwise:
+            self._make_pairwise()
+        totals = other._reshifted(self.shift)
+        if self.pairwise and not other.pairwise:
+            k = len(self.columns)
+            totals['pair_counts'] = np.full((k, k), float(other.n))
+            totals['pair_sums'] = np.repeat(totals['sums'][:, None], k, axis=1)
+            totals['pair_squares'] = np.repeat(np.diag(totals['products'])[:, None], k, axis=1)
+        self.sums += totals['sums']
+        self.products += totals['products']
+        if self.pairwise:
+            self.pair_counts += totals['pair_counts']
+            self.pair_sums += totals['pair_sums']
+            self.pair_squares += totals['pair_squares']
+        self.n += other.n
+        return self
+
+    def _pair_statistics(self):
+        """Pairwise counts, co-moment sums and the sums of squared deviations of both columns."""
+        if not self.pairwise:
+            counts = np.full(self.products.shape, float(self.n))
+            comoments = self.products - np.outer(self.sums, self.sums) / max(self.n, 1)
+            diagonal = np.diag(comoments)
+            return counts, comoments, diagonal[:, None], diagonal[None, :]
+        counts, sums = self.pair_counts, self.pair_sums
+        with np.errstate(divide='ignore', invalid='ignore'):
+            comoments = self.products - sums * sums.T / counts
+            squares_i = self.pair_squares - sums ** 2 / counts
+        return counts, comoments, squares_i, squares_i.T
+
+    def cov(self, ddof: int = 1, min_periods: int = None) -> pd.DataFrame:
+        """Covariance matrix, like DataFrame.cov(numeric_only=True)."""
+        counts, comoments, _, _ = self._pair_statistics()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result = comoments / (counts - ddof)
+        result[counts < max(min_periods or 1, ddof + 1)] = np.nan
+        return pd.DataFrame(result, index=self.columns, columns=self.columns)
+
+    def corr(self, min_periods: int = 1) -> pd.DataFrame:
+        """Pearson correlation matrix, like DataFrame.corr(numeric_only=True)."""
+        counts, comoments, squares_i, squares_j = self._pair_statistics()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result = np.clip(comoments / np.sqrt(squares_i * squares_j), -1.0, 1.0)
+        result[counts < max(min_periods, 2)] = np.nan
+        return pd.DataFrame(result, index=self.columns, columns=self.columns)
+
+
+def _accumulate_part(task):
+    """Worker: generates (or would read) one part of the rows and returns its totals."""
+    seed, n_rows, n_columns = task
+    accumulator = CorrelationAccumulator()
+    for chunk_seed in range(4):
+        accumulator.update(wide_table(n_rows // 4, n_columns, seed * 100 + chunk_seed))
+    return accumulator
+
+
+def wide_table(n_rows: int, n_columns: int, seed: int) -> pd.DataFrame:
+    """Random correlated columns: a few hidden factors plus noise, far away from zero."""
+    rng = np.random.default_rng(seed)
+    factors = rng.standard_normal((n_rows, 8))
+    loadings = np.random.default_rng(0).standard_normal((8, n_columns))
+    values = 1000 + factors @ loadings + rng.standard_normal((n_rows, n_columns))
+    return pd.DataFrame(values, columns=[f'c{i}' for i in range(n_columns)])
+
+
+if __name__ == "__main__":
+    # --- Example 1: The iris heatmap, fed in chunks ---
+    print("--- Example 1: Iris correlation from chunks of 10 rows ---")
+    rng = np.random.default_rng(5)
+    centers = {'setosa': (5.0, 3.4, 1.5, 0.2), 'versicolor': (5.9, 2.8, 4.3, 1.3), 'virginica': (6.6, 3.0, 5.6, 2.0)}
+    species = np.repeat(list(centers), 50)
+    df_iris = pd.DataFrame(np.array([centers[name] for name in species]) + rng.normal(0, 0.3, (150, 4)),
+                           columns=['sepal_length', 'sepal_width', 'petal_length', 'petal_width']).round(1)
+    df_iris['species'] = species
+    accumulator = CorrelationAccumulator()
+    for start in range(0, len(df_iris), 10):
+        accumulator.update(df_iris.iloc[start:start + 10])
+    corr = accumulator.corr()
+    pd.testing.assert_frame_equal(corr, df_iris.corr(numeric_only=True), rtol=1e-12, atol=1e-12)
+    pd.testing.assert_frame_equal(accumulator.cov(), df_iris.cov(numeric_only=True), rtol=1e-12, atol=1e-12)
+    print(corr.round(2))
+    print("Equal to df_iris.corr(numeric_only=True) and .cov(): True")
+    print("-" * 60)
+
+    # --- Example 2: Missing values (pairwise complete rows, like pandas) ---
+    print("--- Example 2: 5% missing values ---")
+    table = wide_table(20_000, 30, seed=1)
+    table = table.mask(rng.random(table.shape) < 0.05)
+    accumulator = CorrelationAccumulator(block_size=8)
+    for start in range(0, len(table), 3_000):
+        accumulator.update(table.iloc[start:start + 3_000])
+    difference = (accumulator.corr() - table.corr()).abs().max().max()
+    print(f"Largest difference to table.corr(): {difference:.1e}")
+    assert difference < 1e-9
+    print("-" * 60)
+
+    # --- Example 3: Merging the totals of several workers ---
+    print("--- Example 3: 4 parts accumulated by worker processes, then merged ---")
+    tasks = [(seed, 40_000, 200) for seed in range(4)]
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        parts = list(executor.map(_accumulate_part, tasks))
+    merged = CorrelationAccumulator()
+    for part in parts:
+        merged.merge(part)
+    everything = pd.concat([wide_table(10_000, 200, seed * 100 + chunk_seed)
+                            for seed in range(4) for chunk_seed in range(4)], ignore_index=True)
+    difference = (merged.corr() - everything.corr()).abs().max().max()
+    print(f"{merged.n:,} rows; largest difference of the merged result to DataFrame.corr(): {difference:.1e}")
+    assert difference < 1e-9
+    print("-" * 60)
+
+    # --- Example 4: Wide data ---
+    print("--- Example 4: Wide tables ---")
+    table = wide_table(20_000, 1000, seed=2)
+    start_time = time.time()
+    expected = table.corr()
+    pandas_time = time.time() - start_time
+    start_time = time.time()
+    accumulator = CorrelationAccumulator()
+    for start in range(0, len(table), 5_000):
+        accumulator.update(table.iloc[start:start + 5_000])
+    result = accumulator.corr()
+    stream_time = time.time() - start_time
+    difference = (result - expected).abs().max().max()
+    print(f"20,000 x 1,000: DataFrame.corr {pandas_time:.1f}s | accumulator (4 chunks) {stream_time:.2f}s | "
+          f"max difference {difference:.1e}")
+
+    start_time = time.time()
+    accumulator = CorrelationAccumulator(block_size=512)
+    for seed in range(10):
+        accumulator.update(wide_table(5_000, 3000, seed=10 + seed))
+    result = accumulator.corr()
+    print(f"50,000 x 3,000 in 10 chunks: {time.time() - start_time:.1f}s (incl. generating the chunks), "
+          f"result {result.shape}, {result.to_numpy().nbytes / 1e6:.0f} MB")
@@ -0,0 +1,276 @@
+# OUT-OF-CORE LINEAR REGRESSION
+# =============================
+# LinearRegression().fit(X_train, y_train) in simple_ml_project.py and tip_prediction_model.py
+# needs the whole X in memory at once. The least-squares solution only depends on a few
+# sums over the rows, though (the "sufficient statistics"):
+#   n, sum(x), sum(y), X^T X (features x features) and X^T y (features)
+# With an intercept, the coefficients solve the centered normal equations
+#   (X_c^T X_c + alpha * I) b = X_c^T y_c      intercept = mean(y) - mean(x) . b
+# where X_c^T X_c = X^T X - n * mean(x) mean(x)^T. alpha > 0 is ridge regression (the
+# intercept is not penalized, like sklearn.linear_model.Ridge).
+#
+# - partial_fit(X, y) adds one chunk: two matrix products, no rows are kept
+# - merge(other) adds the sums of another fitter (another file, another worker)
+# - the values are shifted by the means of the first chunk before they are added up,
+#   so the centering does not subtract huge, almost equal numbers
+# - the system is solved with a Cholesky factorization; if the matrix is singular (e.g. all
+#   dummy columns of a category without drop_first) it falls back to np.linalg.lstsq, which
+#   gives the same minimum-norm solution as sklearn
+# Memory: O(features^2), whatever the number of rows.
+
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.linalg import LinAlgError, cho_factor, cho_solve
+
+
+class ChunkedLinearRegression:
+    """
+    Least squares (optionally ridge) regression fitted chunk by chunk from X^T X and X^T y.
+
+    Args:
+        fit_intercept: Fit an intercept (not penalized)
+        alpha: Ridge penalty; 0 = ordinary least squares like LinearRegression
+    """
+
+    def __init__(self, fit_intercept: bool = True, alpha: float = 0.0):
+        self.fit_intercept = fit_intercept
+        self.alpha = alpha
+        self.n = 0
+        self.feature_names_in_ = None
+        self._shift_x = self._shift_y = None
+        self._sum_x = self._sum_y = None
+        self._xtx = self._xty = None
+        self.coef_ = None
+        self.intercept_ = 0.0
+        self.solver_ = None  # 'cholesky' or 'lstsq', set by solve()
+
+    @property
+    def n_features_in_(self) -> int:
+        return len(self._sum_x)
+
+    def _arrays(self, X, y=None):
+        if isinstance(X, pd.DataFrame):
+            if self.feature_names_in_ is None:
+                self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+            elif list(X.columns) != list(self.feature_names_in_):
+                raise ValueError(f"X has columns {list(X.columns)}, expected {list(self.feature_names_in_)}")
+        X = np.asarray(X, dtype=np.float64)  # booleans from get_dummies become 0.0 / 1.0
+        X = X.reshape(-1, 1) if X.ndim == 1 else X
+        return X if y is None else (X, np.asarray(y, dtype=np.float64).ravel())
+
+    def partial_fit(self, X, y) -> 'ChunkedLinearRegression':
+        """
+        Adds a chunk of rows to the sums. Call solve() (or predict()) afterwards.
+
+        Args:
+            X: Features of the chunk (DataFrame or 2D array)
+            y: Targets of the chunk
+
+        Returns:
+            self
+        """
+        X, y = self._arrays(X, y)
+        if len(X) != len(y):
+            raise ValueError(f"X has {len(X)} rows, y has {len(y)}")
+        if self._sum_x is None:
+            k = X.shape[1]
+            # With an intercept, any shift is allowed (it cancels out); the first means keep the sums small.
+            self._shift_x = X.mean(axis=0) if self.fit_intercept and len(X) else np.zeros(k)
+            self._shift_y = float(y.mean()) if self.fit_intercept and len(y) else 0.0
+            self._sum_x, self._sum_y = np.zeros(k), 0.0
+            self._xtx, self._xty = np.zeros((k, k)), np.zeros(k)
+        Xs = X - self._shift_x
+        ys = y - self._shift_y
+        self._sum_x += Xs.sum(axis=0)
+        self._sum_y += ys.sum()
+        self._xtx += Xs.T @ Xs
+        self._xty += Xs.T @ ys
+        self.n += len(X)
+        self.coef_ = None  # the old solution is outdated
+        return self
+
+    def merge(self, other: 'ChunkedLinearRegression') -> 'ChunkedLinearRegression':
+        """
+        Adds the sums of another fitter with the same features (e.g. from another worker).
+
+        Returns:
+            self
+        """
+        if other._sum_x is None:
+            return self
+        if self._sum_x is None:
+            k = other.n_features_in_
+            self._shift_x, self._shift_y = other._shift_x.copy(), other._shift_y
+            self._sum_x, self._sum_y = np.zeros(k), 0.0
+            self._xtx, self._xty = np.zeros((k, k)), np.zeros(k)
+            self.feature_names_in_ = other.feature_names_in_
+        # Re-express the other sums for this shift: x - s = (x - s_other) + d.
+        d_x = other._shift_x - self._shift_x
+        d_y = other._shift_y - self._shift_y
+        self._xtx += (other._xtx + np.outer(other._sum_x, d_x) + np.outer(d_x, other._sum_x)
+                      + other.n * np.outer(d_x, d_x))
+        self._xty += other._xty + other._sum_x * d_y + d_x * other._sum_y + other.n * d_x * d_y
+        self._sum_x += other._sum_x + other.n * d_x
+        self._sum_y += other._sum_y + other.n * d_y
+        self.n += other.n
+        self.coef_ = None
+        return self
+
+    def solve(self) -> 'ChunkedLinearRegression':
+        """
+        Computes coef_ and intercept_ from the accumulated sums.
+
+        Returns:
+            self
+        """
+        if not self.n:
+            raise ValueError("No rows were added yet; call partial_fit() first.")
+        if self.fit_intercept:
+            mean_x = self._sum_x / self.n
+            mean_y = self._sum_y / self.n
+            gram = self._xtx - self.n * np.outer(mean_x, mean_x)
+            moment = self._xty - self.n * mean_x * mean_y
+        else:
+            gram, moment = self._xtx, self._xty
+        gram = gram + self.alpha * np.eye(len(gram))
+        try:
+            factor = cho_factor(gram)
+            # Nearly singular matrices can pass the factorization with a tiny pivot; treat them as singular.
+            if np.diag(factor[0]).min() ** 2 <= 1e-10 * np.abs(np.diag(gram)).max():
+                raise LinAlgError("X^T X is (nearly) singular")
+            self.coef_ = cho_solve(factor, moment)
+            self.solver_ = 'cholesky'
+        except LinAlgError:
+            # Singular (collinear features): the minimum-norm least-squares solution.
+            self.coef_ = np.linalg.lstsq(gram, moment, rcond=None)[0]
+            self.solver_ = 'lstsq'
+        if self.fit_intercept:
+            self.intercept_ = float(self._shift_y + mean_y - (self._shift_x + mean_x) @ self.coef_)
+        return self
+
+    def fit(self, X, y, chunk_size: int = 100_000) -> 'ChunkedLinearRegression':
+        """Fits on in-memory data, chunk_size rows at a time (same result as LinearRegression().fit)."""
+        self.__init__(self.fit_intercept, self.alpha)
+        for start in range(0, len(X), chunk_size):
+            rows = slice(start, start + chunk_size)
+            self.partial_fit(X.iloc[rows] if isinstance(X, pd.DataFrame) else X[rows],
+                             y.iloc[rows] if isinstance(y, pd.Series) else y[rows])
+        return self.solve()
+
+    def predict(self, X) -> np.ndarray:
+        if self.coef_ is None:
+            self.solve()
+        return self._arrays(X) @ self.coef_ + self.intercept_
+
+    def score(self, X, y) -> float:
+        """R^2 of the prediction, like sklearn's score()."""
+        y = np.asarray(y, dtype=np.float64)
+        residual = ((y - self.predict(X)) ** 2).sum()
+        return 1 - residual / ((y - y.mean()) ** 2).sum()
+
+
+def make_rows(n_rows: int, n_features: int, seed: int):
+    """Random regression data with known coefficients, features far away from zero."""
+    rng = np.random.default_rng(seed)
+    X = rng.normal(100, 5, (n_rows, n_features))
+    coef = np.arange(1, n_features + 1) / n_features
+    return X, X @ coef - 40 + rng.normal(0, 1, n_rows)
+
+
+def _fit_part(task):
+    """Worker: fits the sums of one part of the data (here generated, normally read from a file)."""
+    seed, n_rows, n_features = task
+    model = ChunkedLinearRegression()
+    for chunk in range(n_rows // 100_000):
+        model.partial_fit(*make_rows(100_000, n_features, seed * 1000 + chunk))
+    return model
+
+
+if __name__ == "__main__":
+    from sklearn.linear_model import LinearRegression, Ridge
+
+    # --- Example 1: simple_ml_project.py ---
+    print("--- Example 1: DaysOnMarket -> SalePrice ---")
+    data = pd.DataFrame({'DaysOnMarket': [10, 20, 30, 40, 50, 60, 70, 80],
+                         'SalePrice': [150, 140, 130, 120, 110, 100, 90, 80]})
+    model = ChunkedLinearRegression().fit(data[['DaysOnMarket']], data['SalePrice'], chunk_size=3)
+    reference = LinearRegression().fit(data[['DaysOnMarket']], data['SalePrice'])
+    print(f"Chunks of 3 rows: coef {model.coef_.round(6)}, intercept {model.intercept_:.6f} | "
+          f"sklearn: coef {reference.coef_.round(6)}, intercept {reference.intercept_:.6f}")
+    print("-" * 60)
+
+    # --- Example 2: The tip model with get_dummies features ---
+    print("--- Example 2: Tips-like data, get_dummies(drop_first=True) ---")
+    rng = np.random.default_rng(8)
+    n = 244
+    total_bill = (rng.gamma(4, 5, n) + 3).round(2)
+    tips = pd.DataFrame({'total_bill': total_bill, 'tip': (total_bill * rng.uniform(0.1, 0.2, n)).round(2),
+                         'sex': pd.Categorical(rng.choice(['Male', 'Female'], n), ['Male', 'Female']),
+                         'smoker': pd.Categorical(rng.choice(['Yes', 'No'], n), ['Yes', 'No']),
+                         'day': pd.Categorical(rng.choice(['Thur', 'Fri', 'Sat', 'Sun'], n), ['Thur', 'Fri', 'Sat', 'Sun']),
+                         'time': pd.Categorical(rng.choice(['Lunch', 'Dinner'], n), ['Lunch', 'Dinner']),
+                         'size': rng.integers(1, 7, n)})
+    df = pd.get_dummies(tips, drop_first=True)
+    X, y = df.drop(columns=['tip']), df['tip']
+    for label, ours, theirs in [('LinearRegression', ChunkedLinearRegression(), LinearRegression()),
+                                ('Ridge(alpha=1)', ChunkedLinearRegression(alpha=1.0), Ridge(alpha=1.0))]:
+        ours.fit(X, y, chunk_size=50)
+        theirs.fit(X, y)
+        difference = max(np.abs(ours.coef_ - theirs.coef_).max(), abs(ours.intercept_ - theirs.intercept_))
+        print(f"{label:<17} solver={ours.solver_:<8} largest difference to sklearn: {difference:.1e}")
+        assert difference < 1e-9
+    # Without drop_first the dummy columns of each category add up to 1: X^T X is singular.
+    X_all = pd.get_dummies(tips, drop_first=False).drop(columns=['tip'])
+    ours = ChunkedLinearRegression().fit(X_all, y, chunk_size=50)
+    theirs = LinearRegression().fit(X_all, y)
+    print(f"All dummies       solver={ours.solver_:<8} largest prediction difference to sklearn: "
+          f"{np.abs(ours.predict(X_all) - theirs.predict(X_all)).max():.1e}")
+    print("-" * 60)
+
+    # --- Example 3: Parts fitted by workers, then merged ---
+    print("--- Example 3: 4 workers x 500,000 rows, merged ---")
+    tasks = [(seed, 500_000, 20) for seed in range(4)]
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        parts = list(executor.map(_fit_part, tasks))
+    merged = ChunkedLinearRegression()
+    for part in parts:
+        merged.merge(part)
+    merged.solve()
+    X_full = np.vstack([make_rows(100_000, 20, seed * 1000 + chunk)[0] for seed in range(4) for chunk in range(5)])
+    y_full = np.concatenate([make_rows(100_000, 20, seed * 1000 + chunk)[1] for seed in range(4) for chunk in range(5)])
+    reference = LinearRegression().fit(X_full, y_full)
+    print(f"{merged.n:,} rows; largest coefficient difference to sklearn on all rows: "
+          f"{np.abs(merged.coef_ - reference.coef_).max():.1e}, intercept difference "
+          f"{abs(merged.intercept_ - reference.intercept_):.1e}")
+    del X_full, y_full
+    print("-" * 60)
+
+    # --- Example 4: Memory depends on the features, not the rows ---
+    print("--- Example 4: Peak memory (tracemalloc) and time, 50 features ---")
+    for n_rows in (1_000_000, 10_000_000):
+        tracemalloc.start()
+        start_time = time.time()
+        model = ChunkedLinearRegression()
+        for chunk in range(n_rows // 100_000):
+            model.partial_fit(*make_rows(100_000, 50, chunk))
+        model.solve()
+        elapsed = time.time() - start_time
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        line = f"{n_rows:>10,} rows streamed: {elapsed:5.1f}s, peak {peak / 1e6:6.0f} MB"
+        if n_rows <= 1_000_000:
+            X_full, y_full = make_rows(n_rows, 50, 0)
+            tracemalloc.start()
+            start_time = time.time()
+            LinearRegression().fit(X_full, y_full)
+            sklearn_time = time.time() - start_time
+            sklearn_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            line += (f" | sklearn in memory: {sklearn_time:.1f}s, peak {sklearn_peak / 1e6:.0f} MB "
+                     f"on top of the {X_full.nbytes / 1e6:.0f} MB X")
+            del X_full, y_full
+        print(line)
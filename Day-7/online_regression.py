@@ -0,0 +1,371 @@
+# ONLINE REGRESSION: RECURSIVE LEAST SQUARES AND MINI-BATCH SGD
+# =============================================================
+# tip_prediction_model.py fits LinearRegression once on all bills. When new bills arrive
+# every few seconds, refitting from scratch each time gets slower and slower. An online
+# model updates its coefficients from the new rows only:
+#
+# RECURSIVE LEAST SQUARES (RLS)
+#   Keeps the coefficients theta and P, the inverse of the (weighted) X^T X matrix.
+#   Every new row x with target y updates both in O(features^2):
+#       k = P x / (lambda + x^T P x)       theta += k * (y - x^T theta)       P = (P - k x^T P) / lambda
+#   With lambda = 1 the result equals the batch least-squares fit (up to the tiny ridge
+#   penalty 1 / delta of the starting value P = delta * I). With a forgetting factor
+#   lambda < 1, older rows count less (weight lambda^age), so the model follows drift.
+#   A batch of m rows is applied in one block update (an m x m solve), with the same result
+#   as m single-row updates up to rounding. For lambda < 1 the blocks are kept short enough
+#   that lambda^m stays above MIN_BLOCK_DECAY, so the rounding stays small.
+#
+# MINI-BATCH SGD
+#   Takes small gradient steps on the squared error of each mini-batch: O(features) per row,
+#   no matrix at all. Features are standardized with running means and variances, the step
+#   size decays as eta0 / t^0.25, and the averaged coefficients (Polyak averaging) converge
+#   towards the least-squares fit.
+#
+# Both accept the DataFrame produced by pd.get_dummies(..., drop_first=True): the columns of
+# the first batch are remembered, and later batches must have the same columns (in any order;
+# a missing or unknown column raises ValueError). For text columns, get_dummies only
+# knows the categories present in the batch, and drop_first then drops a different one;
+# dummy_features() fixes the categories first (for tips: TIPS_CATEGORIES, the pinned dtypes
+# from dataset_registry.py), so every batch is encoded exactly like the training data.
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Day-6'))
+from dataset_registry import PINNED_DTYPES  # noqa: E402
+
+# Smallest lambda^m of one RLS block update (block length m) with a forgetting factor.
+MIN_BLOCK_DECAY = 1e-6
+
+# Category columns of tips and their categories, in seaborn's order.
+TIPS_CATEGORIES = {column: dtype[1] for column, dtype in PINNED_DTYPES['tips'].items() if isinstance(dtype, tuple)}
+
+
+def dummy_features(df: pd.DataFrame, categories: dict) -> pd.DataFrame:
+    """
+    pd.get_dummies(df, drop_first=True) with fixed categories: the same columns for every batch.
+
+    Args:
+        df: Rows with category or text columns
+        categories: Column -> list of categories, e.g. TIPS_CATEGORIES
+
+    Returns:
+        The dummy-encoded DataFrame
+    """
+    df = df.astype({column: pd.CategoricalDtype(values) for column, values in categories.items() if column in df})
+    return pd.get_dummies(df, drop_first=True)
+
+
+class _OnlineRegressor:
+    """Shared column handling of the online regressors."""
+
+    feature_names_in_ = None
+    n_features_in_ = None
+
+    def _features(self, X) -> np.ndarray:
+        if isinstance(X, pd.DataFrame):
+            if self.feature_names_in_ is None:
+                self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+            else:
+                unknown = set(X.columns) - set(self.feature_names_in_)
+                if unknown:
+                    raise ValueError(f"Unknown feature columns {sorted(unknown)}; "
+                                     f"the model was started with {list(self.feature_names_in_)}")
+                # A missing column is an error, not a 0: dummy_features() always yields every column.
+                missing = [column for column in self.feature_names_in_ if column not in X.columns]
+                if missing:
+                    raise ValueError(f"Missing feature columns {missing}; "
+                                     f"the model was started with {list(self.feature_names_in_)}")
+                X = X[self.feature_names_in_]
+        X = np.asarray(X, dtype=np.float64)
+        X = X.reshape(1, -1) if X.ndim == 1 else X
+        if self.n_features_in_ is None:
+            self.n_features_in_ = X.shape[1]
+        elif X.shape[1] != self.n_features_in_:
+            names = '' if self.feature_names_in_ is None else f": {list(self.feature_names_in_)}"
+            raise ValueError(f"X has {X.shape[1]} features, but the model was started with "
+                             f"{self.n_features_in_}{names}")
+        return X
+
+
+class RecursiveLeastSquares(_OnlineRegressor):
+    """
+    Linear regression updated row by row, with an optional forgetting factor.
+
+    Args:
+        forgetting: lambda in (0, 1]; 1 = never forget (the batch least-squares fit)
+        delta: Starting value P = delta * I; large = weak prior towards zero coefficients
+        fit_intercept: Learn an intercept
+        block_size: Largest number of rows applied in one block update
+    """
+
+    def __init__(self, forgetting: float = 1.0, delta: float = 1e6, fit_intercept: bool = True,
+                 block_size: int = 256):
+        if not 0 < forgetting <= 1:
+            raise ValueError(f"forgetting must be in (0, 1], got {forgetting}")
+        self.forgetting = forgetting
+        self.delta = delta
+        self.fit_intercept = fit_intercept
+        self.block_size = block_size
+        self.theta = None
+        self.P = None
+        self.n_seen = 0
+
+    def _design(self, X: np.ndarray) -> np.ndarray:
+        return np.hstack([X, np.ones((len(X), 1))]) if self.fit_intercept else X
+
+    def partial_fit(self, X, y) -> 'RecursiveLeastSquares':
+        """
+        Updates the model with new rows (oldest first).
+
+        Args:
+            X: Features (DataFrame from get_dummies, 2D array, or a single row)
+            y: Targets
+
+        Returns:
+            self
+        """
+        A = self._design(self._features(X))
+        y = np.atleast_1d(np.asarray(y, dtype=np.float64))
+        if self.theta is None:
+            self.theta = np.zeros(A.shape[1])
+            self.P = self.delta * np.eye(A.shape[1])
+        block_size = self.block_size
+        if self.forgetting < 1:
+            # The block update subtracts two matrices to get one about lambda^m times smaller;
+            # keeping lambda^m >= MIN_BLOCK_DECAY bounds the digits lost to that cancellation.
+            block_size = max(1, min(block_size, int(np.log(MIN_BLOCK_DECAY) / np.log(self.forgetting))))
+        for start in range(0, len(A), block_size):
+            self._update(A[start:start + block_size], y[start:start + block_size])
+        self.n_seen += len(A)
+        return self
+
+    def _update(self, A: np.ndarray, y: np.ndarray):
+        m = len(A)
+        lam = self.forgetting
+        if m == 1:
+            x = A[0]
+            Px = self.P @ x
+            gain = Px / (lam + x @ Px)
+            self.theta += gain * (y[0] - x @ self.theta)
+            self.P = (self.P - np.outer(gain, Px)) / lam
+        else:
+            # Block form of m single-row updates: row i of the block has weight lambda^(m-1-i).
+            # Written with lambda^(i+1) on the diagonal (all <= 1) instead of P / lambda^m and the
+            # inverse weights, which overflow for small lambda.
+            PA = self.P @ A.T
+            inner = np.diag(lam ** np.arange(1, m + 1)) + A @ PA
+            gain = np.linalg.solve(inner, PA.T).T
+            self.theta += gain @ (y - A @ self.theta)
+            self.P = (self.P - gain @ PA.T) / lam ** m
+        self.P = (self.P + self.P.T) / 2  # keep P symmetric despite rounding
+
+    @property
+    def coef_(self) -> np.ndarray:
+        return self.theta[:-1] if self.fit_intercept else self.theta
+
+    @property
+    def intercept_(self) -> float:
+        return float(self.theta[-1]) if self.fit_intercept else 0.0
+
+    def predict(self, X) -> np.ndarray:
+        return self._design(self._features(X)) @ self.theta
+
+
+class MiniBatchSGDRegressor(_OnlineRegressor):
+    """
+    Linear regression trained with averaged mini-batch stochastic gradient descent.
+
+    Args:
+        eta0: Initial step size (on standardized features)
+        power_t: Step size at step t is eta0 / t^power_t
+        batch_size: Rows per gradient step
+        l2: Ridge penalty on the standardized coefficients
+        average: Predict with the running average of the coefficients (smoother, converges)
+    """
+
+    def __init__(self, eta0: float = 0.2, power_t: float = 0.25, batch_size: int = 32, l2: float = 0.0,
+                 average: bool = True):
+        self.eta0 = eta0
+        self.power_t = power_t
+        self.batch_size = batch_size
+        self.l2 = l2
+        self.average = average
+        self.n_seen = 0
+        self.t = 0
+        self._mean = self._m2 = None
+        self.w = self.w_avg = None
+        self.b = self.b_avg = 0.0
+
+    def _scale(self):
+        std = np.sqrt(self._m2 / max(self.n_seen - 1, 1))
+        return np.where(std > 0, std, 1.0)
+
+    def partial_fit(self, X, y) -> 'MiniBatchSGDRegressor':
+        """
+        Takes gradient steps on new rows, batch_size rows at a time.
+
+        Args:
+            X: Features (DataFrame from get_dummies, 2D array, or a single row)
+            y: Targets
+
+        Returns:
+            self
+        """
+        X = self._features(X)
+        y = np.atleast_1d(np.asarray(y, dtype=np.float64))
+        if self.w is None:
+            self._mean, self._m2 = np.zeros(X.shape[1]), np.zeros(X.shape[1])
+            self.w, self.w_avg = np.zeros(X.shape[1]), np.zeros(X.shape[1])
+            self.b = self.b_avg = float(y.mean())  # start at the mean target instead of 0
+        for start in range(0, len(X), self.batch_size):
+            self._step(X[start:start + self.batch_size], y[start:start + self.batch_size])
+        return self
+
+    def _step(self, X: np.ndarray, y: np.ndarray):
+        # Running mean and variance of the features (Chan's merge of the batch into the totals).
+        m = len(X)
+        batch_mean = X.mean(axis=0)
+        delta = batch_mean - self._mean
+        total = self.n_seen + m
+        self._mean += delta * m / total
+        self._m2 += ((X - batch_mean) ** 2).sum(axis=0) + delta ** 2 * self.n_seen * m / total
+        self.n_seen = total
+
+        Z = (X - self._mean) / self._scale()
+        error = Z @ self.w + self.b - y
+        self.t += 1
+        eta = self.eta0 / self.t ** self.power_t
+        self.w -= eta * (Z.T @ error / m + self.l2 * self.w)
+        self.b -= eta * error.mean()
+        self.w_avg += (self.w - self.w_avg) / self.t
+        self.b_avg += (self.b - self.b_avg) / self.t
+
+    def _weights(self):
+        return (self.w_avg, self.b_avg) if self.average else (self.w, self.b)
+
+    @property
+    def coef_(self) -> np.ndarray:
+        return self._weights()[0] / self._scale()
+
+    @property
+    def intercept_(self) -> float:
+        w, b = self._weights()
+        return float(b - (w / self._scale()) @ self._mean)
+
+    def predict(self, X) -> np.ndarray:
+        return self._features(X) @ self.coef_ + self.intercept_
+
+
+def make_bills(n: int, seed: int, tip_rate: float = 0.15) -> pd.DataFrame:
+    """Tips-like bills with seaborn's category dtypes; the tip depends on the features."""
+    rng = np.random.default_rng(seed)
+    total_bill = (rng.gamma(4, 5, n) + 3).round(2)
+    bills = pd.DataFrame({
+        'total_bill': total_bill,
+        'sex': pd.Categorical(rng.choice(['Male', 'Female'], n), ['Male', 'Female']),
+        'smoker': pd.Categorical(rng.choice(['Yes', 'No'], n), ['Yes', 'No']),
+        'day': pd.Categorical(rng.choice(['Thur', 'Fri', 'Sat', 'Sun'], n), ['Thur', 'Fri', 'Sat', 'Sun']),
+        'time': pd.Categorical(rng.choice(['Lunch', 'Dinner'], n), ['Lunch', 'Dinner']),
+        'size': rng.integers(1, 7, n),
+    })
+    bills['tip'] = (0.5 + tip_rate * total_bill + 0.2 * bills['size'] + 0.3 * (bills['day'] == 'Sun')
+                    + rng.normal(0, 0.8, n)).round(2)
+    return bills
+
+
+if __name__ == "__main__":
+    from sklearn.linear_model import LinearRegression
+
+    # --- Example 1: New bills with the get_dummies features of tip_prediction_model.py ---
+    print("--- Example 1: Updating with get_dummies batches ---")
+    rls = RecursiveLeastSquares()
+    sgd = MiniBatchSGDRegressor()
+    first = pd.get_dummies(make_bills(50, seed=1), drop_first=True)
+    rls.partial_fit(first.drop(columns=['tip']), first['tip'])
+    sgd.partial_fit(first.drop(columns=['tip']), first['tip'])
+    # Plain text columns (as read from a CSV): get_dummies on 3 bills only knows their categories.
+    arriving = make_bills(3, seed=2).astype({'sex': str, 'smoker': str, 'day': str, 'time': str})
+    print(f"Model columns:             {list(rls.feature_names_in_)}")
+    print(f"get_dummies on the batch:  {list(pd.get_dummies(arriving, drop_first=True).drop(columns=['tip']).columns)}")
+    try:
+        rls.partial_fit(pd.get_dummies(arriving, drop_first=True).drop(columns=['tip']), arriving['tip'])
+    except ValueError as exc:
+        print("Rejected:", str(exc).split(';')[0])
+    batch = dummy_features(arriving, TIPS_CATEGORIES)
+    print(f"dummy_features(batch):     {list(batch.drop(columns=['tip']).columns)}")
+    rls.partial_fit(batch.drop(columns=['tip']), batch['tip'])
+    sgd.partial_fit(batch.drop(columns=['tip']), batch['tip'])
+    print(f"After {rls.n_seen} bills, predicted tips for the batch: {rls.predict(batch.drop(columns=['tip'])).round(2)}"
+          f" (actual {batch['tip'].to_numpy()})")
+    print("-" * 60)
+
+    # --- Example 2: Convergence to the batch fit ---
+    print("--- Example 2: Online models vs LinearRegression on the bills seen so far ---")
+    stream = pd.get_dummies(make_bills(20_000, seed=3), drop_first=True)
+    X_stream, y_stream = stream.drop(columns=['tip']), stream['tip']
+    test = pd.get_dummies(make_bills(5_000, seed=4), drop_first=True)
+    X_test, y_test = test.drop(columns=['tip']), test['tip']
+    rls, sgd = RecursiveLeastSquares(), MiniBatchSGDRegressor()
+    seen = 0
+    for checkpoint in (100, 1_000, 5_000, 20_000):
+        rls.partial_fit(X_stream.iloc[seen:checkpoint], y_stream.iloc[seen:checkpoint])
+        sgd.partial_fit(X_stream.iloc[seen:checkpoint], y_stream.iloc[seen:checkpoint])
+        seen = checkpoint
+        batch_fit = LinearRegression().fit(X_stream.iloc[:seen], y_stream.iloc[:seen])
+        mae = {name: np.abs(model.predict(X_test) - y_test).mean()
+               for name, model in (('batch', batch_fit), ('rls', rls), ('sgd', sgd))}
+        print(f"{seen:>6,} bills: test MAE batch {mae['batch']:.4f} | RLS {mae['rls']:.4f} | SGD {mae['sgd']:.4f} || "
+              f"max coef difference to batch: RLS {np.abs(rls.coef_ - batch_fit.coef_).max():.1e}, "
+              f"SGD {np.abs(sgd.coef_ - batch_fit.coef_).max():.1e}")
+    print("-" * 60)
+
+    # --- Example 3: Update latency ---
+    print("--- Example 3: Latency per update ---")
+    rows = X_stream.to_numpy(dtype=np.float64)
+    targets = y_stream.to_numpy()
+    for name, model in (('RLS', RecursiveLeastSquares()), ('SGD', MiniBatchSGDRegressor())):
+        model.partial_fit(X_stream.iloc[:10], y_stream.iloc[:10])
+        start_time = time.perf_counter()
+        for i in range(10, 5_010):
+            model.partial_fit(rows[i], targets[i])
+        single = (time.perf_counter() - start_time) / 5_000
+        start_time = time.perf_counter()
+        for start in range(5_010, 15_010, 100):
+            model.partial_fit(rows[start:start + 100], targets[start:start + 100])
+        batched = (time.perf_counter() - start_time) / 10_000
+        start_time = time.perf_counter()
+        for i in range(1_000):
+            model.predict(rows[i])
+        predict = (time.perf_counter() - start_time) / 1_000
+        print(f"{name}: one bill per call {single * 1e6:5.1f} us | batches of 100: {batched * 1e6:5.1f} us per bill | "
+              f"predict one bill {predict * 1e6:5.1f} us")
+    start_time = time.perf_counter()
+    LinearRegression().fit(X_stream, y_stream)
+    print(f"Refitting LinearRegression on all 20,000 bills: {(time.perf_counter() - start_time) * 1e3:.1f} ms per new bill")
+    print("-" * 60)
+
+    # --- Example 4: Drift and the forgetting factor ---
+    print("--- Example 4: The tip rate changes from 15% to 20% of the bill ---")
+    before = pd.get_dummies(make_bills(5_000, seed=5, tip_rate=0.15), drop_first=True)
+    after = pd.get_dummies(make_bills(2_000, seed=6, tip_rate=0.20), drop_first=True)
+    models = {'RLS lambda=1': RecursiveLeastSquares(1.0), 'RLS lambda=0.995': RecursiveLeastSquares(0.995)}
+    for model in models.values():
+        model.partial_fit(before.drop(columns=['tip']), before['tip'])
+        model.partial_fit(after.drop(columns=['tip']), after['tip'])
+    for name, model in models.items():
+        slope = model.coef_[list(model.feature_names_in_).index('total_bill')]
+        print(f"{name:<17}: learned tip rate {slope:.3f} (now 0.200)")
+
+    # Block updates and single-row updates agree for any forgetting factor.
+    X_drift, y_drift = after.drop(columns=['tip']), after['tip']
+    for forgetting in (0.995, 0.9, 0.5):
+        blocks = RecursiveLeastSquares(forgetting).partial_fit(X_drift, y_drift)
+        rows_only = RecursiveLeastSquares(forgetting, block_size=1).partial_fit(X_drift, y_drift)
+        difference = np.abs(blocks.theta - rows_only.theta).max()
+        assert difference < 1e-6, difference
+        print(f"lambda={forgetting:<5}: block vs row-by-row updates, max coef difference {difference:.1e}")
@@ -0,0 +1,466 @@
+# MICRO-BATCHING PREDICTION SERVER
+# ================================
+# tip_prediction_model.py trains a LinearRegression and then throws it away. This module
+# saves the trained model to disk and serves it over HTTP on localhost:
+#
+#     POST /predict   {"total_bill": 16.99, "sex": "Female", "smoker": "No", "day": "Sun",
+#                      "time": "Dinner", "size": 2}              ->  {"tip": 2.73}
+#     GET  /health    ->  {"status": "ok", "requests": ..., "batches": ..., "mean_batch_size": ...}
+#
+# Every request carries one bill, but predicting one bill at a time wastes most of the work:
+# each predict call pays the same fixed cost (building a DataFrame, get_dummies, sklearn's
+# input checks) whether it gets 1 row or 100. The server therefore collects concurrent
+# requests into MICRO-BATCHES:
+# - the first waiting request opens a batch
+# - requests that arrive in the next max_wait seconds join it, up to max_batch_size rows
+# - the batch is encoded and predicted with ONE vectorized predict call, and every request
+#   gets its own row of the result; if the batch call fails, its rows are predicted one by one,
+#   so only the requests that really fail get an error
+# Under load the batches fill up at once and nobody waits; a lone request waits at most
+# max_wait. max_batch_size=1 turns batching off.
+#
+# The server is plain asyncio (asyncio.start_server) with a minimal HTTP/1.1 parser and
+# keep-alive connections, so it needs no web framework.
+#
+# save_model() stores the model together with its feature columns and the library versions;
+# load_model() warns when scikit-learn or numpy changed since the model was saved.
+#
+# load_test() is the matching client: many concurrent keep-alive connections, each sending
+# one bill at a time, reporting throughput and latency percentiles.
+#
+# Start a server from the command line:
+#     python prediction_server.py serve tip_model.pkl --port 8000 --max-batch-size 64 --max-wait 0.002
+
+import argparse
+import asyncio
+import importlib.metadata
+import json
+import math
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from online_regression import TIPS_CATEGORIES, dummy_features
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tip_model.pkl')
+MAX_BATCH_SIZE = 64
+MAX_WAIT = 0.002  # seconds
+# Libraries whose version changes can change a pickled model's behaviour.
+MODEL_LIBRARIES = ('scikit-learn', 'numpy')
+# The raw columns of one bill, as sent to /predict.
+NUMERIC_COLUMNS = ('total_bill', 'size')
+
+
+def save_model(model, path: str = MODEL_PATH, categories: dict = None) -> str:
+    """
+    Saves a fitted model with everything needed to encode new rows like the training data.
+
+    Args:
+        model: Fitted estimator trained on dummy-encoded columns (with feature_names_in_)
+        path: Output file
+        categories: Column -> categories used for dummy encoding (default: the tips dataset's)
+
+    Returns:
+        The path written
+    """
+    if getattr(model, 'feature_names_in_', None) is None:
+        raise ValueError("The model must be fitted on a DataFrame, so its feature columns are known")
+    bundle = {
+        'model': model,
+        'feature_names': list(model.feature_names_in_),
+        'categories': TIPS_CATEGORIES if categories is None else categories,
+        'versions': {name: importlib.metadata.version(name) for name in MODEL_LIBRARIES},
+        'saved_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+    # Write to a temporary file first: a server loading the model never sees half a file.
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        pickle.dump(bundle, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_model(path: str = MODEL_PATH) -> dict:
+    """
+    Loads a model saved by save_model().
+
+    Args:
+        path: File written by save_model()
+
+    Returns:
+        Dict with 'model', 'feature_names', 'categories', 'versions' and 'saved_at'
+    """
+    with open(path, 'rb') as f:
+        bundle = pickle.load(f)
+    for name, saved in bundle['versions'].items():
+        installed = importlib.metadata.version(name)
+        if installed != saved:
+            warnings.warn(f"{path} was saved with {name} {saved}, {installed} is installed; "
+                          f"predictions may differ", stacklevel=2)
+    return bundle
+
+
+class TipPredictor:
+    """Turns raw bills (dicts) into the model's feature columns and predicts them in one call."""
+
+    def __init__(self, bundle: dict):
+        self.model = bundle['model']
+        self.feature_names = bundle['feature_names']
+        self.categories = bundle['categories']
+
+    def validate(self, row) -> dict:
+        """Checks one bill; raises ValueError with a message for the client."""
+        if not isinstance(row, dict):
+            raise ValueError("Expected a JSON object with one bill")
+        missing = [column for column in (*NUMERIC_COLUMNS, *self.categories) if column not in row]
+        if missing:
+            raise ValueError(f"Missing columns {missing}")
+        for column in NUMERIC_COLUMNS:
+            value = row[column]
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"{column} must be a number, got {value!r}")
+            # json.loads accepts NaN and Infinity, and ints too large for a float overflow.
+            try:
+                finite = math.isfinite(value)
+            except OverflowError:
+                finite = False
+            if not finite:
+                raise ValueError(f"{column} must be a finite number, got {value!r}")
+        for column, values in self.categories.items():
+            if row[column] not in values:
+                raise ValueError(f"{column} must be one of {list(values)}, got {row[column]!r}")
+        return row
+
+    def predict(self, rows: list) -> np.ndarray:
+        """Predicts a list of validated bills with a single vectorized predict call."""
+        features = dummy_features(pd.DataFrame(rows), self.categories)
+        return self.model.predict(features.reindex(columns=self.feature_names, fill_value=0))
+
+
+class MicroBatcher:
+    """
+    Collects concurrent single-row requests into batches for one predict call.
+
+    Args:
+        predict_batch: Function taking a list of rows and returning one prediction per row
+        max_batch_size: Most rows in one batch (1 = no batching)
+        max_wait: Longest time in seconds the first request of a batch waits for others
+    """
+
+    def __init__(self, predict_batch, max_batch_size: int = MAX_BATCH_SIZE, max_wait: float = MAX_WAIT):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.queue = asyncio.Queue()
+        self.n_requests = 0
+        self.n_batches = 0
+
+    async def predict(self, row):
+        """Queues one row and waits for its prediction."""
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((row, future))
+        return await future
+
+    async def _collect(self) -> list:
+        batch = [await self.queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def run(self):
+        """Worker loop: collect a batch, predict it, hand out the results. Runs until cancelled."""
+        while True:
+            batch = await self._collect()
+            # Requests whose client has gone away are dropped before predicting.
+            batch = [(row, future) for row, future in batch if not future.done()]
+            if not batch:
+                continue
+            self.n_requests += len(batch)
+            self.n_batches += 1
+            # The predict call runs on the event loop itself: for a linear model it takes about a
+            # millisecond, less than handing it to a thread would cost.
+            try:
+                predictions = self.predict_batch([row for row, _ in batch])
+            except Exception:
+                # One bad row must not fail the others: predict the batch again row by row.
+                for row, future in batch:
+                    try:
+                        prediction = self.predict_batch([row])[0]
+                    except Exception as exc:
+                        if not future.done():
+                            future.set_exception(exc)
+                        continue
+                    if not future.done():
+                        future.set_result(float(prediction))
+                continue
+            for (_, future), prediction in zip(batch, predictions):
+                if not future.done():
+                    future.set_result(float(prediction))
+
+    def stats(self) -> dict:
+        return {'requests': self.n_requests, 'batches': self.n_batches,
+                'mean_batch_size': round(self.n_requests / self.n_batches, 2) if self.n_batches else 0.0}
+
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+def _response(status: int, payload: dict, keep_alive: bool) -> bytes:
+    body = json.dumps(payload).encode()
+    head = (f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode() + body
+
+
+async def _read_message(reader: asyncio.StreamReader):
+    """Reads one HTTP message: (first line, headers, body), or None when the connection is closed."""
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError:
+        return None
+    lines = head.decode('latin-1').split('\r\n')
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get('content-length', 0)))
+    return lines[0], headers, body
+
+
+class PredictionServer:
+    """
+    asyncio HTTP server for a TipPredictor with micro-batching.
+
+    Args:
+        predictor: TipPredictor (or anything with validate(row) and predict(rows))
+        host: Interface to listen on
+        port: Port to listen on (0 = any free port)
+        max_batch_size: Most requests per predict call (1 = no batching)
+        max_wait: Longest wait in seconds for a batch to fill
+    """
+
+    def __init__(self, predictor, host: str = '127.0.0.1', port: int = 8000,
+                 max_batch_size: int = MAX_BATCH_SIZE, max_wait: float = MAX_WAIT):
+        self.predictor = predictor
+        self.host = host
+        self.port = port
+        self.batcher = MicroBatcher(predictor.predict, max_batch_size, max_wait)
+
+    async def _handle(self, method: str, path: str, body: bytes):
+        if path == '/health':
+            if method != 'GET':
+                return 405, {'error': 'Use GET /health'}
+            return 200, {'status': 'ok', **self.batcher.stats()}
+        if path != '/predict':
+            return 404, {'error': f"Unknown path {path}"}
+        if method != 'POST':
+            return 405, {'error': 'Use POST /predict'}
+        try:
+            row = self.predictor.validate(json.loads(body))
+        except (ValueError, json.JSONDecodeError) as exc:
+            return 400, {'error': str(exc)}
+        try:
+            return 200, {'tip': round(await self.batcher.predict(row), 4)}
+        except Exception as exc:
+            return 500, {'error': f"{type(exc).__name__}: {exc}"}
+
+    async def _connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                message = await _read_message(reader)
+                if message is None:
+                    break
+                request_line, headers, body = message
+                method, path, version = (request_line.split(' ') + ['', ''])[:3]
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                status, payload = await self._handle(method, path, body)
+                writer.write(_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, ready=None):
+        """Serves until cancelled; ready(port) is called once the socket is listening."""
+        server = await asyncio.start_server(self._connection, self.host, self.port)
+        worker = asyncio.create_task(self.batcher.run())
+        self.port = server.sockets[0].getsockname()[1]
+        if ready is not None:
+            ready(self.port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            worker.cancel()
+
+
+async def _client(host: str, port: int, rows: list, n_requests: int, latencies: list):
+    """One keep-alive connection sending n_requests bills one after the other."""
+    reader, writer = await asyncio.open_connection(host, port)
+    bodies = [json.dumps(row).encode() for row in rows]
+    try:
+        for i in range(n_requests):
+            body = bodies[i % len(bodies)]
+            start_time = time.perf_counter()
+            writer.write(b"POST /predict HTTP/1.1\r\nHost: " + host.encode() + b"\r\nContent-Type: application/json\r\n"
+                         b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+            _, _, response = await _read_message(reader)
+            latencies.append(time.perf_counter() - start_time)
+            if b'"tip"' not in response:
+                raise RuntimeError(f"Request failed: {response.decode()}")
+    finally:
+        writer.close()
+
+
+async def load_test(host: str, port: int, rows: list, concurrency: int = 64, n_requests: int = 5_000) -> dict:
+    """
+    Sends single-bill requests from concurrent connections and measures the server.
+
+    Args:
+        host, port: Address of the prediction server
+        rows: Bills to send (cycled through)
+        concurrency: Number of connections sending at the same time
+        n_requests: Total number of requests
+
+    Returns:
+        Dict with throughput (requests/s) and p50/p99/max latency (seconds)
+    """
+    latencies = []
+    per_client = [n_requests // concurrency + (i < n_requests % concurrency) for i in range(concurrency)]
+    start_time = time.perf_counter()
+    await asyncio.gather(*(_client(host, port, rows, count, latencies) for count in per_client if count))
+    elapsed = time.perf_counter() - start_time
+    latencies = np.array(latencies)
+    return {'requests': len(latencies), 'throughput': len(latencies) / elapsed,
+            'p50': float(np.percentile(latencies, 50)), 'p99': float(np.percentile(latencies, 99)),
+            'max': float(latencies.max())}
+
+
+def get_json(host: str, port: int, path: str, row: dict = None) -> dict:
+    """Sends one request and returns the decoded JSON response (GET, or POST when row is given)."""
+    async def request():
+        reader, writer = await asyncio.open_connection(host, port)
+        body = b'' if row is None else json.dumps(row).encode()
+        method = 'GET' if row is None else 'POST'
+        writer.write(f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n"
+                     f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+        _, _, response = await _read_message(reader)
+        writer.close()
+        return json.loads(response)
+    return asyncio.run(request())
+
+
+def start_server_process(model_path: str, max_batch_size: int, max_wait: float, port: int = 0):
+    """Starts `prediction_server.py serve` in a child process; returns (process, port)."""
+    process = subprocess.Popen([sys.executable, os.path.abspath(__file__), 'serve', model_path, '--port', str(port),
+                                '--max-batch-size', str(max_batch_size), '--max-wait', str(max_wait)],
+                               stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line.startswith('Serving on'):
+        process.kill()
+        raise RuntimeError(f"The server did not start: {line!r}")
+    return process, int(line.rsplit(':', 1)[1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a model saved by save_model() over HTTP.")
+    parser.add_argument('command', choices=['serve'])
+    parser.add_argument('model', nargs='?', default=MODEL_PATH)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--max-batch-size', type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument('--max-wait', type=float, default=MAX_WAIT)
+    args = parser.parse_args(argv)
+    server = PredictionServer(TipPredictor(load_model(args.model)), args.host, args.port,
+                              args.max_batch_size, args.max_wait)
+    ready = lambda port: print(f"Serving on http://{args.host}:{port}", flush=True)  # noqa: E731
+    try:
+        asyncio.run(server.serve(ready))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__" and len(sys.argv) > 1:
+    main()
+elif __name__ == "__main__":
+    from sklearn.linear_model import LinearRegression
+
+    from online_regression import make_bills
+
+    workdir = tempfile.mkdtemp()
+    model_path = os.path.join(workdir, 'tip_model.pkl')
+
+    # --- Example 1: Train like tip_prediction_model.py and save the model ---
+    print("--- Example 1: Saving and loading the model ---")
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Day-6'))
+    from dataset_registry import load_dataset  # noqa: E402
+    try:
+        tips = load_dataset('tips')
+    except FileNotFoundError:
+        print("tips is not available offline; training on 244 generated bills instead")
+        tips = make_bills(244, seed=7)
+    df = pd.get_dummies(tips, drop_first=True)
+    model = LinearRegression().fit(df.drop(columns=['tip']), df['tip'])
+    save_model(model, model_path)
+    bundle = load_model(model_path)
+    predictor = TipPredictor(bundle)
+    raw_rows = tips.drop(columns=['tip']).astype({column: object for column in TIPS_CATEGORIES})
+    rows = raw_rows.to_dict('records')
+    same = np.allclose(predictor.predict(rows), model.predict(df.drop(columns=['tip'])))
+    print(f"Saved {os.path.getsize(model_path):,} bytes, versions {bundle['versions']}")
+    print(f"Loaded model, columns {bundle['feature_names']}")
+    print(f"Predictions from raw bills equal the trained model's: {same}")
+    print("-" * 60)
+
+    # --- Example 2: Requests to the server ---
+    print("--- Example 2: Asking the server ---")
+    process, port = start_server_process(model_path, MAX_BATCH_SIZE, MAX_WAIT)
+    try:
+        print(f"POST /predict {rows[0]}\n  -> {get_json('127.0.0.1', port, '/predict', rows[0])}")
+        print(f"POST /predict with day='Mon'\n  -> {get_json('127.0.0.1', port, '/predict', {**rows[0], 'day': 'Mon'})}")
+        print(f"POST /predict with total_bill=NaN\n  -> {get_json('127.0.0.1', port, '/predict', {**rows[0], 'total_bill': float('nan')})}")
+        print(f"GET /health\n  -> {get_json('127.0.0.1', port, '/health')}")
+    finally:
+        process.terminate()
+        process.wait()
+    print("-" * 60)
+
+    # --- Example 3: Load test with and without micro-batching ---
+    print("--- Example 3: Load test (client and server share this machine's CPU) ---")
+    for concurrency, n_requests in ((1, 1_000), (64, 10_000)):
+        for label, max_batch_size in (('no batching', 1), (f'batches of <= {MAX_BATCH_SIZE}', MAX_BATCH_SIZE)):
+            process, port = start_server_process(model_path, max_batch_size, MAX_WAIT)
+            try:
+                result = asyncio.run(load_test('127.0.0.1', port, rows, concurrency, n_requests))
+                stats = get_json('127.0.0.1', port, '/health')
+            finally:
+                process.terminate()
+                process.wait()
+            print(f"{concurrency:>2} connections, {label:<16}: {result['throughput']:7,.0f} requests/s | "
+                  f"p50 {result['p50'] * 1e3:6.2f} ms | p99 {result['p99'] * 1e3:6.2f} ms | "
+                  f"mean batch {stats['mean_batch_size']}")
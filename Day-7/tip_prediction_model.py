@@ -1,4 +1,6 @@
 # Import necessary libraries for data manipulation, plotting, and machine learning.
+import os
+import sys
 import seaborn as sns
 import pandas as pd
 import matplotlib.pyplot as plt
@@ -7,8 +9,13 @@ from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LinearRegression
 from sklearn.metrics import mean_absolute_error
 
-# Load the 'tips' dataset from seaborn.
-df = sns.load_dataset('tips')
+# The offline dataset registry lives in Day-6.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Day-6'))
+from dataset_registry import load_dataset  # noqa: E402
+from prediction_server import MODEL_PATH, save_model  # noqa: E402
+
+# Load the 'tips' dataset (same data as sns.load_dataset('tips'), served from a local copy when offline).
+df = load_dataset('tips')
 # Convert categorical variables into dummy/indicator variables.
 # `drop_first=True` is used to avoid multicollinearity by removing the first category of each feature.
 df = pd.get_dummies(df, drop_first=True)
@@ -24,7 +31,7 @@ plt.show()
 
 # --- Feature and Target Selection ---
 # Define the features (X) by dropping the target column 'tip'.
-X = df.drop(columns=['tip'], axis=1)
+X = df.drop(columns=['tip'])
 # Define the target variable (y).
 y = df['tip']
 
@@ -51,4 +58,9 @@ print("Model trained and predictions made.")
 print(f"Real values (first 5): {y_test.values[:5]}")
 print(f"Predicted values (first 5): {y_pred[:5]}")
 # Print the MAE, formatted to two decimal places.
-print(f"Mean Absolute Error: {mae:.2f}")
\ No newline at end of file
+print(f"Mean Absolute Error: {mae:.2f}")
+
+# --- Saving the Model ---
+# Save the trained model so prediction_server.py can serve it over HTTP.
+save_model(model, MODEL_PATH)
+print(f"Model saved to {MODEL_PATH}")
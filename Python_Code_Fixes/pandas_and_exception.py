@@ -51,31 +51,29 @@ df = pd.DataFrame(data)
 
 def calculate_discount_rate(sale_amount, discount_amount):
     """
-    Calculates discount rate with proper exception handling.
+    Calculates discount rates for whole columns in one vectorized pass.
     
     Args:
-        sale_amount: Sales amount
-        discount_amount: Discount amount
+        sale_amount: Sales amounts (array or Series)
+        discount_amount: Discount amounts (array or Series)
         
     Returns:
-        Discount rate or 0.0 if division by zero occurs
+        Array of discount rates, 0.0 where the sales amount is zero
     """
-    # Using try-except is more Pythonic and handles edge cases gracefully
-    try:
-        return discount_amount / sale_amount
-    except ZeroDivisionError:
-        return 0.
+    sale_amount = np.asarray(sale_amount, dtype=float)
+    discount_amount = np.asarray(discount_amount, dtype=float)
+    # where= skips the zero-sales rows, so they keep the 0.0 from out= and nothing divides by zero
+    return np.divide(discount_amount, sale_amount, out=np.zeros_like(discount_amount), where=sale_amount != 0)
 
 # Measure performance of vectorized approach
 start_time = time.time()
 
-# Fix: Use NumPy's np.where() for conditional vectorized operations
-# This is much faster than apply() as it operates on entire columns at once
-# Syntax: np.where(condition, value_if_true, value_if_false)
-df['Rate'] = np.where(df['Sales'] == 0, 0.0, df['Discount'] / df['Sales'])
+# Fix: Call the vectorized function on entire columns instead of using apply()
+# np.where() inside the function handles the zero-sales case without a Python-level loop
+df['Rate'] = calculate_discount_rate(df['Sales'], df['Discount'])
 
 # Alternative (commented): Using np.vectorize() - slightly slower but still better than apply()
-# df['Rate'] = np.vectorize(calculate_discount_rate)(df['Sales'], df['Discount']) 
+# df['Rate'] = np.vectorize(lambda s, d: d / s if s else 0.0)(df['Sales'], df['Discount']) 
 
 end_time = time.time()
 
@@ -19,43 +19,43 @@ df_reviews = pd.DataFrame({
 })
 
 # --- Decorator for Data Validation ---
-# Define a decorator to check if a performance score is valid before processing.
+# Define a decorator to check if performance scores are valid before processing.
+# It works on whole arrays/Series of scores, so the decorated function is called only once.
 def check_score(func):
     # The wrapper function receives the arguments of the decorated function.
     def wrapper(*args,**kwargs):
         # Get the 'score' from keyword arguments.
         score = kwargs.get('score', None)
-        # If the score is greater than 10, it's considered invalid.
-        if score is not None and score > 10:
-            print(f"Score {score} is invalid and cannot be greater than 10. Setting Risk Index to NaN.")
-            return np.nan # Return NaN for invalid scores.
-        # If the score is valid, call the original function.
-        return func(*args,**kwargs)
+        if score is None:
+            return func(*args,**kwargs)
+        # Scores greater than 10 are considered invalid (NaN compares as False, so it passes through).
+        invalid = np.asarray(score, dtype=float) > 10
+        for bad_score in np.asarray(score, dtype=float)[invalid]:
+            print(f"Score {bad_score} is invalid and cannot be greater than 10. Setting Risk Index to NaN.")
+        # Call the original function, then return NaN for invalid scores.
+        return np.where(invalid, np.nan, func(*args,**kwargs))
     return wrapper
 
 # --- Performance Calculation Function ---
 # Apply the decorator to the function that calculates the performance status.
 @check_score
 def get_performance_status(score, projects):
-    # If the score is missing (NaN), return a default high risk value (e.g., 50.0).
-    if pd.isna(score):
-        return 50.0
-    
-    # If the score is zero, it indicates a critical issue, return a very high risk value (e.g., 100.0).
-    if score == 0:
-        return 100.0
-    
-    # If the number of projects is missing, it might indicate no project data, return 0.0 risk.
-    if pd.isna(projects):
-        return 0.0
-    
-    # Calculate a risk index. A lower score means a higher risk.
-    return 10 / score
+    score = np.asarray(score, dtype=float)
+    projects = np.asarray(projects, dtype=float)
+
+    # Calculate a risk index for every row at once. A lower score means a higher risk.
+    # Zero scores are left out of the division (they get 100.0 below).
+    risk = np.divide(10, score, out=np.full_like(score, np.nan), where=score != 0)
+
+    # np.select picks the first matching rule per row, in the same order as the original if-chain:
+    # - missing score (NaN) -> default high risk value (50.0)
+    # - zero score -> critical issue, very high risk value (100.0)
+    # - missing projects -> no project data, 0.0 risk
+    return np.select([np.isnan(score), score == 0, np.isnan(projects)], [50.0, 100.0, 0.0], default=risk)
 
 # --- Data Processing and Analysis ---
-# Apply the function to each row of the reviews DataFrame to calculate the 'Risk_Index'.
-# The lambda function passes the 'Score' and 'Projects' of each row to our decorated function.
-df_reviews['Risk_Index'] = df_reviews.apply(lambda row: get_performance_status(score=row['Score'], projects=row['Projects']), axis=1)
+# Calculate the 'Risk_Index' for all reviews in one vectorized call instead of a row-wise apply.
+df_reviews['Risk_Index'] = get_performance_status(score=df_reviews['Score'], projects=df_reviews['Projects'])
 
 # Merge the employee and review DataFrames using a 'left' join.
 # This keeps all employees from df_employees and matches them with their review data.
@@ -41,19 +41,23 @@ df['Date'] = pd.to_datetime(df['Date'], utc=True)
 df['Cost'] = df['Cost'].fillna(df['Cost'].mean())
 
 
-# Define a function to calculate Return on Investment (ROI).
+# Define a function to calculate Return on Investment (ROI) for whole columns at once.
+# A zero cost gives an infinite ROI, as it did when the rows were divided one by one.
 def calculate_roi(views, cost):
-    try:
-        # ROI formula: (Revenue / Cost) * 100. Here, we use 'Views' as a proxy for revenue.
-        return (views / cost) * 100
-    except ZeroDivisionError:
-        # Handle cases where cost is zero to avoid division errors.
-        print("Cost is zero, cannot calculate ROI.")
-        return 0.0
+    views = np.asarray(views, dtype=float)
+    cost = np.asarray(cost, dtype=float)
+    # ROI formula: (Revenue / Cost) * 100. Here, we use 'Views' as a proxy for revenue.
+    # The inf is wanted here, so NumPy's divide-by-zero warning is turned off; the print below reports it.
+    with np.errstate(divide='ignore', invalid='ignore'):
+        roi = (views / cost) * 100
+    zero_cost = cost == 0
+    if zero_cost.any():
+        print(f"Cost is zero for {zero_cost.sum()} row(s), ROI is infinite there.")
+    return roi
     
-# Apply the ROI function to each row of the DataFrame to create a new 'ROI' column.
-# `axis=1` ensures the function is applied row-wise.
-df['ROI'] = df.apply(lambda row: calculate_roi(row['Views'], row['Cost']), axis=1)
+# Apply the ROI function to the full 'Views' and 'Cost' columns to create a new 'ROI' column.
+# No row-wise apply is needed because the function is vectorized.
+df['ROI'] = calculate_roi(df['Views'], df['Cost'])
 
 
 # --- 3. Data Analysis and Filtering ---